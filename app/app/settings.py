@@ -47,7 +47,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.RequestDecompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -137,6 +141,77 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
+DEFAULT_FILE_STORAGE = 'core.storage.ShardedFileSystemStorage'
+
+# Project data blobs up to this many bytes are kept compressed in the
+# database instead of on disk, 0 keeps every blob on the filesystem.
+PROJECT_DATA_INLINE_MAX_SIZE = int(
+    os.environ.get('PROJECT_DATA_INLINE_MAX_SIZE', 0)
+)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 
 AUTH_USER_MODEL = 'core.User'
+
+# Incremental project sync feed
+PROJECT_CHANGES_PAGE_SIZE = 500
+PROJECT_CHANGES_RETENTION_DAYS = 30
+
+# Most projects a single batch-get request may fetch
+PROJECT_BATCH_MAX_SIZE = 100
+
+# Most items a single bulk create/update/delete request may carry
+BULK_MAX_SIZE = 500
+
+# Projects read per query while streaming a ZIP export
+PROJECT_EXPORT_CHUNK_SIZE = 500
+
+# Most sub-requests a single /api/batch/ request may run
+BATCH_MAX_REQUESTS = 20
+
+# Project data revisions store a full keyframe every this many revisions
+PROJECT_REVISION_KEYFRAME_INTERVAL = 16
+
+# Autosaves only add a history entry once per this many seconds
+PROJECT_AUTOSAVE_WINDOW = 60
+
+# Seconds an upload ticket handed out by a dedupe probe stays valid
+UPLOAD_TICKET_MAX_AGE = 60 * 60
+
+# Limits for gzip/zstd compressed request bodies
+REQUEST_DECOMPRESSION_MAX_SIZE = 50 * 1024 * 1024
+REQUEST_DECOMPRESSION_MAX_RATIO = 100
+
+# Response compression, bodies shorter than COMPRESSION_MIN_SIZE are sent
+# as is. The compressed form of immutable responses up to
+# COMPRESSION_CACHE_MAX_SIZE bytes is kept in the given cache.
+COMPRESSION_MIN_SIZE = 200
+COMPRESSION_CACHE_ALIAS = 'default'
+COMPRESSION_CACHE_MAX_SIZE = 4 * 1024 * 1024
+COMPRESSION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Per-request Server-Timing headers and timing log records. Off by
+# default, the headers show clients how the server spends its time.
+SERVER_TIMING = bool(int(os.environ.get('SERVER_TIMING', 0)))
+
+# Request, query, upload and cache metrics served to Prometheus from
+# /api/metrics/. Each process flushes its own file into METRICS_DIR at most
+# every METRICS_FLUSH_INTERVAL seconds; empty the directory on deploy.
+METRICS = bool(int(os.environ.get('METRICS', 1)))
+METRICS_DIR = os.environ.get('METRICS_DIR', '/tmp/metrics')
+METRICS_FLUSH_INTERVAL = 5
+
+# orjson backed JSON rendering and parsing for the API, JSON stays the
+# default and clients may ask for application/msgpack instead
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.OrjsonRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.OrjsonParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
@@ -18,8 +18,18 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core import views as core_views
+from core.storage import INLINE_PREFIX
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('user.urls')),
     path('api/project/', include('project.urls')),
+    path('api/batch/', core_views.BatchView.as_view(), name='batch'),
+    path('api/metrics/', core_views.MetricsView.as_view(), name='metrics'),
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}{INLINE_PREFIX}<path:name>',
+        core_views.inline_blob,
+        name='inline-blob'
+    ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,90 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from core.models import Application, Project, Tag
+
+
+PCSDT_DO_RE = re.compile(r'(<Do type="list">\n)(.*?)(\s*</Do>)', re.S)
+PCSDT_REPEAT_RE = re.compile(r'(<Value type="const">)\d+(</Value>)')
+PCSDT_STEP = (
+    '{indent}<Statement type="method" obj="CC.Plait" name="Plait" '
+    'method="{method}">\n'
+    '{indent}  <Arg type="const">{arg}</Arg>\n'
+    '{indent}</Statement>\n'
+)
+PCSDT_METHODS = (
+    ('Rotate', -45, 45),
+    ('Dilate by percent', 50, 110),
+    ('Translate by percent', 10, 100),
+)
+
+
+def create_projects(count, name='bench'):
+    """Bulk create count projects for a new user, return their queryset.
+
+    Meant for benchmark commands, which run it inside a transaction that
+    is rolled back afterwards.
+    """
+    user = get_user_model().objects.create_user(
+        f'{name}@csdt.org',
+        name,
+        None
+    )
+    application = Application.objects.create(name=name, link=f'{name}/')
+    tags = [
+        Tag.objects.create(name=f'{name} {i}') for i in range(3)
+    ]
+    projects = Project.objects.bulk_create(
+        Project(
+            owner=user,
+            title=f'Project {i}',
+            description='A project with a description ' * 4,
+            application=application,
+            data=f'uploads/project/ab/cd/{i}.xml',
+            modified_date_history=['2021-11-02T10:30:15Z'] * 5,
+            modified_data_history=[f'uploads/project/{i}.xml'] * 5,
+            modified_thumbnail_history=[],
+        ) for i in range(count)
+    )
+    Project.tags.through.objects.bulk_create(
+        Project.tags.through(project_id=project.pk, tag_id=tag.pk)
+        for project in projects for tag in tags
+    )
+
+    return Project.objects.filter(owner=user)
+
+
+def pcsdt_variant(rng, max_steps=40):
+    """Return a random pCSDT project modeled on samples/data.xml.
+
+    The plait loop of the sample gets a random repeat count and between
+    one and max_steps random transformations, so variants differ in both
+    content and size like real projects.
+    """
+    sample = (settings.BASE_DIR / 'samples/data.xml').read_text()
+    indent = ' ' * 20
+    steps = ''.join(
+        PCSDT_STEP.format(
+            indent=indent,
+            method=method,
+            arg=rng.randint(low, high)
+        ) for method, low, high in (
+            rng.choice(PCSDT_METHODS)
+            for _ in range(rng.randint(1, max_steps))
+        )
+    )
+    sample = PCSDT_DO_RE.sub(
+        lambda match: match.group(1) + indent +
+        '<Statement type="method" obj="CC.Plait" name="Plait" '
+        'method="Duplicate" />\n' + steps.rstrip('\n') + match.group(3),
+        sample
+    )
+    sample = PCSDT_REPEAT_RE.sub(
+        lambda match: f'{match.group(1)}{rng.randint(2, 60)}{match.group(2)}',
+        sample,
+        count=1
+    )
+
+    return sample.encode()
@@ -0,0 +1,80 @@
+import difflib
+import zlib
+
+
+COPY = 0
+INSERT = 1
+
+
+def _write_varint(out, value):
+    """Append an unsigned LEB128 integer"""
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, position):
+    """Read an unsigned LEB128 integer, return (value, next position)"""
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def encode_delta(base, target):
+    """Return a compressed delta that rebuilds target from base.
+
+    The delta is a sequence of COPY(offset, length) ranges of base and
+    INSERT(length, bytes) literals, matched line by line.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    offsets = [0]
+    for line in base_lines:
+        offsets.append(offsets[-1] + len(line))
+
+    matcher = difflib.SequenceMatcher(
+        None,
+        base_lines,
+        target_lines,
+        autojunk=False
+    )
+    out = bytearray()
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            out.append(COPY)
+            _write_varint(out, offsets[i1])
+            _write_varint(out, offsets[i2] - offsets[i1])
+        elif j2 > j1:
+            literal = b''.join(target_lines[j1:j2])
+            out.append(INSERT)
+            _write_varint(out, len(literal))
+            out += literal
+
+    return zlib.compress(bytes(out))
+
+
+def apply_delta(base, delta):
+    """Rebuild the target of a delta made by encode_delta"""
+    ops = zlib.decompress(delta)
+    pieces = []
+    position = 0
+    while position < len(ops):
+        op = ops[position]
+        if op == COPY:
+            offset, position = _read_varint(ops, position + 1)
+            length, position = _read_varint(ops, position)
+            pieces.append(base[offset:offset + length])
+        elif op == INSERT:
+            length, position = _read_varint(ops, position + 1)
+            pieces.append(ops[position:position + length])
+            position += length
+        else:
+            raise ValueError(f'Unknown delta op {op}')
+
+    return b''.join(pieces)
@@ -0,0 +1,451 @@
+import difflib
+import hashlib
+import itertools
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Application, Project, ProjectRevision, Software, \
+    Tag, Tool
+from project import urls as project_urls
+from user import urls as user_urls
+
+
+PREFIX = 'bench-api'
+PASSWORD = 'benchpass'
+BULK_ITEMS = 20
+
+
+def endpoints():
+    """Return every (method, url name) pair routed by project and user"""
+    pairs = set()
+    for pattern in project_urls.router.urls:
+        for method in getattr(pattern.callback, 'actions', {}):
+            pairs.add((method.upper(), f'project:{pattern.name}'))
+    for pattern in user_urls.urlpatterns:
+        view = pattern.callback.view_class
+        for method in ('get', 'post', 'put', 'patch', 'delete'):
+            if hasattr(view, method):
+                pairs.add((method.upper(), f'user:{pattern.name}'))
+
+    return pairs
+
+
+class Command(BaseCommand):
+    """Django command benchmarking every project and user API endpoint.
+
+    The database is seeded with seed_data inside a transaction that is
+    rolled back, uploads go to a temporary MEDIA_ROOT. Each endpoint is
+    called through the test client and reported with its wall time,
+    query count and peak memory allocated per call. With --baseline the
+    results are compared against a stored run and regressions beyond
+    --threshold fail the command.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--projects', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--only', help='Run cases containing this text')
+        parser.add_argument('--baseline', help='Baseline JSON to compare')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed relative slowdown, 0.2 is 20%%')
+        parser.add_argument('--output', help='Write the results as JSON')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(
+                    MEDIA_ROOT=media_root,
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+                ), \
+                transaction.atomic():
+            self._seed(options)
+            cases = self._cases()
+            missing = endpoints() - {(m, name) for m, name, _ in cases}
+            for method, name in sorted(missing):
+                self.stderr.write(f'No benchmark for {method} {name}')
+
+            results = {}
+            for method, name, prepare in cases:
+                label = f'{method} {name}'
+                if options['only'] and options['only'] not in label:
+                    continue
+                results[label] = self._run(method, prepare,
+                                           options['repeat'])
+                self.stdout.write(
+                    f'{label:>38}: {self._summary(results[label])}'
+                )
+            transaction.set_rollback(True)
+
+        report = {'projects': options['projects'], 'results': results}
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            if baseline['projects'] != options['projects']:
+                self.stderr.write(
+                    f'The baseline was seeded with {baseline["projects"]} '
+                    'projects, results may not compare'
+                )
+            regressions = self._regressions(
+                results,
+                baseline['results'],
+                options['threshold']
+            )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(
+                    f'{len(regressions)} regressions against the baseline'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(results)} endpoints benchmarked'
+        ))
+
+    def _seed(self, options):
+        """Seed the database and set up the objects the cases use"""
+        call_command(
+            'seed_data',
+            users=options['users'],
+            projects=options['projects'],
+            prefix=PREFIX,
+            password=PASSWORD,
+            stdout=StringIO()
+        )
+        self.user = get_user_model().objects.get(username=f'{PREFIX}0')
+        self.user.is_staff = True
+        self.user.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.names = itertools.count()
+
+        projects = Project.objects.filter(owner=self.user)
+        self.project_ids = list(projects.values_list('pk', flat=True))
+        if not self.project_ids:
+            raise CommandError('Seeding gave the benchmark user no projects')
+        self.project_id = itertools.cycle(self.project_ids)
+        self.tag_ids = list(
+            Tag.objects.filter(name__startswith=PREFIX)
+            .values_list('pk', flat=True)[:3]
+        )
+        self.application = Application.objects.filter(
+            name__startswith=PREFIX
+        ).first()
+        self.software = Software.objects.filter(
+            name__startswith=PREFIX
+        ).first()
+        self.tool = Tool.objects.filter(name__startswith=PREFIX).first()
+
+        self.blob = Project.objects.get(pk=self.project_ids[0]).data
+        self.content = self.blob.read()
+        self.thumbnail = \
+            (settings.BASE_DIR / 'samples/thumbnail.png').read_bytes()
+
+        revised = Project.objects.get(pk=self.project_ids[0])
+        for name in revised.modified_data_history:
+            ProjectRevision.objects.record(revised, name)
+        self.revision = revised.revisions.values_list(
+            'number', flat=True
+        ).last()
+
+    def _name(self, kind):
+        return f'{PREFIX} new {kind} {next(self.names)}'
+
+    def _project(self):
+        """Create a project for cases that change or delete one"""
+        return Project.objects.create(
+            owner=self.user,
+            title=self._name('project'),
+            application=self.application,
+            data=self.blob.name
+        )
+
+    def _project_data(self):
+        return {
+            'title': self._name('project'),
+            'application': self.application.pk,
+            'tags': self.tag_ids,
+        }
+
+    def _cases(self):
+        """Return (method, url name, prepare) for every benchmark.
+
+        prepare runs before each call, untimed, and returns the path, the
+        payload and its format.
+        """
+        def url(name, *args):
+            return reverse(name, args=args)
+
+        def detail(name, pk):
+            return lambda: (url(name, pk), None, None)
+
+        def attr_cases(basename, model, data, create):
+            return [
+                ('GET', f'project:{basename}-list',
+                 lambda: (url(f'project:{basename}-list'), None, None)),
+                ('POST', f'project:{basename}-list',
+                 lambda: (url(f'project:{basename}-list'), data(), 'json')),
+                ('GET', f'project:{basename}-detail',
+                 lambda: (url(f'project:{basename}-detail',
+                              create().pk), None, None)),
+                ('PUT', f'project:{basename}-detail',
+                 lambda: (url(f'project:{basename}-detail', create().pk),
+                          data(), 'json')),
+                ('PATCH', f'project:{basename}-detail',
+                 lambda: (url(f'project:{basename}-detail', create().pk),
+                          {'description': 'Benchmarked'}
+                          if model is not Tool else {'name': data()['name']},
+                          'json')),
+                ('DELETE', f'project:{basename}-detail',
+                 lambda: (url(f'project:{basename}-detail',
+                              create().pk), None, None)),
+            ]
+
+        def application():
+            name = self._name('application')
+            return {'name': name, 'link': name.replace(' ', '-') + '/'}
+
+        def software():
+            return {
+                'name': self._name('software'),
+                'application': self.application.pk,
+                'tool': self.tool.pk,
+            }
+
+        def tool():
+            return {'name': self._name('tool')}
+
+        def patch():
+            project = self._project()
+            changed = self.content.replace(b'</pCSDT>', b'<!-- -->\n</pCSDT>')
+            diff = ''.join(difflib.unified_diff(
+                self.content.decode().splitlines(keepends=True),
+                changed.decode().splitlines(keepends=True)
+            ))
+            return (url('project:project-patch-data', project.pk), {
+                'base': hashlib.sha256(self.content).hexdigest(),
+                'patch': diff,
+            }, 'json')
+
+        def bulk_delete():
+            projects = Project.objects.bulk_create(
+                Project(
+                    owner=self.user,
+                    title=self._name('project'),
+                    application=self.application
+                ) for _ in range(BULK_ITEMS)
+            )
+            return (url('project:project-bulk'),
+                    [project.pk for project in projects], 'json')
+
+        cases = [
+            ('GET', 'project:tag-list',
+             lambda: (url('project:tag-list'), None, None)),
+            ('POST', 'project:tag-list',
+             lambda: (url('project:tag-list'),
+                      {'name': self._name('tag')}, 'json')),
+            ('POST', 'project:tag-bulk',
+             lambda: (url('project:tag-bulk'), [
+                 {'name': self._name('tag')} for _ in range(BULK_ITEMS)
+             ], 'json')),
+            ('GET', 'project:project-list',
+             lambda: (url('project:project-list'), None, None)),
+            ('POST', 'project:project-list',
+             lambda: (url('project:project-list'),
+                      self._project_data(), 'json')),
+            ('GET', 'project:project-detail',
+             lambda: (url('project:project-detail', next(self.project_id)),
+                      None, None)),
+            ('PUT', 'project:project-detail',
+             lambda: (url('project:project-detail', self._project().pk),
+                      self._project_data(), 'json')),
+            ('PATCH', 'project:project-detail',
+             lambda: (url('project:project-detail', self._project().pk),
+                      {'title': self._name('project')}, 'json')),
+            ('DELETE', 'project:project-detail',
+             lambda: (url('project:project-detail', self._project().pk),
+                      None, None)),
+            ('POST', 'project:project-upload-data',
+             lambda: (url('project:project-upload-data', self._project().pk),
+                      {'data': SimpleUploadedFile('data.xml', self.content)},
+                      'multipart')),
+            ('POST', 'project:project-upload-image',
+             lambda: (url('project:project-upload-image',
+                          self._project().pk),
+                      {'thumbnail': SimpleUploadedFile('thumbnail.png',
+                                                       self.thumbnail)},
+                      'multipart')),
+            ('POST', 'project:project-probe-data',
+             lambda: (url('project:project-probe-data', self._project().pk), {
+                 'sha256': hashlib.sha256(self.content).hexdigest(),
+                 'size': len(self.content),
+             }, 'json')),
+            ('POST', 'project:project-probe-image',
+             lambda: (url('project:project-probe-image',
+                          self._project().pk), {
+                 'sha256': hashlib.sha256(self.thumbnail).hexdigest(),
+                 'size': len(self.thumbnail),
+             }, 'json')),
+            ('POST', 'project:project-patch-data', patch),
+            ('GET', 'project:project-revisions',
+             detail('project:project-revisions', self.project_ids[0])),
+            ('GET', 'project:project-revision',
+             lambda: (url('project:project-revision', self.project_ids[0],
+                          self.revision), None, None)),
+            ('POST', 'project:project-fork',
+             detail('project:project-fork', self.project_ids[0])),
+            ('POST', 'project:project-bulk',
+             lambda: (url('project:project-bulk'), [
+                 self._project_data() for _ in range(BULK_ITEMS)
+             ], 'json')),
+            ('PATCH', 'project:project-bulk',
+             lambda: (url('project:project-bulk'), [
+                 {'id': project_id, 'title': self._name('project')}
+                 for project_id in self.project_ids[:BULK_ITEMS]
+             ], 'json')),
+            ('DELETE', 'project:project-bulk', bulk_delete),
+            ('POST', 'project:project-batch-get',
+             lambda: (url('project:project-batch-get'),
+                      {'ids': self.project_ids[:BULK_ITEMS]}, 'json')),
+            ('GET', 'project:project-changes',
+             lambda: (url('project:project-changes') + '?since=0',
+                      None, None)),
+            ('GET', 'project:project-export',
+             lambda: (url('project:project-export'), None, None)),
+            ('POST', 'project:software-instantiate',
+             lambda: (url('project:software-instantiate', self.software.pk),
+                      {'title': self._name('project')}, 'json')),
+            ('POST', 'project:software-upload-data',
+             lambda: (url('project:software-upload-data', self.software.pk),
+                      {'default_file': SimpleUploadedFile('data.xml',
+                                                          self.content)},
+                      'multipart')),
+            ('POST', 'user:create',
+             lambda: (url('user:create'), {
+                 'username': f'{PREFIX}-new{next(self.names)}',
+                 'email': f'{PREFIX}-new{next(self.names)}@csdt.org',
+                 'password': PASSWORD,
+                 'name': 'Benchmark',
+             }, 'json')),
+            ('POST', 'user:token',
+             lambda: (url('user:token'), {
+                 'username': self.user.username,
+                 'password': PASSWORD,
+             }, 'json')),
+            ('GET', 'user:current',
+             lambda: (url('user:current'), None, None)),
+            ('PUT', 'user:current',
+             lambda: (url('user:current'), {
+                 'username': self.user.username,
+                 'email': self.user.email,
+                 'password': PASSWORD,
+                 'name': self._name('user'),
+             }, 'json')),
+            ('PATCH', 'user:current',
+             lambda: (url('user:current'),
+                      {'name': self._name('user')}, 'json')),
+        ]
+        cases += attr_cases(
+            'application', Application, application,
+            lambda: Application.objects.create(**application())
+        )
+        cases += attr_cases(
+            'software', Software, software,
+            lambda: Software.objects.create(
+                name=self._name('software'),
+                application=self.application,
+                tool=self.tool
+            )
+        )
+        cases += attr_cases(
+            'tool', Tool, tool,
+            lambda: Tool.objects.create(**tool())
+        )
+
+        return cases
+
+    def _call(self, method, path, data, data_format):
+        """Make one request, reading streamed bodies to the end"""
+        start = time.perf_counter()
+        response = getattr(self.client, method.lower())(
+            path,
+            data,
+            format=data_format
+        )
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method} {path} answered {response.status_code}'
+            )
+
+        return elapsed
+
+    def _run(self, method, prepare, repeat):
+        """Time an endpoint, then count its queries and allocations"""
+        self._call(method, *prepare())
+        timings = [self._call(method, *prepare()) for _ in range(repeat)]
+
+        request = prepare()
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            try:
+                self._call(method, *request)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'mean_ms': statistics.mean(timings) * 1000,
+            'p95_ms': timings[max(int(len(timings) * 0.95) - 1, 0)] * 1000,
+            'queries': len(queries),
+            'alloc_kib': peak / 1024,
+        }
+
+    def _summary(self, result):
+        """Format the measurements of one endpoint"""
+        return (f'mean {result["mean_ms"]:.3f}ms '
+                f'p95 {result["p95_ms"]:.3f}ms '
+                f'{result["queries"]} queries '
+                f'{result["alloc_kib"]:.0f}KiB')
+
+    def _regressions(self, results, baseline, threshold):
+        """Describe every measurement worse than the baseline allows"""
+        regressions = []
+        for label, result in sorted(results.items()):
+            base = baseline.get(label)
+            if base is None:
+                continue
+            if result['queries'] > base['queries']:
+                regressions.append(
+                    f'{label}: {result["queries"]} queries, '
+                    f'baseline {base["queries"]}'
+                )
+            for key in ('mean_ms', 'alloc_kib'):
+                if result[key] > base[key] * (1 + threshold):
+                    regressions.append(
+                        f'{label}: {key} {result[key]:.3f}, '
+                        f'baseline {base[key]:.3f}'
+                    )
+
+        return regressions
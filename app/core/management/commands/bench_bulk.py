@@ -0,0 +1,97 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Application, Tag
+
+
+class Command(BaseCommand):
+    """Django command to compare bulk and single item project/tag creates.
+
+    Runs against the configured database inside a transaction that is
+    rolled back, so nothing is left behind.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=200)
+
+    def handle(self, *args, **options):
+        count = options['items']
+        with transaction.atomic():
+            client = self._client()
+            application = Application.objects.create(
+                name='bench-bulk',
+                link='bench-bulk/'
+            )
+            tag_ids = [
+                Tag.objects.create(name=f'bench-bulk {i}').id
+                for i in range(3)
+            ]
+
+            def projects(prefix):
+                return [
+                    {
+                        'title': f'{prefix} {i}',
+                        'application': application.id,
+                        'tags': tag_ids,
+                    } for i in range(count)
+                ]
+
+            def tags(prefix):
+                return [{'name': f'{prefix} {i}'} for i in range(count)]
+
+            runs = (
+                ('projects', 'project:project-list', 'project:project-bulk',
+                 projects),
+                ('tags', 'project:tag-list', 'project:tag-bulk', tags),
+            )
+            for name, list_url, bulk_url, items in runs:
+                single = self._run(lambda: [
+                    client.post(reverse(list_url), item, format='json')
+                    for item in items('single')
+                ])
+                bulk = self._run(lambda: [
+                    client.post(reverse(bulk_url), items('bulk'),
+                                format='json')
+                ])
+                self.stdout.write(
+                    f'{count} {name}: single {self._summary(*single)}, '
+                    f'bulk {self._summary(*bulk)}, '
+                    f'{single[0] / bulk[0]:.1f}x'
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def _client(self):
+        """Return an API client logged in as a throwaway staff user"""
+        user = get_user_model().objects.create_user(
+            'bench-bulk@csdt.org',
+            'bench-bulk',
+            None
+        )
+        user.is_staff = True
+        user.save()
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(user)
+
+        return client
+
+    def _run(self, requests):
+        """Return the time taken and queries made by a list of requests"""
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for response in requests():
+                assert response.status_code == 201, response.content
+            elapsed = time.perf_counter() - start
+
+        return elapsed, len(queries)
+
+    def _summary(self, elapsed, queries):
+        """Format time in milliseconds and query count"""
+        return f'{elapsed * 1000:.1f}ms/{queries} queries'
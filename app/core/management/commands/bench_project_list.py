@@ -0,0 +1,78 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from core.benchmarks import create_projects
+from project.serializers import ProjectSerializer, ProjectValuesSerializer
+
+
+class Command(BaseCommand):
+    """Django command to compare the project list serializers.
+
+    Serializes the same projects with ProjectSerializer and the values
+    based ProjectValuesSerializer, inside a transaction that is rolled
+    back, and checks that both give the same output.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        context = {'request': RequestFactory().get(
+            '/api/project/',
+            HTTP_HOST='localhost'
+        )}
+        with transaction.atomic():
+            queryset = create_projects(options['projects'],
+                                       'bench-project-list')
+            serializers = (
+                ('ProjectSerializer', lambda: ProjectSerializer(
+                    queryset.prefetch_related('tags'),
+                    many=True,
+                    context=context
+                ).data),
+                ('ProjectValuesSerializer', lambda: ProjectValuesSerializer(
+                    queryset,
+                    context=context
+                ).data),
+            )
+            results, outputs = {}, []
+            for name, serialize in serializers:
+                results[name], output = self._run(serialize,
+                                                  options['repeat'])
+                outputs.append(output)
+                self.stdout.write(
+                    f'{name:>23}: {self._summary(results[name])}'
+                )
+            transaction.set_rollback(True)
+
+        if [dict(item) for item in outputs[0]] != outputs[1]:
+            raise CommandError('The serializers gave different output')
+
+        speedup = statistics.mean(results['ProjectSerializer']) / \
+            statistics.mean(results['ProjectValuesSerializer'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["projects"]} projects, values serializer is '
+            f'{speedup:.1f}x'
+        ))
+
+    def _run(self, serialize, repeat):
+        """Return serialization times in seconds and the last output"""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = serialize()
+            timings.append(time.perf_counter() - start)
+
+        return timings, output
+
+    def _summary(self, timings):
+        """Format mean and p95 serialization time in milliseconds"""
+        timings = sorted(timings)
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        return (f'mean {statistics.mean(timings) * 1000:.3f}ms '
+                f'p95 {p95 * 1000:.3f}ms')
@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import create_projects
+from core.renderers import OrjsonRenderer
+from project.serializers import ProjectSerializer
+
+
+class Command(BaseCommand):
+    """Django command to compare JSON renderers on a large project list.
+
+    Creates the projects inside a transaction that is rolled back, so it
+    can be pointed at any database.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            data = self._project_list(options['projects'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'Rendering {len(data)} projects {options["repeat"]} times'
+        )
+        results = {}
+        for renderer in (JSONRenderer(), OrjsonRenderer()):
+            name = type(renderer).__name__
+            results[name] = self._run(renderer, data, options['repeat'])
+            self.stdout.write(f'{name:>15}: {self._summary(results[name])}')
+
+        speedup = statistics.mean(results['JSONRenderer']) / \
+            statistics.mean(results['OrjsonRenderer'])
+        self.stdout.write(self.style.SUCCESS(f'orjson is {speedup:.1f}x'))
+
+    def _project_list(self, count):
+        """Return the serialized data of count new projects"""
+        queryset = create_projects(count, 'bench-renderers') \
+            .prefetch_related('tags')
+
+        return ProjectSerializer(queryset, many=True).data
+
+    def _run(self, renderer, data, repeat):
+        """Return render times in seconds"""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            renderer.render(data)
+            timings.append(time.perf_counter() - start)
+
+        return timings
+
+    def _summary(self, timings):
+        """Format mean and p95 render time in milliseconds"""
+        timings = sorted(timings)
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        return (f'mean {statistics.mean(timings) * 1000:.3f}ms '
+                f'p95 {p95 * 1000:.3f}ms')
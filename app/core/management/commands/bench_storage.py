@@ -0,0 +1,79 @@
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core.models import project_data_file_path
+from core.storage import HybridStorage
+
+
+class Command(BaseCommand):
+    """Django command to compare inline and filesystem project data storage.
+
+    Saves and loads the same blob through HybridStorage, once with inlining
+    disabled and once with the blob below the inline threshold, against a
+    throwaway media root and the configured database.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200)
+        parser.add_argument(
+            '--file',
+            default=str(settings.BASE_DIR / 'samples/data.xml'),
+            help='Blob to save and load, defaults to the sample project'
+        )
+
+    def handle(self, *args, **options):
+        with open(options['file'], 'rb') as f:
+            content = f.read()
+        self.stdout.write(
+            f'{options["count"]} saves/loads of a {len(content)} byte blob'
+        )
+
+        modes = (
+            ('filesystem', 0),
+            ('inline', len(content)),
+        )
+        for mode, max_size in modes:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(MEDIA_ROOT=media_root,
+                                      PROJECT_DATA_INLINE_MAX_SIZE=max_size):
+                save, load = self._run(HybridStorage(), content,
+                                       options['count'])
+            self.stdout.write(
+                f'{mode:>10}: save {self._summary(save)}, '
+                f'load {self._summary(load)}'
+            )
+
+    def _run(self, storage, content, count):
+        """Return save and load latencies in seconds"""
+        save, load, names = [], [], []
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                names.append(storage.save(
+                    project_data_file_path(None, 'data.xml'),
+                    ContentFile(content)
+                ))
+                save.append(time.perf_counter() - start)
+            for name in names:
+                start = time.perf_counter()
+                with storage.open(name) as blob:
+                    blob.read()
+                load.append(time.perf_counter() - start)
+        finally:
+            for name in names:
+                storage.delete(name)
+
+        return save, load
+
+    def _summary(self, timings):
+        """Format mean and p95 latency in milliseconds"""
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        return (f'mean {statistics.mean(timings) * 1000:.3f}ms '
+                f'p95 {p95 * 1000:.3f}ms')
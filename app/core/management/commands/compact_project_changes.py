@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from core.models import ProjectChange
+
+
+class Command(BaseCommand):
+    """Django command to compact the project change log.
+
+    Entries superseded by a newer entry for the same project are dropped.
+    Tombstones past the retention window are replaced by one COMPACTED
+    marker per owner; sync cursors older than the marker must resync.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.PROJECT_CHANGES_RETENTION_DAYS,
+            help='Keep tombstones younger than this many days'
+        )
+
+    def handle(self, *args, **options):
+        newer = ProjectChange.objects.filter(
+            owner=OuterRef('owner'),
+            project_id=OuterRef('project_id'),
+            seq__gt=OuterRef('seq')
+        )
+        superseded, _ = ProjectChange.objects.filter(
+            Exists(newer),
+            project_id__isnull=False
+        ).delete()
+        self.stdout.write(f'{superseded} superseded changes removed')
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = ProjectChange.objects.filter(
+            kind=ProjectChange.Kind.DELETED,
+            created_date__lt=cutoff
+        )
+        horizons = expired.values('owner') \
+            .annotate(horizon=Max('seq')) \
+            .values_list('owner', 'horizon')
+        tombstones = 0
+        for owner_id, horizon in horizons:
+            tombstones += self._compact_owner(expired, owner_id, horizon)
+        self.stdout.write(f'{tombstones} tombstones compacted')
+
+        self.stdout.write(self.style.SUCCESS('Change log compacted!'))
+
+    @transaction.atomic
+    def _compact_owner(self, expired, owner_id, horizon):
+        """Replace an owner's expired tombstones with a single marker"""
+        markers = ProjectChange.objects.filter(
+            owner_id=owner_id,
+            kind=ProjectChange.Kind.COMPACTED
+        )
+        markers.filter(seq__lt=horizon).delete()
+        expired = expired.filter(owner_id=owner_id)
+        marked = 0
+        if not markers.exists():
+            marked = expired.filter(seq=horizon).update(
+                kind=ProjectChange.Kind.COMPACTED,
+                project_id=None
+            )
+        removed, _ = expired.delete()
+
+        return removed + marked
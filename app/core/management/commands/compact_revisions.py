@@ -0,0 +1,89 @@
+import zlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Func, Sum
+
+from core.deltas import apply_delta, encode_delta
+from core.models import Project, ProjectRevision
+
+
+class Command(BaseCommand):
+    """Django command to re-keyframe project revision chains.
+
+    Chains longer than PROJECT_REVISION_KEYFRAME_INTERVAL, e.g. after the
+    interval was lowered, are re-encoded. With --import-history the data
+    history of projects without revisions is encoded first, so the final
+    report covers the existing corpus.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--import-history', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        if options['import_history']:
+            imported = self._import_history(options['batch_size'])
+            self.stdout.write(f'{imported} projects imported')
+
+        interval = settings.PROJECT_REVISION_KEYFRAME_INTERVAL
+        long_chains = ProjectRevision.objects.filter(chain__gte=interval) \
+            .values_list('project_id', flat=True).distinct()
+        for project_id in long_chains:
+            self._rekeyframe(project_id, interval)
+        self.stdout.write(f'{len(long_chains)} projects re-keyframed')
+
+        totals = ProjectRevision.objects.aggregate(
+            size=Sum('size'),
+            stored=Sum(Func(F('content'), function='octet_length'))
+        )
+        size, stored = totals['size'] or 0, totals['stored'] or 0
+        saved = 100 * (1 - stored / size) if size else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{size} bytes of revisions stored in {stored} bytes '
+            f'({saved:.1f}% saved)'
+        ))
+
+    def _import_history(self, batch_size):
+        """Encode the data history of projects that have no revisions"""
+        pending = Project.objects.filter(revisions__isnull=True) \
+            .exclude(modified_data_history=[]) \
+            .exclude(modified_data_history__isnull=True) \
+            .order_by('pk')
+        imported = 0
+        last_pk = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return imported
+            for project in batch:
+                with transaction.atomic():
+                    for name in project.modified_data_history:
+                        ProjectRevision.objects.record(project, name)
+                imported += 1
+            last_pk = batch[-1].pk
+
+    @transaction.atomic
+    def _rekeyframe(self, project_id, interval):
+        """Re-encode all revisions of a project with the given interval"""
+        revisions = list(
+            ProjectRevision.objects.select_for_update()
+            .filter(project_id=project_id)
+            .order_by('number')
+        )
+        previous = None
+        for index, revision in enumerate(revisions):
+            if revision.chain == 0:
+                content = zlib.decompress(revision.content)
+            else:
+                content = apply_delta(previous, bytes(revision.content))
+
+            revision.chain = index % interval
+            if revision.chain == 0:
+                revision.content = zlib.compress(content)
+            else:
+                revision.content = encode_delta(previous, content)
+            previous = content
+
+        ProjectRevision.objects.bulk_update(revisions, ['chain', 'content'])
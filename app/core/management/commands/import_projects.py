@@ -0,0 +1,193 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Application, BlobDigest, ImportedProject, Project, \
+    ProjectChange, Tag, project_data_file_path, project_image_file_path
+from project.legacy import list_sources, open_archive, parse_project, \
+    thumbnail_name
+
+
+class Command(BaseCommand):
+    """Django command to import legacy pCSDT projects for a user.
+
+    Files are parsed in a process pool while the previous chunk is
+    written, each chunk with batched inserts in one transaction. Imported
+    sources are recorded with their projects, so a crashed run is resumed
+    by running it again. A PNG next to a project file becomes its
+    thumbnail.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Directory or ZIP archive')
+        parser.add_argument('--owner', required=True)
+        parser.add_argument(
+            '--application',
+            help='Application for codenames matching no application name'
+        )
+        parser.add_argument('--tag', action='append', default=[])
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'{path} does not exist.')
+        try:
+            owner = get_user_model().objects.get(username=options['owner'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Unknown user "{options["owner"]}".')
+        self.applications = {
+            name.lower(): pk for pk, name in
+            Application.objects.values_list('pk', 'name')
+        }
+        self.fallback = None
+        if options['application']:
+            self.fallback = self.applications.get(
+                options['application'].lower()
+            )
+            if self.fallback is None:
+                raise CommandError(
+                    f'Unknown application "{options["application"]}".'
+                )
+        tags = [
+            Tag.objects.get_or_create(name=name)[0].pk
+            for name in options['tag']
+        ]
+
+        sources, names = list_sources(path)
+        done = set(
+            ImportedProject.objects.filter(owner=owner)
+            .values_list('source', flat=True)
+        )
+        pending = [source for source in sources if source not in done]
+        self.stdout.write(
+            f'{len(pending)} files to import, {len(done)} already imported'
+        )
+
+        imported = failed = 0
+        started = time.monotonic()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            initializer=open_archive,
+            initargs=(path,)
+        ) as executor:
+            for results in self._parsed_chunks(
+                executor, path, pending, names, options['chunk_size']
+            ):
+                items = []
+                for result in results:
+                    error = result['error'] or self._check(result)
+                    if error:
+                        failed += 1
+                        self.stderr.write(f'{result["source"]}: {error}')
+                        continue
+                    items.append(result)
+                imported += self._import_chunk(owner, items, tags)
+                rate = (imported + failed) / (time.monotonic() - started)
+                self.stdout.write(
+                    f'{imported + failed}/{len(pending)} files, '
+                    f'{rate:.1f} files/s'
+                )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{imported} projects imported, {failed} failed in '
+            f'{elapsed:.1f}s ({len(pending) / max(elapsed, 1e-9):.1f} '
+            f'files/s)'
+        ))
+
+    def _parsed_chunks(self, executor, path, pending, names, chunk_size):
+        """Yield parsed chunks of files, the next chunk being parsed while
+        the current one is imported"""
+        chunks = [
+            pending[i:i + chunk_size]
+            for i in range(0, len(pending), chunk_size)
+        ]
+
+        def submit(chunk):
+            return [
+                executor.submit(
+                    parse_project,
+                    path,
+                    source,
+                    thumbnail_name(source) in names
+                ) for source in chunk
+            ]
+
+        futures = submit(chunks[0]) if chunks else []
+        for index in range(len(chunks)):
+            upcoming = []
+            if index + 1 < len(chunks):
+                upcoming = submit(chunks[index + 1])
+            yield [future.result() for future in futures]
+            futures = upcoming
+
+    def _check(self, item):
+        """Return why a parsed file can't be imported, if anything"""
+        if len(item['source']) > 255:
+            return 'Source name too long.'
+        item['application_id'] = self.applications.get(
+            item['codename'].lower(),
+            self.fallback
+        )
+        if item['application_id'] is None:
+            return f'No application for codename "{item["codename"]}".'
+        return None
+
+    @transaction.atomic
+    def _import_chunk(self, owner, items, tags):
+        """Store the blobs and insert the projects of one chunk"""
+        data_storage = Project._meta.get_field('data').storage
+        thumbnail_storage = Project._meta.get_field('thumbnail').storage
+        projects = []
+        for item in items:
+            thumbnail = None
+            if item['thumbnail'] is not None:
+                thumbnail = thumbnail_storage.save(
+                    project_image_file_path(None, 'thumbnail.png'),
+                    ContentFile(item['thumbnail'])
+                )
+            projects.append(Project(
+                owner=owner,
+                title=item['title'][:255],
+                application_id=item['application_id'],
+                data=data_storage.save(
+                    project_data_file_path(None, 'data.xml'),
+                    ContentFile(item['data'])
+                ),
+                thumbnail=thumbnail
+            ))
+        Project.objects.bulk_create(projects)
+
+        Project.tags.through.objects.bulk_create(
+            Project.tags.through(project_id=project.pk, tag_id=tag_id)
+            for project in projects for tag_id in tags
+        )
+        BlobDigest.objects.bulk_create([
+            BlobDigest(
+                sha256=item['sha256'],
+                size=len(item['data']),
+                kind=BlobDigest.Kind.DATA,
+                name=project.data.name
+            ) for item, project in zip(items, projects)
+        ], ignore_conflicts=True)
+        ImportedProject.objects.bulk_create(
+            ImportedProject(
+                owner=owner,
+                source=item['source'],
+                project=project
+            ) for item, project in zip(items, projects)
+        )
+        ProjectChange.objects.record_many(
+            projects,
+            ProjectChange.Kind.CREATED
+        )
+
+        return len(projects)
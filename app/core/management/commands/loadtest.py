@@ -0,0 +1,349 @@
+import http.client
+import json
+import math
+import random
+import socket
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, \
+    WSGIRequestHandler
+
+from core.benchmarks import pcsdt_variant
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+
+SCENARIOS = ('browse', 'open', 'autosave', 'upload')
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that doesn't log every request of the load test"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Session:
+    """One simulated user's keep-alive connection to the server.
+
+    Every request is timed and counted under the scenario being run, in
+    stats owned by the user's thread, so recording needs no lock.
+    """
+
+    def __init__(self, host, port, stats):
+        self.host, self.port = host, port
+        self.stats = stats
+        self.scenario = None
+        self.token = None
+        self.connection = None
+
+    def request(self, method, path, body=None, content_type=None):
+        """Make a request, returning its status and decoded JSON body"""
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        if body is not None and content_type is None:
+            body = json.dumps(body).encode()
+            content_type = 'application/json'
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        stats = self.stats.setdefault(
+            self.scenario,
+            {'latencies': [], 'errors': 0}
+        )
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=60
+                )
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            stats['latencies'].append(time.perf_counter() - start)
+            stats['errors'] += 1
+            self.connection.close()
+            self.connection = None
+            return None, None
+        stats['latencies'].append(time.perf_counter() - start)
+        if response.status >= 400:
+            stats['errors'] += 1
+        if response.getheader('Content-Type', '') \
+                .startswith('application/json') and content:
+            return response.status, json.loads(content)
+        return response.status, None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+def _multipart(field, filename, content, content_type):
+    """Encode a single file upload as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; '
+        f'filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+class Command(BaseCommand):
+    """Django command running concurrent simulated users against a server.
+
+    Starts the WSGI application of app/wsgi.py in a threaded server, the
+    ASGI one of app/asgi.py under uvicorn if installed, or targets --url.
+    Users log in as the accounts created by seed_data and loop over their
+    scenario until --duration is over: browse the gallery, open a project,
+    autosave project data or upload a thumbnail. Throughput, latency
+    percentiles and error rates per scenario are printed as JSON, with
+    logins and the media downloads of opened projects reported apart.
+
+    Autosaves and uploads are really written, so run it against a seeded
+    database meant for load testing.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=('wsgi', 'asgi'),
+                            default='wsgi')
+        parser.add_argument('--url', help='Test a server already running')
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+        parser.add_argument('--think', type=float, default=0,
+                            help='Seconds each user waits between runs')
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--password', default='seedpass')
+        parser.add_argument('--output', help='Also write the JSON here')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenarios'].split(',')
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(unknown)}')
+        self.options = options
+        self.thumbnail = \
+            (settings.BASE_DIR / 'samples/thumbnail.png').read_bytes()
+
+        if options['url']:
+            url = urlsplit(options['url'])
+            host, port, stop = url.hostname, url.port or 80, lambda: None
+        elif options['server'] == 'asgi':
+            host, port, stop = self._start_asgi()
+        else:
+            host, port, stop = self._start_wsgi()
+
+        try:
+            threads, stats = [], []
+            deadline = time.monotonic() + options['duration']
+            started = time.monotonic()
+            for index in range(options['users']):
+                user_stats = {}
+                stats.append(user_stats)
+                threads.append(threading.Thread(
+                    target=self._simulate,
+                    args=(index, scenarios[index % len(scenarios)],
+                          Session(host, port, user_stats), deadline)
+                ))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+        finally:
+            stop()
+
+        report = {
+            'server': 'url' if options['url'] else options['server'],
+            'users': options['users'],
+            'duration_s': round(elapsed, 3),
+            'scenarios': self._report(stats, elapsed),
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _start_wsgi(self):
+        """Serve app/wsgi.py from a thread, return its address and stop"""
+        from app.wsgi import application
+
+        server = ThreadedWSGIServer(('127.0.0.1', 0), _QuietRequestHandler)
+        server.set_app(application)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+
+        return '127.0.0.1', server.server_address[1], stop
+
+    def _start_asgi(self):
+        """Serve app/asgi.py with uvicorn, return its address and stop"""
+        if uvicorn is None:
+            raise CommandError('--server asgi needs uvicorn installed')
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        server = uvicorn.Server(uvicorn.Config(
+            'app.asgi:application',
+            lifespan='off',
+            log_level='warning'
+        ))
+        thread = threading.Thread(
+            target=server.run,
+            kwargs={'sockets': [sock]},
+            daemon=True
+        )
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise CommandError('uvicorn failed to start')
+            time.sleep(0.05)
+
+        def stop():
+            server.should_exit = True
+            thread.join()
+
+        return '127.0.0.1', sock.getsockname()[1], stop
+
+    def _simulate(self, index, scenario, session, deadline):
+        """Log in as a seeded user, then loop over one scenario"""
+        rng = random.Random(index)
+        session.scenario = 'login'
+        _, token = session.request('POST', '/api/user/token/', {
+            'username': f'{self.options["prefix"]}{index}',
+            'password': self.options['password'],
+        })
+        if not token or 'token' not in token:
+            session.close()
+            return
+        session.token = token['token']
+
+        state = {'data': pcsdt_variant(rng)}
+        _, projects = session.request('GET', '/api/project/projects/')
+        state['projects'] = [project['id'] for project in projects or []]
+        if not state['projects']:
+            _, applications = session.request(
+                'GET', '/api/project/applications/'
+            )
+            if applications:
+                _, project = session.request(
+                    'POST',
+                    '/api/project/projects/',
+                    {
+                        'title': f'Load test {index}',
+                        'application': applications[0]['id'],
+                        'tags': [],
+                    }
+                )
+                if project:
+                    state['projects'].append(project['id'])
+
+        run = getattr(self, f'_{scenario}')
+        session.scenario = scenario
+        while time.monotonic() < deadline:
+            run(session, rng, state)
+            if self.options['think']:
+                time.sleep(self.options['think'])
+        session.close()
+
+    def _browse(self, session, rng, state):
+        """Browse the gallery: tags, applications and projects"""
+        session.request('GET', '/api/project/tags/')
+        session.request('GET', '/api/project/applications/')
+        session.request('GET', '/api/project/projects/')
+
+    def _open(self, session, rng, state):
+        """Open a project and download its data"""
+        if not state['projects']:
+            return
+        project_id = rng.choice(state['projects'])
+        _, project = session.request(
+            'GET', f'/api/project/projects/{project_id}/'
+        )
+        if project and project.get('data'):
+            # Recorded apart, as media is often served in front of Django
+            # (static() only routes it with DEBUG on).
+            session.scenario = 'media'
+            session.request('GET', urlsplit(project['data']).path)
+            session.scenario = 'open'
+
+    def _autosave(self, session, rng, state):
+        """Autosave a project's data like the editor does"""
+        if not state['projects']:
+            return
+        body, content_type = _multipart(
+            'data', 'data.xml', state['data'], 'application/xml'
+        )
+        session.request(
+            'POST',
+            f'/api/project/projects/{state["projects"][0]}/upload-data/'
+            '?autosave=1',
+            body,
+            content_type
+        )
+
+    def _upload(self, session, rng, state):
+        """Upload a new thumbnail for a project"""
+        if not state['projects']:
+            return
+        body, content_type = _multipart(
+            'thumbnail', 'thumbnail.png', self.thumbnail, 'image/png'
+        )
+        session.request(
+            'POST',
+            f'/api/project/projects/{rng.choice(state["projects"])}'
+            '/upload-image/',
+            body,
+            content_type
+        )
+
+    def _report(self, stats, elapsed):
+        """Merge the users' stats into the figures of each scenario"""
+        merged = {}
+        for user_stats in stats:
+            for scenario, values in user_stats.items():
+                total = merged.setdefault(
+                    scenario,
+                    {'latencies': [], 'errors': 0}
+                )
+                total['latencies'] += values['latencies']
+                total['errors'] += values['errors']
+
+        report = {}
+        for scenario, total in sorted(merged.items()):
+            latencies = sorted(total['latencies'])
+            report[scenario] = {
+                'requests': len(latencies),
+                'errors': total['errors'],
+                'error_rate': total['errors'] / max(len(latencies), 1),
+                'throughput_rps': len(latencies) / elapsed,
+            }
+            for name, fraction in (('p50', 0.5), ('p95', 0.95),
+                                   ('p99', 0.99)):
+                value = percentile(latencies, fraction)
+                report[scenario][f'{name}_ms'] = \
+                    None if value is None else value * 1000
+
+        return report
@@ -0,0 +1,283 @@
+import hashlib
+import io
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.benchmarks import pcsdt_variant
+from core.models import Application, BlobDigest, Project, Software, Tag, \
+    Tool, project_data_file_path, project_image_file_path, \
+    software_data_file_path
+
+
+COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+PROJECT_COLUMNS = (
+    'id', 'owner', 'title', 'application', 'data', 'thumbnail',
+    'description', 'created_date', 'modified_date', 'modified_date_history',
+    'modified_data_history', 'modified_thumbnail_history',
+)
+
+
+def _copy_value(value):
+    """Format a value for COPY's text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, list):
+        value = '{' + ','.join(
+            '"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"'
+            for item in value
+        ) + '}'
+    return str(value).translate(COPY_ESCAPES)
+
+
+class Command(BaseCommand):
+    """Django command to generate a realistic dataset for scaling work.
+
+    Users, tags, applications, tools and software are bulk created. Their
+    projects share a pool of generated pCSDT blobs, the way forks and
+    dedupe share blobs, and are written with COPY on PostgreSQL (bulk
+    inserts elsewhere) in batches of one transaction each. Owners are
+    skewed so some users have many projects. Seeded users log in with
+    --password.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--projects', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--applications', type=int, default=5)
+        parser.add_argument('--software', type=int, default=20)
+        parser.add_argument('--tag-fanout', type=int, default=3)
+        parser.add_argument('--history', type=int, default=5)
+        parser.add_argument('--blobs', type=int, default=50)
+        parser.add_argument('--thumbnail-ratio', type=float, default=0.5)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--password', default='seedpass')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if get_user_model().objects.filter(
+            username__startswith=prefix
+        ).exists():
+            raise CommandError(
+                f'Users prefixed "{prefix}" already exist, '
+                'choose another --prefix.'
+            )
+        if options['users'] < 1 or options['applications'] < 1:
+            raise CommandError('At least one user and application needed.')
+        rng = random.Random(options['seed'])
+        started = time.monotonic()
+
+        with transaction.atomic():
+            users = self._users(prefix, options['users'], options['password'])
+            tags = list(Tag.objects.bulk_create(
+                Tag(name=f'{prefix} tag {i}') for i in range(options['tags'])
+            ))
+            applications = list(Application.objects.bulk_create(
+                Application(name=f'{prefix} app {i}', link=f'{prefix}-{i}/')
+                for i in range(options['applications'])
+            ))
+            blobs = self._blobs(rng, options['blobs'])
+            self._software(rng, prefix, options['software'], applications,
+                           blobs)
+        self.stdout.write(
+            f'{len(users)} users, {len(tags)} tags, '
+            f'{len(applications)} applications, '
+            f'{options["software"]} software created'
+        )
+
+        thumbnail = None
+        if options['thumbnail_ratio'] > 0:
+            storage = Project._meta.get_field('thumbnail').storage
+            thumbnail = storage.save(
+                project_image_file_path(None, 'thumbnail.png'),
+                ContentFile(
+                    (settings.BASE_DIR / 'samples/thumbnail.png').read_bytes()
+                )
+            )
+
+        total = options['projects']
+        batch_size = options['batch_size']
+        created = 0
+        while created < total:
+            count = min(batch_size, total - created)
+            projects, links = self._project_rows(
+                rng, count, created, users, tags, applications, blobs,
+                thumbnail, options
+            )
+            with transaction.atomic():
+                self._insert_projects(projects, links)
+            created += count
+            rate = created / (time.monotonic() - started)
+            self.stdout.write(
+                f'{created}/{total} projects, {rate:.0f} projects/s'
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} projects seeded in {elapsed:.1f}s'
+        ))
+
+    def _users(self, prefix, count, password):
+        """Bulk create users sharing one password hash"""
+        password = make_password(password)
+        return [
+            user.pk for user in get_user_model().objects.bulk_create(
+                get_user_model()(
+                    email=f'{prefix}{i}@csdt.org',
+                    username=f'{prefix}{i}',
+                    name=f'Seed User {i}',
+                    password=password
+                ) for i in range(count)
+            )
+        ]
+
+    def _blobs(self, rng, count):
+        """Store generated project data blobs and index their digests"""
+        storage = Project._meta.get_field('data').storage
+        names = []
+        for _ in range(max(count, 1)):
+            content = pcsdt_variant(rng)
+            name = storage.save(
+                project_data_file_path(None, 'data.xml'),
+                ContentFile(content)
+            )
+            BlobDigest.objects.index(
+                name,
+                hashlib.sha256(content).hexdigest(),
+                len(content),
+                BlobDigest.Kind.DATA
+            )
+            names.append(name)
+
+        return names
+
+    def _software(self, rng, prefix, count, applications, blobs):
+        """Create software, each with its own tool and a default file"""
+        storage = Software._meta.get_field('default_file').storage
+        tools = Tool.objects.bulk_create(
+            Tool(name=f'{prefix} tool {i}') for i in range(count)
+        )
+        Software.objects.bulk_create(
+            Software(
+                name=f'{prefix} software {i}',
+                tool=tool,
+                application=rng.choice(applications),
+                default_file=storage.save(
+                    software_data_file_path(None, 'data.xml'),
+                    ContentFile(pcsdt_variant(rng))
+                ),
+                description=f'Template {i}'
+            ) for i, tool in enumerate(tools)
+        )
+
+    def _project_rows(self, rng, count, offset, users, tags, applications,
+                      blobs, thumbnail, options):
+        """Generate one batch of project rows and their tag links"""
+        now = timezone.now()
+        projects, links = [], []
+        for i in range(offset, offset + count):
+            created = now - timedelta(seconds=rng.randrange(2 * 365 * 86400))
+            dates = sorted(
+                created + timedelta(seconds=rng.randrange(
+                    max(int((now - created).total_seconds()), 1)
+                )) for _ in range(options['history'])
+            )
+            history = [rng.choice(blobs) for _ in dates]
+            has_thumbnail = thumbnail is not None and \
+                rng.random() < options['thumbnail_ratio']
+            projects.append({
+                # Squaring skews ownership towards the first users.
+                'owner': users[int(len(users) * rng.random() ** 2)],
+                'title': f'Project {i}',
+                'application': rng.choice(applications).pk,
+                'data': history[-1] if history else rng.choice(blobs),
+                'thumbnail': thumbnail if has_thumbnail else None,
+                'description': f'Generated project {i}',
+                'created_date': created,
+                'modified_date': dates[-1] if dates else created,
+                'modified_date_history': dates,
+                'modified_data_history': history,
+                'modified_thumbnail_history':
+                    [thumbnail] if has_thumbnail else [],
+            })
+            links.append(
+                rng.sample(tags, min(options['tag_fanout'], len(tags)))
+            )
+
+        return projects, links
+
+    def _insert_projects(self, projects, links):
+        """Insert projects and tag links, with COPY when available"""
+        if connection.vendor != 'postgresql':
+            instances = Project.objects.bulk_create(
+                Project(
+                    owner_id=row['owner'],
+                    application_id=row['application'],
+                    **{
+                        key: value for key, value in row.items()
+                        if key not in ('owner', 'application')
+                    }
+                ) for row in projects
+            )
+            Project.tags.through.objects.bulk_create(
+                Project.tags.through(project_id=project.pk, tag_id=tag.pk)
+                for project, tags in zip(instances, links) for tag in tags
+            )
+            return
+
+        table = Project._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+                'FROM generate_series(1, %s)',
+                [table, 'id', len(projects)]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        for project_id, row in zip(ids, projects):
+            row['id'] = project_id
+
+        self._copy(
+            table,
+            [Project._meta.get_field(name).column
+             for name in PROJECT_COLUMNS],
+            ([row[name] for name in PROJECT_COLUMNS] for row in projects)
+        )
+        through = Project.tags.through._meta
+        self._copy(
+            through.db_table,
+            [through.get_field('project').column,
+             through.get_field('tag').column],
+            ((project_id, tag.pk)
+             for project_id, tags in zip(ids, links) for tag in tags)
+        )
+
+    def _copy(self, table, columns, rows):
+        """Load rows into a table with COPY FROM STDIN"""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(_copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(table)} '
+                f'({", ".join(map(connection.ops.quote_name, columns))}) '
+                'FROM STDIN',
+                buffer
+            )
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Project, Software
+from core.storage import SHARDED_NAME_RE
+
+
+UPLOAD_FIELDS = (
+    (Project, 'data'),
+    (Project, 'thumbnail'),
+    (Software, 'default_file'),
+)
+
+
+class Command(BaseCommand):
+    """Django command to move flat uploads into the sharded layout.
+
+    Rows are walked in primary key batches, so the site stays online while
+    it runs. Each file is moved before its row is updated and the storage
+    resolves a legacy name to the moved file, so an interrupted run is
+    simply started again.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, field_name in UPLOAD_FIELDS:
+            moved = self._shard_field(model, field_name, batch_size)
+            self.stdout.write(
+                f'{model.__name__}.{field_name}: {moved} files sharded'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Uploads sharded!'))
+
+    def _shard_field(self, model, field_name, batch_size):
+        """Shard every legacy upload referenced by one file field"""
+        storage = model._meta.get_field(field_name).storage
+        pending = model.objects.exclude(**{
+            f'{field_name}__isnull': True
+        }).exclude(**{
+            field_name: ''
+        }).exclude(**{
+            f'{field_name}__regex': SHARDED_NAME_RE
+        }).order_by('pk')
+
+        moved = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                pending.filter(pk__gt=last_pk)
+                .values_list('pk', field_name)[:batch_size]
+            )
+            if not batch:
+                return moved
+            with transaction.atomic():
+                for pk, name in batch:
+                    new_name = storage.shard(name)
+                    if new_name == name:
+                        continue
+                    # Only touch rows that still point at the legacy name,
+                    # a concurrent upload may have replaced it meanwhile.
+                    moved += model.objects.filter(
+                        pk=pk, **{field_name: name}
+                    ).update(**{field_name: new_name})
+            last_pk = batch[-1][0]
@@ -0,0 +1,239 @@
+import atexit
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                   math.inf)
+
+# name: (type, help, buckets) of every declared metric
+_metrics = {}
+
+# Each thread counts into its own shard, a flat {(name, labels): value}
+# dict only that thread writes to, and registers it with an append (atomic
+# under the GIL), so recording never takes a lock. The lock only keeps
+# flushes apart.
+_local = threading.local()
+_shards = []
+_retired = defaultdict(float)
+_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = {}
+        _shards.append((threading.current_thread(), shard))
+    return shard
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Counter:
+    """Monotonic counter, e.g. Counter('requests_total', 'Requests')"""
+
+    def __init__(self, name, help):
+        self.name = name
+        _metrics[name] = ('counter', help, None)
+
+    def inc(self, value=1, **labels):
+        shard = _shard()
+        key = (self.name, _labels(labels))
+        shard[key] = shard.get(key, 0) + value
+
+
+class Histogram:
+    """Histogram of observed values in fixed buckets"""
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(sorted(set(buckets) | {math.inf}))
+        _metrics[name] = ('histogram', help, self.buckets)
+
+    def observe(self, value, **labels):
+        shard = _shard()
+        labels = _labels(labels)
+        bound = self.buckets[bisect.bisect_left(self.buckets, value)]
+        for key, amount in (
+            ((f'{self.name}_bucket', labels + (('le', bound),)), 1),
+            ((f'{self.name}_sum', labels), value),
+            ((f'{self.name}_count', labels), 1),
+        ):
+            shard[key] = shard.get(key, 0) + amount
+
+
+def _snapshot():
+    """Sum this process's shards, retiring those of finished threads"""
+    totals = defaultdict(float)
+    for entry in list(_shards):
+        thread, shard = entry
+        # dict.copy() runs without releasing the GIL, so the owner
+        # thread can't change the shard halfway through.
+        values = shard.copy()
+        target = totals
+        if not thread.is_alive():
+            _shards.remove(entry)
+            target = _retired
+        for key, value in values.items():
+            target[key] += value
+    for key, value in _retired.items():
+        totals[key] += value
+
+    return totals
+
+
+def _path(pid):
+    return os.path.join(settings.METRICS_DIR, f'{pid}.json')
+
+
+def flush():
+    """Write this process's metrics to its file in METRICS_DIR"""
+    with _lock:
+        _write()
+
+
+def maybe_flush():
+    """Flush once METRICS_FLUSH_INTERVAL has passed, unless another
+    thread is already flushing"""
+    if time.monotonic() - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    if not _lock.acquire(blocking=False):
+        return
+    try:
+        _write()
+    finally:
+        _lock.release()
+
+
+def _write():
+    global _last_flush
+    totals = _snapshot()
+    _last_flush = time.monotonic()
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _path(os.getpid())
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump([
+            [name, [[key, value] for key, value in labels], value]
+            for (name, labels), value in totals.items()
+        ], f)
+    os.replace(f'{path}.tmp', path)
+
+
+def collect():
+    """Return the metrics of every process, summed"""
+    totals = defaultdict(float)
+    try:
+        names = os.listdir(settings.METRICS_DIR)
+    except FileNotFoundError:
+        return totals
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name)) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric, labels, value in entries:
+            labels = tuple(
+                (key, float(value) if key == 'le' else value)
+                for key, value in labels
+            )
+            totals[(metric, labels)] += value
+
+    return totals
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            key,
+            _format_value(value) if key == 'le' else str(value)
+            .replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        ) for key, value in labels
+    ) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def exposition():
+    """Render the collected metrics in the Prometheus text format"""
+    series = defaultdict(lambda: defaultdict(float))
+    for (name, labels), value in collect().items():
+        series[name][labels] += value
+
+    lines = []
+    for base, (kind, help, buckets) in sorted(_metrics.items()):
+        lines.append(f'# HELP {base} {help}')
+        lines.append(f'# TYPE {base} {kind}')
+        if kind == 'counter':
+            for labels, value in sorted(series[base].items()):
+                lines.append(
+                    f'{base}{_format_labels(labels)} {_format_value(value)}'
+                )
+            continue
+
+        counts = defaultdict(dict)
+        for labels, value in series[f'{base}_bucket'].items():
+            group = tuple(item for item in labels if item[0] != 'le')
+            counts[group][dict(labels)['le']] = value
+        for labels in sorted(series[f'{base}_count']):
+            cumulative = 0
+            for bound in buckets:
+                cumulative += counts[labels].get(bound, 0)
+                lines.append(
+                    f'{base}_bucket'
+                    f'{_format_labels(labels + (("le", bound),))} '
+                    f'{_format_value(cumulative)}'
+                )
+            for suffix in ('_sum', '_count'):
+                value = series[base + suffix][labels]
+                lines.append(
+                    f'{base}{suffix}{_format_labels(labels)} '
+                    f'{_format_value(value)}'
+                )
+
+    return '\n'.join(lines) + '\n'
+
+
+atexit.register(lambda: _shards and flush())
+
+
+REQUESTS = Counter(
+    'http_requests_total',
+    'Requests handled, by view, action, method and status.'
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling requests, by view and action.'
+)
+DB_QUERIES = Counter(
+    'db_queries_total',
+    'Database queries run while handling requests, by view.'
+)
+UPLOAD_BYTES = Counter(
+    'upload_bytes_total',
+    'Bytes of uploaded files saved, by field.'
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Cache lookups, by cache and result (hit or miss).'
+)
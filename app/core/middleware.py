@@ -0,0 +1,420 @@
+import contextlib
+import gzip
+import hashlib
+import logging
+import re
+import tempfile
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from core import metrics, timing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Content types worth compressing, anything else (PNG thumbnails, zip
+# archives) is already compressed and passes through untouched.
+COMPRESSIBLE_TYPE_RE = re.compile(
+    r'^(text/|application/(json|xml|javascript|msgpack)|image/svg\+xml'
+    r'|application/[^;]+\+(json|xml))'
+)
+# Server-Timing metrics in header order, others follow alphabetically
+SERVER_TIMING_ORDER = ('db', 'serialize', 'image', 'storage', 'render')
+ACCEPT_ENCODING_RE = re.compile(r'^\s*([^\s;]+)\s*(?:;\s*q=([0-9.]+))?')
+STRONG_ETAG_RE = re.compile(r'^\s*"')
+
+logger = logging.getLogger(__name__)
+
+
+class DecompressionLimitExceeded(Exception):
+    """Raised when a request body inflates beyond the configured limits"""
+
+
+class _CountingReader:
+    """Wrap a stream and count the bytes read from it"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.count += len(data)
+        return data
+
+
+class RequestDecompressionMiddleware:
+    """Decompress gzip or zstd encoded request bodies before parsing.
+
+    The body is inflated in chunks into a spooled temporary file, which
+    replaces the request stream, so DRF's parsers see a plain body. Bodies
+    larger than REQUEST_DECOMPRESSION_MAX_SIZE or inflating more than
+    REQUEST_DECOMPRESSION_MAX_RATIO times are refused with 413.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '')
+        encoding = encoding.strip().lower()
+        if encoding in ('', 'identity'):
+            return self.get_response(request)
+
+        source = _CountingReader(request._stream)
+        reader = self._reader(encoding, source)
+        if reader is None:
+            return JsonResponse(
+                {'detail': f'Unsupported content encoding "{encoding}".'},
+                status=415
+            )
+
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        try:
+            size = self._inflate(reader, source, body)
+        except DecompressionLimitExceeded:
+            body.close()
+            return JsonResponse(
+                {'detail': 'Decompressed request body is too large.'},
+                status=413
+            )
+        except self._errors():
+            body.close()
+            return JsonResponse(
+                {'detail': 'Malformed compressed request body.'},
+                status=400
+            )
+
+        body.seek(0)
+        request._stream = body
+        request.META['CONTENT_LENGTH'] = str(size)
+        del request.META['HTTP_CONTENT_ENCODING']
+        try:
+            return self.get_response(request)
+        finally:
+            body.close()
+
+    def _reader(self, encoding, source):
+        """Return a decompressing reader for an encoding, if supported"""
+        if encoding in ('gzip', 'x-gzip'):
+            return gzip.GzipFile(fileobj=source, mode='rb')
+        if encoding == 'zstd' and zstandard is not None:
+            return zstandard.ZstdDecompressor().stream_reader(source)
+        return None
+
+    def _errors(self):
+        """Return the exceptions raised by corrupt compressed input"""
+        errors = (OSError, EOFError, zlib.error)
+        if zstandard is not None:
+            errors += (zstandard.ZstdError,)
+        return errors
+
+    def _inflate(self, reader, source, body):
+        """Copy the decompressed body into a file, enforcing the limits"""
+        max_size = settings.REQUEST_DECOMPRESSION_MAX_SIZE
+        max_ratio = settings.REQUEST_DECOMPRESSION_MAX_RATIO
+        size = 0
+        while True:
+            chunk = reader.read(CHUNK_SIZE)
+            if not chunk:
+                return size
+            size += len(chunk)
+            if size > max_size or size > max_ratio * max(source.count, 1):
+                raise DecompressionLimitExceeded()
+            body.write(chunk)
+
+
+class _BrotliCompressor:
+    """Give brotli's streaming compressor the zlib compress/flush API"""
+
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(
+            mode=brotli.MODE_TEXT,
+            quality=quality
+        )
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+def _compressor(encoding, cached=False):
+    """Return a streaming compressor for an encoding.
+
+    Dynamic responses use fast levels, blobs whose compressed form is
+    cached are compressed once at a high level.
+    """
+    if encoding == 'br':
+        return _BrotliCompressor(quality=9 if cached else 4)
+    if encoding == 'zstd':
+        level = 12 if cached else 3
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    return zlib.compressobj(9 if cached else 6, zlib.DEFLATED, 31)
+
+
+def available_encodings():
+    """Return the supported content encodings, most preferred first"""
+    encodings = []
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+
+    return encodings
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick the best supported encoding from an Accept-Encoding header"""
+    weights = {}
+    for item in accept_encoding.split(','):
+        match = ACCEPT_ENCODING_RE.match(item)
+        if not match:
+            continue
+        try:
+            weight = float(match.group(2) or 1)
+        except ValueError:
+            continue
+        weights[match.group(1).lower()] = weight
+
+    best, best_weight = None, 0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+
+    return best
+
+
+def _compress(content, encoding, cached=False):
+    compressor = _compressor(encoding, cached)
+    return compressor.compress(content) + compressor.flush()
+
+
+def _compress_sequence(sequence, encoding):
+    """Compress a streaming body chunk by chunk without buffering it"""
+    compressor = _compressor(encoding)
+    for item in sequence:
+        data = compressor.compress(item)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    """Compress JSON, XML and text responses with brotli, zstd or gzip.
+
+    Streaming and file responses are compressed on the fly. Responses
+    marked immutable (e.g. media blobs) have their compressed form cached
+    so repeated downloads aren't compressed again.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = _compress_sequence(
+                response.streaming_content,
+                encoding
+            )
+            if response.has_header('Content-Length'):
+                del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            content = self._compressed_content(request, response, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and STRONG_ETAG_RE.match(etag):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+
+        return response
+
+    def _compressible(self, response):
+        """Check whether a response may be compressed at all"""
+        if response.status_code in (204, 206, 304):
+            return False
+        if response.has_header('Content-Encoding'):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+
+        return bool(COMPRESSIBLE_TYPE_RE.match(
+            response.get('Content-Type', '')
+        ))
+
+    def _compressed_content(self, request, response, encoding):
+        """Compress a body, reusing the cached result for immutable ones"""
+        content = response.content
+        if 'immutable' not in response.get('Cache-Control', '') \
+                or len(content) > settings.COMPRESSION_CACHE_MAX_SIZE:
+            return _compress(content, encoding)
+
+        cache = caches[settings.COMPRESSION_CACHE_ALIAS]
+        path = hashlib.md5(request.path.encode()).hexdigest()
+        key = f'compressed:{encoding}:{path}:{len(content)}'
+        compressed = cache.get(key)
+        metrics.CACHE_REQUESTS.inc(
+            cache='compression',
+            result='miss' if compressed is None else 'hit'
+        )
+        if compressed is None:
+            compressed = _compress(content, encoding, cached=True)
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+
+        return compressed
+
+
+def _timed_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the db timing"""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add('db', time.perf_counter() - start)
+
+
+class ServerTimingMiddleware:
+    """Report where the time of a request went, if SERVER_TIMING is on.
+
+    Database time and query count come from execute wrappers on every
+    connection. Serializers, Pillow image checks, storage and renderers
+    are timed by hooks that do nothing unless a request is being timed.
+    The results go out as a Server-Timing header and as the fields of a
+    core.middleware log record. When off the middleware isn't loaded.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = timing.start()
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_timed_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            timings = timing.finish(token)
+        timings['total'] = (time.perf_counter() - start, 1)
+
+        names = [name for name in SERVER_TIMING_ORDER if name in timings]
+        names += sorted(set(timings) - set(names) - {'total'})
+        names.append('total')
+        metrics, fields = [], {}
+        for name in names:
+            duration, count = timings[name]
+            metric = f'{name};dur={duration * 1000:.3f}'
+            if name == 'db':
+                metric += f';desc="{count} queries"'
+            metrics.append(metric)
+            fields[f'{name}_ms'] = round(duration * 1000, 3)
+            fields[f'{name}_count'] = count
+        response['Server-Timing'] = ', '.join(metrics)
+
+        logger.info(
+            '%s %s %s %s',
+            request.method,
+            request.path,
+            response.status_code,
+            ' '.join(f'{key}={value}' for key, value in fields.items()),
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status_code': response.status_code,
+                **fields,
+            }
+        )
+
+        return response
+
+
+class MetricsMiddleware:
+    """Count requests, their duration and database queries in core.metrics.
+
+    Requests are labelled by URL name and viewset action rather than path,
+    so the number of series stays bounded. Every process writes its
+    metrics to METRICS_DIR at most every METRICS_FLUSH_INTERVAL seconds.
+    When METRICS is off the middleware isn't loaded.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        action = ''
+        if match:
+            actions = getattr(match.func, 'actions', None) or {}
+            action = actions.get(request.method.lower(), '')
+        metrics.REQUESTS.inc(
+            view=view,
+            action=action,
+            method=request.method,
+            status=response.status_code
+        )
+        metrics.REQUEST_DURATION.observe(duration, view=view, action=action)
+        metrics.DB_QUERIES.inc(queries, view=view)
+        metrics.maybe_flush()
+
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-19 03:17
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_alter_software_tool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InlineBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('content', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='data',
+            field=models.FileField(null=True, storage=core.storage.HybridStorage(), upload_to=core.models.project_data_file_path),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-19 03:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_inlineblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='forked_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='forks', to='core.project'),
+        ),
+    ]
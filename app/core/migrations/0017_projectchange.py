@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 03:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_project_forked_from'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectChange',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('project_id', models.BigIntegerField(null=True)),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('compacted', 'Compacted')], max_length=10)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='projectchange',
+            index=models.Index(fields=['owner', 'seq'], name='core_projec_owner_i_bf3eff_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-19 03:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_projectchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('name', models.CharField(max_length=255)),
+                ('chain', models.PositiveIntegerField()),
+                ('content', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='core.project')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='projectrevision',
+            constraint=models.UniqueConstraint(fields=('project', 'number'), name='unique_project_revision'),
+        ),
+    ]
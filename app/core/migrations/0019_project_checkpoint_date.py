@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_projectrevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='checkpoint_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-19 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_project_checkpoint_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.BigIntegerField()),
+                ('name', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='blobdigest',
+            constraint=models.UniqueConstraint(fields=('sha256', 'size'), name='unique_blob_digest'),
+        ),
+    ]
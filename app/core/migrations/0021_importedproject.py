@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 03:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_blobdigest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.project')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='importedproject',
+            constraint=models.UniqueConstraint(fields=('owner', 'source'), name='unique_imported_project'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:02
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def set_kinds(apps, schema_editor):
+    """Tell the kind of indexed blobs from the files referencing them.
+
+    Digests of blobs nothing references any more are left without a kind
+    and never match a probe again.
+    """
+    BlobDigest = apps.get_model('core', 'BlobDigest')
+    Project = apps.get_model('core', 'Project')
+    Software = apps.get_model('core', 'Software')
+    BlobDigest.objects.filter(
+        Exists(Project.objects.filter(thumbnail=OuterRef('name')))
+    ).update(kind='image')
+    BlobDigest.objects.filter(
+        Exists(Project.objects.filter(data=OuterRef('name')))
+        | Exists(Software.objects.filter(default_file=OuterRef('name')))
+    ).update(kind='data')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_importedproject'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blobdigest',
+            name='kind',
+            field=models.CharField(choices=[('data', 'Data'), ('image', 'Image')], default='', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(set_kinds, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='blobdigest',
+            name='unique_blob_digest',
+        ),
+        migrations.AddConstraint(
+            model_name='blobdigest',
+            constraint=models.UniqueConstraint(fields=('sha256', 'size', 'kind'), name='unique_blob_digest'),
+        ),
+    ]
@@ -1,19 +1,23 @@
 import uuid
 import os
-from django.db import models
+import zlib
+from django.db import connections, models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                         PermissionsMixin
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
 
+from core.deltas import apply_delta, encode_delta
+from core.storage import HybridStorage, shard_name
+
 
 def project_image_file_path(instance, filename):
     """Generate file path for new project image"""
     ext = filename.split('.')[-1]
     filename = f'{uuid.uuid4()}.{ext}'
 
-    return os.path.join('uploads/project/', filename)
+    return shard_name(os.path.join('uploads/project/', filename))
 
 
 def project_data_file_path(instance, filename):
@@ -21,7 +25,7 @@ def project_data_file_path(instance, filename):
     ext = filename.split('.')[-1]
     filename = f'{uuid.uuid4()}.{ext}'
 
-    return os.path.join('uploads/project/', filename)
+    return shard_name(os.path.join('uploads/project/', filename))
 
 
 def software_data_file_path(instance, filename):
@@ -29,7 +33,7 @@ def software_data_file_path(instance, filename):
     ext = filename.split('.')[-1]
     filename = f'{uuid.uuid4()}.{ext}'
 
-    return os.path.join('uploads/software/', filename)
+    return shard_name(os.path.join('uploads/software/', filename))
 
 
 class UserManager(BaseUserManager):
@@ -130,7 +134,11 @@ class Project(models.Model):
         blank=True
     )
     application = models.ForeignKey(Application, on_delete=models.DO_NOTHING)
-    data = models.FileField(null=True, upload_to=project_data_file_path)
+    data = models.FileField(
+        null=True,
+        upload_to=project_data_file_path,
+        storage=HybridStorage()
+    )
     thumbnail = models.ImageField(null=True, upload_to=project_image_file_path)
     description = models.TextField(null=True, blank=True)
     created_date = models.DateTimeField(auto_now_add=True)
@@ -151,6 +159,298 @@ class Project(models.Model):
         default=list,
         null=True
         )
+    checkpoint_date = models.DateTimeField(null=True, blank=True)
+    forked_from = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='forks'
+    )
 
     def __str__(self):
         return self.title
+
+
+class InlineBlob(models.Model):
+    """Compressed project data small enough to be kept in the database"""
+    name = models.CharField(max_length=255, unique=True)
+    content = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+# First key of the advisory locks ordering each owner's change log
+CHANGE_LOG_LOCK = 1
+
+
+class ProjectChangeManager(models.Manager):
+
+    def _lock_owners(self, owner_ids):
+        """Hold the owners' change log locks until the transaction ends.
+
+        seq is taken on insert, so without the lock a transaction could
+        take a lower seq yet commit after a sync client read a higher one,
+        and the client's cursor would skip it.
+        """
+        connection = connections[self.db]
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            for owner_id in sorted(set(owner_ids)):
+                cursor.execute(
+                    'SELECT pg_advisory_xact_lock(%s, %s)',
+                    [CHANGE_LOG_LOCK, owner_id]
+                )
+
+    def record(self, project, kind):
+        """Log a change to a project for its owner's sync feed"""
+        if project.owner_id is None:
+            return None
+        with transaction.atomic(using=self.db):
+            self._lock_owners([project.owner_id])
+            return self.create(
+                owner_id=project.owner_id,
+                project_id=project.pk,
+                kind=kind
+            )
+
+    def record_many(self, projects, kind):
+        """Log the same change to many projects with one insert"""
+        changes = [
+            self.model(
+                owner_id=project.owner_id,
+                project_id=project.pk,
+                kind=kind
+            ) for project in projects if project.owner_id is not None
+        ]
+        with transaction.atomic(using=self.db):
+            self._lock_owners(change.owner_id for change in changes)
+            return self.bulk_create(changes)
+
+
+class ProjectChange(models.Model):
+    """Change log entry backing the incremental project sync feed.
+
+    Entries are written in the same transaction as the change itself and
+    seq is the feed cursor. Writers lock the owner's log until they
+    commit, so an owner's entries commit in seq order. Compaction drops
+    superseded entries and old tombstones, leaving a COMPACTED marker so
+    that clients holding an older cursor know to resync.
+    """
+
+    class Kind(models.TextChoices):
+        CREATED = 'created'
+        UPDATED = 'updated'
+        DELETED = 'deleted'
+        COMPACTED = 'compacted'
+
+    seq = models.BigAutoField(primary_key=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    project_id = models.BigIntegerField(null=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    objects = ProjectChangeManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['owner', 'seq'])]
+
+    def __str__(self):
+        return f'{self.seq} {self.kind} {self.project_id}'
+
+
+class ProjectRevisionManager(models.Manager):
+
+    def record(self, project, name=None):
+        """Store a data file of a project as its next revision.
+
+        name defaults to the project's current data. Recording the same
+        file as the latest revision again, a blank name or a missing file
+        is a no-op. The project row is locked while the next number is
+        taken, so concurrent checkpoints of a project are serialized.
+        """
+        if name is None:
+            name = project.data.name
+        if not name:
+            return None
+        with transaction.atomic():
+            type(project).objects.select_for_update() \
+                .filter(pk=project.pk).values_list('pk').first()
+            return self._record(project, name)
+
+    def _record(self, project, name):
+        latest = self.filter(project=project).order_by('-number').first()
+        if latest is not None and latest.name == name:
+            return latest
+
+        try:
+            with project.data.storage.open(name, 'rb') as data:
+                content = data.read()
+        except FileNotFoundError:
+            return None
+        interval = settings.PROJECT_REVISION_KEYFRAME_INTERVAL
+        if latest is None or latest.chain + 1 >= interval:
+            chain, stored = 0, zlib.compress(content)
+        else:
+            previous = self.read(project, latest.number)
+            chain = latest.chain + 1
+            stored = encode_delta(previous, content)
+
+        return self.create(
+            project=project,
+            number=0 if latest is None else latest.number + 1,
+            name=name,
+            chain=chain,
+            content=stored,
+            size=len(content)
+        )
+
+    def read(self, project, number):
+        """Rebuild the data of a revision from its nearest keyframe"""
+        keyframe = self.filter(
+            project=project,
+            number__lte=number,
+            chain=0
+        ).order_by('-number').first()
+        if keyframe is None:
+            raise self.model.DoesNotExist()
+        deltas = self.filter(
+            project=project,
+            number__gt=keyframe.number,
+            number__lte=number
+        ).order_by('number').values_list('number', 'content')
+
+        content = zlib.decompress(keyframe.content)
+        expected = keyframe.number
+        for revision_number, delta in deltas:
+            expected += 1
+            if revision_number != expected:
+                break
+            content = apply_delta(content, bytes(delta))
+        if expected != number:
+            raise self.model.DoesNotExist()
+
+        return content
+
+
+class ProjectRevision(models.Model):
+    """A stored version of a project's data.
+
+    Keyframes (chain 0) hold the compressed data, every other revision a
+    delta against the revision before it. Chains are capped at
+    PROJECT_REVISION_KEYFRAME_INTERVAL, which bounds the number of deltas
+    applied to read any revision.
+    """
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+    number = models.PositiveIntegerField()
+    name = models.CharField(max_length=255)
+    chain = models.PositiveIntegerField()
+    content = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    objects = ProjectRevisionManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'number'],
+                name='unique_project_revision'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.project_id} r{self.number}'
+
+
+class BlobDigestManager(models.Manager):
+
+    def index(self, name, sha256, size, kind):
+        """Remember that a blob with this content is stored under name"""
+        digest, _ = self.update_or_create(
+            sha256=sha256,
+            size=size,
+            kind=kind,
+            defaults={'name': name}
+        )
+        return digest
+
+    def lookup(self, sha256, size, kind, storage):
+        """Return the name of a stored blob of this kind with this content,
+        if any"""
+        name = self.filter(sha256=sha256, size=size, kind=kind) \
+            .values_list('name', flat=True).first()
+        if name and storage.exists(name):
+            return name
+        return None
+
+
+class BlobDigest(models.Model):
+    """Content digest of an uploaded blob, used to skip duplicate uploads.
+
+    Blobs are only shared within their kind, so a probe for an image can't
+    attach project data that never went through the image checks.
+    """
+
+    class Kind(models.TextChoices):
+        DATA = 'data'
+        IMAGE = 'image'
+
+    sha256 = models.CharField(max_length=64)
+    size = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    name = models.CharField(max_length=255)
+
+    objects = BlobDigestManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['sha256', 'size', 'kind'],
+                name='unique_blob_digest'
+            )
+        ]
+
+    def __str__(self):
+        return self.sha256
+
+
+class ImportedProject(models.Model):
+    """Legacy project file already brought in by import_projects.
+
+    Written in the same transaction as the project, so a run that crashed
+    is resumed by skipping the sources recorded here.
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    source = models.CharField(max_length=255)
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.SET_NULL,
+        null=True
+    )
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'source'],
+                name='unique_imported_project'
+            )
+        ]
+
+    def __str__(self):
+        return self.source
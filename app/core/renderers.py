@@ -0,0 +1,76 @@
+import msgpack
+import orjson
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.timing import timed
+
+
+class OrjsonRenderer(JSONRenderer):
+    """Render JSON with orjson, keeping the output of DRF's JSONRenderer.
+
+    Datetimes, decimals, lazy strings and the other types orjson doesn't
+    encode the same way are passed through to DRF's JSONEncoder. Indented
+    output (the browsable API) still goes through the stdlib json module.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    default = JSONEncoder().default
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        ret = orjson.dumps(data, default=self.default, option=self.options)
+
+        # Escape U+2028/U+2029 like JSONRenderer, to stay a JS subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                .replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render responses as MessagePack.
+
+    Datetimes are packed as native MessagePack timestamps (serializers
+    using NativeDateTimeMixin leave them unformatted for this renderer)
+    and bytes as the bin type.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    native_datetimes = True
+    default = JSONEncoder().default
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=self.default, datetime=True,
+                             use_bin_type=True)
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Render metrics in the Prometheus text format.
+
+    The view hands over the exposition text, anything else (error details)
+    is rendered as JSON.
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+
+        return orjson.dumps(data)
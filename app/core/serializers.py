@@ -0,0 +1,146 @@
+from django.conf import settings
+
+from rest_framework import serializers
+from rest_framework.fields import empty
+
+from core.timing import timed
+
+
+class NativeDateTimeMixin:
+    """Leave datetimes unformatted when the renderer encodes them itself.
+
+    Renderers with native_datetimes set (MessagePack) get datetime objects
+    instead of ISO 8601 strings, including inside list fields.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        renderer = getattr(request, 'accepted_renderer', None)
+        if not getattr(renderer, 'native_datetimes', False):
+            return fields
+
+        for field in fields.values():
+            if isinstance(field, serializers.ListField):
+                field = field.child
+            if isinstance(field, serializers.DateTimeField):
+                field.format = None
+
+        return fields
+
+
+class TimedSerializerMixin:
+    """Count validation and representation towards the serialize timing
+    of ServerTimingMiddleware"""
+
+    @timed('serialize')
+    def run_validation(self, data=empty):
+        return super().run_validation(data)
+
+    @timed('serialize')
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
+
+class TimedImageField(serializers.ImageField):
+    """Image field counting Pillow's checks towards the image timing"""
+
+    @timed('image')
+    def to_internal_value(self, data):
+        return super().to_internal_value(data)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """One sub-request of a batch"""
+    method = serializers.ChoiceField(
+        choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+    )
+    url = serializers.RegexField(r'^/api/')
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for running many API requests in one round trip"""
+    atomic = serializers.BooleanField(default=False)
+    requests = serializers.ListField(
+        child=BatchRequestSerializer(),
+        allow_empty=False
+    )
+
+    def validate_requests(self, value):
+        """Enforce the maximum number of sub-requests"""
+        max_size = settings.BATCH_MAX_REQUESTS
+        if len(value) > max_size:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than {max_size} elements.'
+            )
+        return value
+
+
+def expand_params(request):
+    """Return the relation names asked for with ?expand=a,b"""
+    param = getattr(request, 'query_params', {}).get('expand', '')
+    return {name.strip() for name in param.split(',') if name.strip()}
+
+
+class ExpandMixin:
+    """Embed the related objects named in ?expand= instead of their ids.
+
+    expandable_fields maps a relation to the serializer embedding it and
+    whether it is a to-many relation. Views pass their queryset through
+    expand_queryset so every expansion is loaded with select_related or
+    prefetch_related instead of a query per row. Serializers given data
+    to validate, or context['expand'] set to False, ignore ?expand=.
+    """
+    expandable_fields = {}
+
+    @classmethod
+    def expanded(cls, request):
+        """Return the expandable relations requested"""
+        return expand_params(request) & set(cls.expandable_fields)
+
+    @classmethod
+    def expand_queryset(cls, queryset, request):
+        """Join or prefetch the relations that will be expanded"""
+        for name in sorted(cls.expanded(request)):
+            many = cls.expandable_fields[name][1]
+            if many:
+                queryset = queryset.prefetch_related(name)
+            else:
+                queryset = queryset.select_related(name)
+
+        return queryset
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if hasattr(self.root, 'initial_data') \
+                or not self.context.get('expand', True):
+            # Writes validate against the plain relations, expansions are
+            # read-only and would drop the values sent
+            return fields
+        for name in sorted(self.expanded(self.context.get('request'))):
+            serializer_class, many = self.expandable_fields[name]
+            fields[name] = serializer_class(many=many, read_only=True)
+
+        return fields
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field that first looks in the related objects preloaded
+    into the serializer context, so bulk validation doesn't query per item.
+
+    context['related_objects'] maps a model to a {pk: instance} dict.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or \
+                isinstance(data, float) and not data.is_integer():
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        objects = self.context.get('related_objects', {}).get(
+            self.get_queryset().model,
+            {}
+        )
+        try:
+            return objects[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import posixpath
+import re
+import zlib
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from core.timing import timed
+
+
+SHARDED_NAME_RE = r'/[0-9a-f]{2}/[0-9a-f]{2}/[^/]+$'
+INLINE_PREFIX = 'db/'
+
+
+def file_sha256(file):
+    """Return the hex SHA-256 of an open Django File, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _shard_dirs(basename):
+    """Return the two shard directory names for a file name"""
+    digest = hashlib.md5(basename.encode()).hexdigest()
+    return digest[:2], digest[2:4]
+
+
+def shard_name(name):
+    """Return the sharded location of an upload, i.e. dir/ab/cd/<file>"""
+    directory, basename = posixpath.split(name)
+
+    return posixpath.join(directory, *_shard_dirs(basename), basename)
+
+
+def is_sharded(name):
+    """Check whether an upload name already sits in its shard directory"""
+    if not re.search(SHARDED_NAME_RE, name):
+        return False
+    parent, basename = posixpath.split(name)
+    parent, second = posixpath.split(parent)
+    first = posixpath.basename(parent)
+
+    return (first, second) == _shard_dirs(basename)
+
+
+class ShardedFileSystemStorage(FileSystemStorage):
+    """Filesystem storage for the hash-sharded uploads tree.
+
+    New uploads are already given sharded names by the upload_to functions.
+    Legacy flat names (uploads/project/<uuid>.xml) keep resolving, both
+    before and after shard_uploads has moved the file underneath them.
+    """
+
+    def resolve(self, name):
+        """Return the name under which the file currently lives"""
+        if is_sharded(name) or os.path.exists(super().path(name)):
+            return name
+        sharded = shard_name(name)
+        if os.path.exists(super().path(sharded)):
+            return sharded
+
+        return name
+
+    def path(self, name):
+        return super().path(self.resolve(name))
+
+    def url(self, name):
+        return super().url(self.resolve(name))
+
+    @timed('storage')
+    def _save(self, name, content):
+        return super()._save(name, content)
+
+    @timed('storage')
+    def _open(self, name, mode='rb'):
+        return super()._open(name, mode)
+
+    @timed('storage')
+    def exists(self, name):
+        return super().exists(name)
+
+    @timed('storage')
+    def delete(self, name):
+        return super().delete(name)
+
+    @timed('storage')
+    def size(self, name):
+        return super().size(name)
+
+    def shard(self, name):
+        """Move a legacy upload into its shard and return the new name"""
+        if is_sharded(name):
+            return name
+        new_name = shard_name(name)
+        source = super().path(name)
+        target = super().path(new_name)
+        if os.path.exists(source):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source, target)
+        elif not os.path.exists(target):
+            return name
+
+        return new_name
+
+
+class HybridStorage(ShardedFileSystemStorage):
+    """Keep small blobs compressed in the database, larger ones on disk.
+
+    Blobs up to PROJECT_DATA_INLINE_MAX_SIZE bytes are stored in the
+    InlineBlob table under a db/ prefixed name, everything else falls
+    through to the sharded filesystem. A size of 0 disables inlining.
+    """
+
+    @property
+    def max_inline_size(self):
+        return getattr(settings, 'PROJECT_DATA_INLINE_MAX_SIZE', 0)
+
+    def _blobs(self):
+        return apps.get_model('core', 'InlineBlob').objects
+
+    def _is_inline(self, name):
+        return name.startswith(INLINE_PREFIX)
+
+    @timed('storage')
+    def _save(self, name, content):
+        if not self.max_inline_size or content.size > self.max_inline_size:
+            return super()._save(name, content)
+        name = self.get_available_name(INLINE_PREFIX + name)
+        data = b''.join(content.chunks())
+        self._blobs().create(
+            name=name,
+            content=zlib.compress(data),
+            size=len(data)
+        )
+
+        return name
+
+    @timed('storage')
+    def _open(self, name, mode='rb'):
+        if not self._is_inline(name):
+            return super()._open(name, mode)
+        content = self._blobs().filter(name=name) \
+            .values_list('content', flat=True).first()
+        if content is None:
+            raise FileNotFoundError(name)
+        return ContentFile(zlib.decompress(content), name=name)
+
+    @timed('storage')
+    def exists(self, name):
+        if not self._is_inline(name):
+            return super().exists(name)
+        return self._blobs().filter(name=name).exists()
+
+    @timed('storage')
+    def delete(self, name):
+        if not self._is_inline(name):
+            return super().delete(name)
+        self._blobs().filter(name=name).delete()
+
+    @timed('storage')
+    def size(self, name):
+        if not self._is_inline(name):
+            return super().size(name)
+        return self._blobs().values_list('size', flat=True).get(name=name)
+
+    def path(self, name):
+        if self._is_inline(name):
+            raise NotImplementedError(
+                "Inline blobs don't have a filesystem path."
+            )
+        return super().path(name)
@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Application, Project
+
+
+BATCH_URL = reverse('batch')
+CURRENT_USER_URL = reverse('user:current')
+APPLICATIONS_URL = reverse('project:application-list')
+PROJECTS_URL = reverse('project:project-list')
+TAGS_URL = reverse('project:tag-list')
+
+
+def sub_request(url, method='GET', body=None):
+    """Return a batch sub-request"""
+    sub = {'method': method, 'url': url}
+    if body is not None:
+        sub['body'] = body
+    return sub
+
+
+class BatchApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'batch@csdt.org',
+            'batch',
+            'batchpass'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+        Project.objects.create(
+            owner=self.user,
+            title='Batched',
+            application=self.application
+        )
+
+    def _batch(self, *subs, **params):
+        """Post a batch of sub-requests"""
+        return self.client.post(
+            BATCH_URL,
+            {'requests': list(subs), **params},
+            format='json'
+        )
+
+    def test_batch(self):
+        """Test that sub-requests answer like the standalone requests"""
+        urls = [CURRENT_USER_URL, APPLICATIONS_URL, TAGS_URL, PROJECTS_URL]
+
+        res = self._batch(*(sub_request(url) for url in urls))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for url, response in zip(urls, res.data['responses']):
+            self.assertEqual(response['status'], status.HTTP_200_OK)
+            self.assertEqual(response['body'], self.client.get(url).data)
+
+    def test_single_auth_lookup(self):
+        """Test that the token is looked up once for the whole batch"""
+        with CaptureQueriesContext(connection) as queries:
+            self._batch(sub_request(CURRENT_USER_URL),
+                        sub_request(PROJECTS_URL),
+                        sub_request(TAGS_URL))
+
+        token_queries = [
+            query for query in queries
+            if 'authtoken_token' in query['sql']
+        ]
+        self.assertEqual(len(token_queries), 1)
+
+    def test_anonymous_batch(self):
+        """Test that sub-requests enforce their own permissions"""
+        res = APIClient().post(
+            BATCH_URL,
+            {'requests': [sub_request(APPLICATIONS_URL),
+                          sub_request(PROJECTS_URL)]},
+            format='json'
+        )
+
+        statuses = [response['status'] for response in res.data['responses']]
+        self.assertEqual(statuses, [200, 401])
+
+    def test_sub_response_headers(self):
+        """Test that DRF sub-responses report their rendered headers"""
+        res = APIClient().post(
+            BATCH_URL,
+            {'requests': [sub_request(APPLICATIONS_URL),
+                          sub_request(PROJECTS_URL)]},
+            format='json'
+        )
+
+        listed, denied = res.data['responses']
+        self.assertEqual(listed['headers']['Content-Type'],
+                         'application/json')
+        self.assertEqual(denied['headers']['Content-Type'],
+                         'application/json')
+        self.assertEqual(denied['headers']['WWW-Authenticate'], 'Token')
+
+    def test_atomic_rollback(self):
+        """Test that an atomic batch is rolled back at the first failure"""
+        create = sub_request(PROJECTS_URL, 'POST', {
+            'title': 'Created',
+            'application': self.application.pk,
+            'tags': [],
+        })
+        invalid = sub_request(PROJECTS_URL, 'POST', {'title': 'Invalid'})
+
+        res = self._batch(create, invalid, create, atomic=True)
+
+        self.assertFalse(res.data['committed'])
+        self.assertEqual(
+            [response['status'] for response in res.data['responses']],
+            [201, 400, 424]
+        )
+        self.assertFalse(Project.objects.filter(title='Created').exists())
+
+    def test_atomic_commit(self):
+        """Test that a successful atomic batch is committed"""
+        create = sub_request(PROJECTS_URL, 'POST', {
+            'title': 'Created',
+            'application': self.application.pk,
+            'tags': [],
+        })
+
+        res = self._batch(create, sub_request(PROJECTS_URL), atomic=True)
+
+        self.assertTrue(res.data['committed'])
+        self.assertEqual(len(res.data['responses'][1]['body']), 2)
+
+    def test_invalid_sub_requests(self):
+        """Test that unknown and nested sub-requests are reported"""
+        res = self._batch(sub_request('/api/unknown/'),
+                          sub_request(BATCH_URL, 'POST', {'requests': []}))
+
+        self.assertEqual(
+            [response['status'] for response in res.data['responses']],
+            [404, 400]
+        )
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_batch_validation(self):
+        """Test that oversized batches and non API urls are refused"""
+        too_many = self._batch(*[sub_request(TAGS_URL)] * 3)
+        not_api = self._batch(sub_request('/admin/'))
+
+        self.assertEqual(too_many.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(not_api.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,8 +1,21 @@
+import json
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
 from unittest.mock import patch
 
-from django.core.management import call_command
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, \
+    override_settings
+from django.utils import timezone
+
+from core.models import Application, BlobDigest, ImportedProject, \
+    Project, ProjectChange, Software
 
 
 class CommandTests(TestCase):
@@ -21,3 +34,314 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_compact_project_changes(self):
+        """Test compacting superseded changes and expired tombstones"""
+        user = get_user_model().objects.create_user(
+            'test@csdt.org',
+            'test',
+            'testpass'
+        )
+        kinds = ProjectChange.Kind
+        created = ProjectChange.objects.create(
+            owner=user, project_id=1, kind=kinds.CREATED
+        )
+        updated = ProjectChange.objects.create(
+            owner=user, project_id=1, kind=kinds.UPDATED
+        )
+        old = [
+            ProjectChange.objects.create(
+                owner=user, project_id=project_id, kind=kinds.DELETED
+            ) for project_id in (2, 3)
+        ]
+        ProjectChange.objects.filter(seq__in=[c.seq for c in old]).update(
+            created_date=timezone.now() - timedelta(days=60)
+        )
+        recent = ProjectChange.objects.create(
+            owner=user, project_id=4, kind=kinds.DELETED
+        )
+
+        call_command('compact_project_changes', days=30)
+
+        remaining = ProjectChange.objects.order_by('seq')
+        self.assertNotIn(created, remaining)
+        self.assertEqual(
+            [(c.seq, c.kind) for c in remaining],
+            [
+                (updated.seq, kinds.UPDATED),
+                (old[1].seq, kinds.COMPACTED),
+                (recent.seq, kinds.DELETED),
+            ]
+        )
+
+
+class ImportProjectsCommandTests(TestCase):
+    """Test importing legacy pCSDT projects"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'legacy@csdt.org',
+            'legacy',
+            'legacypass'
+        )
+        self.application = Application.objects.create(
+            name='CC',
+            link='cc/index.html'
+        )
+        self.content = (settings.BASE_DIR / 'samples/data.xml').read_bytes()
+        self.thumbnail = \
+            (settings.BASE_DIR / 'samples/thumbnail.png').read_bytes()
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        for project in Project.objects.all():
+            if project.data:
+                project.data.delete()
+            if project.thumbnail:
+                project.thumbnail.delete()
+
+    def _import(self, path=None, **options):
+        """Run the import for the test user, returning its output"""
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_projects',
+            str(path or self.root),
+            owner='legacy',
+            workers=2,
+            stdout=out,
+            stderr=err,
+            **options
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_directory(self):
+        """Test importing project files, thumbnails and tags"""
+        (self.root / 'student').mkdir()
+        (self.root / 'student/Braids.xml').write_bytes(self.content)
+        (self.root / 'student/Braids.png').write_bytes(self.thumbnail)
+        (self.root / 'Plait.xml').write_bytes(self.content)
+
+        out, _ = self._import(tag=['legacy'], chunk_size=1)
+
+        self.assertIn('2 projects imported', out)
+        self.assertIn('files/s', out)
+        projects = Project.objects.filter(owner=self.user).order_by('title')
+        self.assertEqual(
+            [project.title for project in projects],
+            ['Braids', 'Plait']
+        )
+        braids, plait = projects
+        self.assertEqual(braids.application, self.application)
+        self.assertEqual(braids.data.read(), self.content)
+        self.assertEqual(braids.thumbnail.read(), self.thumbnail)
+        self.assertFalse(plait.thumbnail)
+        self.assertEqual(
+            [tag.name for tag in plait.tags.all()],
+            ['legacy']
+        )
+        self.assertEqual(BlobDigest.objects.count(), 1)
+        self.assertEqual(
+            ProjectChange.objects.filter(owner=self.user).count(),
+            2
+        )
+
+    def test_import_zip(self):
+        """Test importing from a ZIP archive"""
+        path = self.root / 'legacy.zip'
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('projects/Plait.xml', self.content)
+
+        self._import(path)
+
+        imported = ImportedProject.objects.get(owner=self.user)
+        self.assertEqual(imported.source, 'projects/Plait.xml')
+        self.assertEqual(imported.project.data.read(), self.content)
+
+    def test_import_resumes(self):
+        """Test that a second run only imports files not imported yet"""
+        (self.root / 'First.xml').write_bytes(self.content)
+        self._import()
+        (self.root / 'Second.xml').write_bytes(self.content)
+
+        out, _ = self._import()
+
+        self.assertIn('1 files to import, 1 already imported', out)
+        self.assertEqual(
+            sorted(Project.objects.values_list('title', flat=True)),
+            ['First', 'Second']
+        )
+
+    def test_import_invalid_files(self):
+        """Test that unusable files are reported and retried next run"""
+        (self.root / 'Broken.xml').write_bytes(b'<pCSDT>')
+        (self.root / 'Other.xml').write_bytes(b'<project/>')
+        (self.root / 'Unknown.xml').write_bytes(
+            self.content.replace(b'codename="CC"', b'codename="XX"')
+        )
+
+        out, err = self._import()
+
+        self.assertIn('0 projects imported, 3 failed', out)
+        self.assertIn('Broken.xml: Invalid XML', err)
+        self.assertIn('Other.xml: Not a pCSDT project.', err)
+        self.assertIn('No application for codename "XX"', err)
+        self.assertFalse(ImportedProject.objects.exists())
+
+        self._import(application='CC')
+        self.assertEqual(
+            Project.objects.get().title,
+            'Unknown'
+        )
+
+    def test_import_unknown_owner(self):
+        """Test that the owner has to exist"""
+        with self.assertRaises(CommandError):
+            call_command('import_projects', str(self.root), owner='nobody')
+
+
+class SeedDataCommandTests(TestCase):
+    """Test generating a synthetic dataset"""
+
+    def tearDown(self):
+        names = set(Project.objects.values_list('data', 'thumbnail')
+                    .distinct())
+        storages = (
+            Project._meta.get_field('data').storage,
+            Project._meta.get_field('thumbnail').storage,
+        )
+        for pair in names:
+            for storage, name in zip(storages, pair):
+                if name:
+                    storage.delete(name)
+        for software in Software.objects.all():
+            software.default_file.delete()
+
+    def test_seed_data(self):
+        """Test seeding users, projects, tags and blobs"""
+        call_command(
+            'seed_data',
+            users=3,
+            projects=25,
+            tags=4,
+            applications=2,
+            software=2,
+            tag_fanout=2,
+            history=3,
+            blobs=2,
+            batch_size=10,
+            stdout=StringIO()
+        )
+
+        projects = Project.objects.filter(owner__username__startswith='seed')
+        self.assertEqual(projects.count(), 25)
+        self.assertEqual(Software.objects.count(), 2)
+        self.assertEqual(BlobDigest.objects.count(), 2)
+        project = projects.order_by('id').first()
+        self.assertEqual(project.tags.count(), 2)
+        self.assertEqual(len(project.modified_date_history), 3)
+        self.assertEqual(project.modified_data_history[-1], project.data.name)
+        self.assertTrue(project.data.read().startswith(b'<?xml'))
+        self.assertTrue(
+            self.client.login(username='seed0', password='seedpass')
+        )
+
+    def test_seed_data_prefix_taken(self):
+        """Test that seeding twice with one prefix is refused"""
+        get_user_model().objects.create_user(
+            'seed0@csdt.org',
+            'seed0',
+            'seedpass'
+        )
+
+        with self.assertRaises(CommandError):
+            call_command('seed_data', projects=1, stdout=StringIO())
+
+
+class BenchApiCommandTests(TestCase):
+    """Test the API benchmark suite"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = Path(self.directory.name) / 'bench.json'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _bench(self, **options):
+        call_command(
+            'bench_api',
+            users=2,
+            projects=20,
+            repeat=1,
+            only='tag-list',
+            stdout=StringIO(),
+            stderr=StringIO(),
+            **options
+        )
+
+    def test_bench_api_output(self):
+        """Test that results are written for the selected endpoints"""
+        self._bench(output=str(self.output))
+
+        results = json.loads(self.output.read_text())['results']
+        self.assertEqual(
+            set(results),
+            {'GET project:tag-list', 'POST project:tag-list'}
+        )
+        self.assertEqual(results['GET project:tag-list']['queries'], 1)
+        self.assertFalse(Project.objects.exists())
+
+    def test_bench_api_regression(self):
+        """Test that exceeding the baseline fails the run"""
+        self._bench(output=str(self.output))
+        self._bench(baseline=str(self.output), threshold=100)
+        report = json.loads(self.output.read_text())
+        report['results']['GET project:tag-list']['queries'] = 0
+        self.output.write_text(json.dumps(report))
+
+        with self.assertRaisesMessage(CommandError, '1 regressions'):
+            self._bench(baseline=str(self.output), threshold=100)
+
+
+class LoadTestCommandTests(TransactionTestCase):
+    """Test the load test harness against the WSGI application"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.directory.name,
+            ALLOWED_HOSTS=['127.0.0.1']
+        )
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.directory.cleanup()
+
+    def test_loadtest(self):
+        """Test that every scenario runs and is reported"""
+        call_command(
+            'seed_data',
+            users=4,
+            projects=20,
+            software=1,
+            stdout=StringIO()
+        )
+        out = StringIO()
+
+        call_command('loadtest', users=4, duration=1, stdout=out)
+
+        report = json.loads(out.getvalue())
+        scenarios = report['scenarios']
+        self.assertEqual(
+            set(scenarios),
+            {'login', 'browse', 'open', 'media', 'autosave', 'upload'}
+        )
+        # Media isn't routed by Django with DEBUG off, as in tests
+        del scenarios['media']
+        for scenario in scenarios.values():
+            self.assertGreater(scenario['requests'], 0)
+            self.assertEqual(scenario['errors'], 0)
+            self.assertLessEqual(scenario['p50_ms'], scenario['p99_ms'])
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+
+
+METRICS_URL = reverse('metrics')
+
+
+class MetricsRegistryTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings = override_settings(METRICS_DIR=self.directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_counter_exposition(self):
+        """Test counters are rendered with their labels"""
+        counter = metrics.Counter('test_counter_total', 'Test counter.')
+        counter.inc(view='a"b')
+        counter.inc(2, view='a"b')
+        metrics.flush()
+
+        text = metrics.exposition()
+
+        self.assertIn('# TYPE test_counter_total counter', text)
+        self.assertIn('test_counter_total{view="a\\"b"} 3', text)
+
+    def test_histogram_exposition(self):
+        """Test histogram buckets are cumulative and end with +Inf"""
+        histogram = metrics.Histogram(
+            'test_histogram_seconds',
+            'Test histogram.',
+            buckets=(0.1, 1)
+        )
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value, view='x')
+        metrics.flush()
+
+        text = metrics.exposition()
+
+        self.assertIn('# TYPE test_histogram_seconds histogram', text)
+        self.assertIn('test_histogram_seconds_bucket{view="x",le="0.1"} 1',
+                      text)
+        self.assertIn('test_histogram_seconds_bucket{view="x",le="1"} 3',
+                      text)
+        self.assertIn('test_histogram_seconds_bucket{view="x",le="+Inf"} 4',
+                      text)
+        self.assertIn('test_histogram_seconds_sum{view="x"} 6.05', text)
+        self.assertIn('test_histogram_seconds_count{view="x"} 4', text)
+
+    def test_processes_merged(self):
+        """Test the files of other processes are added up"""
+        counter = metrics.Counter('test_merged_total', 'Test counter.')
+        counter.inc(view='x')
+        metrics.flush()
+        with open(os.path.join(self.directory.name, '1.json'), 'w') as f:
+            json.dump([['test_merged_total', [['view', 'x']], 4]], f)
+
+        self.assertIn('test_merged_total{view="x"} 5',
+                      metrics.exposition())
+
+    def test_threads_merged(self):
+        """Test the counts of finished threads are kept"""
+        counter = metrics.Counter('test_threads_total', 'Test counter.')
+        threads = [
+            threading.Thread(target=lambda: [counter.inc() for _ in range(50)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics.flush()
+        metrics.flush()
+
+        self.assertIn('test_threads_total 200', metrics.exposition())
+
+
+class MetricsApiTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings = override_settings(METRICS_DIR=self.directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'metrics@csdt.org',
+            'metrics',
+            'metricspass'
+        )
+
+    def test_metrics_staff_only(self):
+        """Test users who aren't staff can't read the metrics"""
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_requests_counted(self):
+        """Test earlier requests show up in the metrics"""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('project:tag-list'))
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        text = res.content.decode()
+        self.assertIn(
+            'http_requests_total{action="list",method="GET",'
+            'status="200",view="project:tag-list"}',
+            text
+        )
+        self.assertIn('db_queries_total{view="project:tag-list"}', text)
+        self.assertIn(
+            'http_request_duration_seconds_count'
+            '{action="list",view="project:tag-list"}',
+            text
+        )
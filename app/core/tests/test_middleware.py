@@ -0,0 +1,279 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import middleware, timing
+from core.middleware import CompressionMiddleware, negotiate_encoding, \
+    brotli, zstandard
+from core.models import Project, Application
+
+
+PROJECTS_URL = reverse('project:project-list')
+
+
+class RequestDecompressionTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'gzip@csdt.org',
+            'gzip',
+            'gzippass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+        self.payload = json.dumps({
+            'title': 'Compressed',
+            'application': self.application.pk,
+            'tags': [],
+        }).encode()
+
+    def _post(self, body, encoding):
+        """Post a JSON body with a content encoding"""
+        return self.client.post(
+            PROJECTS_URL,
+            body,
+            content_type='application/json',
+            HTTP_CONTENT_ENCODING=encoding
+        )
+
+    def test_gzip_body(self):
+        """Test that gzip encoded JSON bodies are parsed"""
+        res = self._post(gzip.compress(self.payload), 'gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Project.objects.filter(title='Compressed').exists())
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_body(self):
+        """Test that zstd encoded JSON bodies are parsed"""
+        body = zstandard.ZstdCompressor().compress(self.payload)
+
+        res = self._post(body, 'zstd')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_unsupported_encoding(self):
+        """Test that unknown encodings are refused"""
+        res = self._post(self.payload, 'compress')
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+
+    def test_corrupt_body(self):
+        """Test that a corrupt gzip body is a bad request"""
+        res = self._post(gzip.compress(self.payload)[:-12], 'gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_decompression_bomb(self):
+        """Test that bodies inflating beyond the ratio are refused"""
+        bomb = gzip.compress(b' ' * (10 * 1024 * 1024))
+
+        res = self._post(bomb, 'gzip')
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    @override_settings(REQUEST_DECOMPRESSION_MAX_SIZE=16)
+    def test_decompressed_size_limit(self):
+        """Test that bodies inflating beyond the size limit are refused"""
+        res = self._post(gzip.compress(self.payload), 'gzip')
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+
+class ResponseCompressionTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        cache.clear()
+
+    def _process(self, response, accept='gzip'):
+        """Run a response through the compression middleware"""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate_encoding(self):
+        """Test that the best accepted encoding is picked"""
+        self.assertEqual(negotiate_encoding('gzip, br;q=0'), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0, *'),
+                         'br' if brotli else 'zstd' if zstandard else None)
+        self.assertIsNone(negotiate_encoding(''))
+        self.assertIsNone(negotiate_encoding('identity'))
+
+    @unittest.skipIf(brotli is None, 'brotli is not installed')
+    def test_prefers_brotli(self):
+        """Test that brotli wins over gzip at the same weight"""
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'br')
+
+    def test_compress_json(self):
+        """Test that JSON responses are compressed"""
+        content = json.dumps([{'title': 'Project'}] * 100).encode()
+        res = self._process(HttpResponse(
+            content,
+            content_type='application/json'
+        ))
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(res['Content-Length']), len(res.content))
+        self.assertEqual(gzip.decompress(res.content), content)
+
+    def test_skip_compressed_media(self):
+        """Test that PNG images and short bodies are sent as is"""
+        png = self._process(HttpResponse(
+            b'\x89PNG' + b'\x00' * 1000,
+            content_type='image/png'
+        ))
+        short = self._process(HttpResponse(
+            b'{}',
+            content_type='application/json'
+        ))
+
+        self.assertFalse(png.has_header('Content-Encoding'))
+        self.assertFalse(short.has_header('Content-Encoding'))
+
+    def test_compress_streaming(self):
+        """Test that streaming responses are compressed chunk by chunk"""
+        chunks = [b'<pCSDT>', b'<x/>' * 500, b'</pCSDT>']
+        res = self._process(StreamingHttpResponse(
+            iter(chunks),
+            content_type='application/xml'
+        ))
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertFalse(res.has_header('Content-Length'))
+        body = b''.join(res.streaming_content)
+        self.assertEqual(gzip.decompress(body), b''.join(chunks))
+
+    @override_settings(PROJECT_DATA_INLINE_MAX_SIZE=64 * 1024)
+    def test_cache_immutable_blob(self):
+        """Test that compressed inline blobs are cached"""
+        storage = Project._meta.get_field('data').storage
+        content = b'<pCSDT>' + b'<block s="forward"/>' * 200 + b'</pCSDT>'
+        name = storage.save('uploads/project/cached.xml',
+                            ContentFile(content))
+        url = storage.url(name)
+
+        with mock.patch.object(middleware, '_compress',
+                               wraps=middleware._compress) as compress:
+            first = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(gzip.decompress(second.content), content)
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'timing@csdt.org',
+            'timing',
+            'timingpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+        self.project = Project.objects.create(
+            owner=self.user,
+            title='Timed',
+            application=self.application
+        )
+
+    def tearDown(self):
+        self.project.refresh_from_db()
+        if self.project.thumbnail:
+            self.project.thumbnail.delete()
+
+    def _metrics(self, res):
+        """Parse the Server-Timing header into {name: params}"""
+        metrics = {}
+        for metric in res['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_server_timing_header(self):
+        """Test that db, serializer, render and total time are reported"""
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            res = self.client.get(PROJECTS_URL)
+
+        metrics = self._metrics(res)
+        self.assertEqual(
+            list(metrics),
+            ['db', 'serialize', 'render', 'total']
+        )
+        record = logs.records[0]
+        self.assertEqual(
+            metrics['db']['desc'],
+            f'"{record.db_count} queries"'
+        )
+        self.assertGreater(record.db_count, 0)
+        self.assertEqual(record.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(record.total_ms, record.db_ms)
+
+    def test_server_timing_upload(self):
+        """Test that Pillow and storage time are reported for uploads"""
+        with open(settings.BASE_DIR / 'samples/thumbnail.png', 'rb') as f:
+            upload = SimpleUploadedFile('thumbnail.png', f.read())
+
+        res = self.client.post(
+            reverse('project:project-upload-image', args=[self.project.id]),
+            {'thumbnail': upload}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        metrics = self._metrics(res)
+        self.assertIn('image', metrics)
+        self.assertIn('storage', metrics)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """Test that nothing is timed or reported when turned off"""
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_timed_nested(self):
+        """Test that nested calls under one name are counted once"""
+        @timing.timed('work')
+        def work(depth):
+            return work(depth - 1) if depth else 'done'
+
+        self.assertEqual(work(3), 'done')
+        token = timing.start()
+        work(3)
+        timings = timing.finish(token)
+
+        self.assertEqual(timings['work'][1], 1)
@@ -4,6 +4,7 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 
 from core import models
+from core.storage import shard_name
 
 
 def sample_user(username='test', email='test@csdt.org', password='testpass'):
@@ -134,5 +135,7 @@ class ModelTests(TestCase):
         mock_uuid.return_value = uuid
         file_path = models.project_image_file_path(None, 'testimg.jpg')
 
-        exp_path = f'uploads/project/{uuid}.jpg'
+        exp_path = shard_name(f'uploads/project/{uuid}.jpg')
         self.assertEqual(file_path, exp_path)
+        self.assertTrue(file_path.startswith('uploads/project/'))
+        self.assertTrue(file_path.endswith(f'/{uuid}.jpg'))
@@ -0,0 +1,157 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Application, Project
+from core.parsers import MessagePackParser, OrjsonParser
+from core.renderers import MessagePackRenderer, OrjsonRenderer
+
+
+PROJECTS_URL = reverse('project:project-list')
+
+
+class OrjsonRendererTests(TestCase):
+
+    def test_matches_json_renderer(self):
+        """Test that rendered values decode the same as with JSONRenderer"""
+        data = {
+            'created_date': timezone.make_aware(
+                datetime.datetime(2021, 11, 2, 10, 30, 15, 123456),
+                timezone.utc
+            ),
+            'day': datetime.date(2021, 11, 2),
+            'price': Decimal('1.50'),
+            'detail': gettext_lazy('Not found.'),
+            'history': ['a\u2028b'],
+            1: None,
+        }
+
+        ret = OrjsonRenderer().render(data)
+
+        self.assertEqual(json.loads(ret),
+                         json.loads(JSONRenderer().render(data)))
+        self.assertIn(b'2021-11-02T10:30:15.123456Z', ret)
+        self.assertIn(b'\\u2028', ret)
+
+    def test_indent(self):
+        """Test that indented output is still supported"""
+        ret = OrjsonRenderer().render(
+            {'title': 'Project'},
+            'application/json; indent=4'
+        )
+
+        self.assertEqual(ret, b'{\n    "title": "Project"\n}')
+
+    def test_none(self):
+        """Test that no data renders an empty body"""
+        self.assertEqual(OrjsonRenderer().render(None), b'')
+
+
+class OrjsonParserTests(TestCase):
+
+    def test_parse(self):
+        """Test that JSON request bodies are parsed"""
+        data = OrjsonParser().parse(io.BytesIO(b'{"tags": [1, 2]}'))
+
+        self.assertEqual(data, {'tags': [1, 2]})
+
+    def test_parse_error(self):
+        """Test that malformed JSON raises a parse error"""
+        with self.assertRaises(ParseError):
+            OrjsonParser().parse(io.BytesIO(b'{"tags": ['))
+
+
+class MessagePackTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'msgpack@csdt.org',
+            'msgpack',
+            'msgpackpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+
+    def test_round_trip(self):
+        """Test that datetimes and bytes survive rendering and parsing"""
+        data = {
+            'created_date': timezone.now(),
+            'content': b'\x00\xff',
+            'price': Decimal('1.50'),
+        }
+
+        ret = MessagePackRenderer().render(data)
+        parsed = MessagePackParser().parse(io.BytesIO(ret))
+
+        self.assertEqual(parsed['created_date'], data['created_date'])
+        self.assertEqual(parsed['content'], b'\x00\xff')
+        self.assertEqual(parsed['price'], 1.5)
+
+    def test_parse_error(self):
+        """Test that truncated MessagePack raises a parse error"""
+        ret = MessagePackRenderer().render({'title': 'Project'})
+
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(ret[:-2]))
+
+    def test_list_projects(self):
+        """Test that projects are listed as MessagePack on request"""
+        project = Project.objects.create(
+            owner=self.user,
+            title='Packed',
+            application=self.application,
+            modified_date_history=[timezone.now()]
+        )
+
+        res = self.client.get(PROJECTS_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(res.content, timestamp=3)
+        self.assertEqual(data[0]['created_date'], project.created_date)
+        self.assertIsInstance(data[0]['modified_date_history'][0],
+                              datetime.datetime)
+
+    def test_json_stays_default(self):
+        """Test that JSON is rendered when no format is asked for"""
+        res = self.client.get(PROJECTS_URL)
+
+        self.assertEqual(res['Content-Type'], 'application/json')
+
+    def test_create_project(self):
+        """Test creating a project from a MessagePack body"""
+        body = msgpack.packb({
+            'title': 'Packed',
+            'application': self.application.pk,
+            'tags': [],
+        })
+
+        res = self.client.post(
+            PROJECTS_URL,
+            body,
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        data = msgpack.unpackb(res.content, timestamp=3)
+        project = Project.objects.get(pk=data['id'])
+        self.assertEqual(data['created_date'], project.created_date)
@@ -0,0 +1,141 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core import models
+from core.deltas import apply_delta, encode_delta
+
+
+class DeltaTests(TestCase):
+
+    def test_delta_round_trip(self):
+        """Test that deltas rebuild their target"""
+        cases = [
+            (b'', b'<pCSDT/>\n'),
+            (b'<pCSDT/>\n', b''),
+            (b'a\nb\nc\n', b'a\nB\nc\nd'),
+            (b'a\r\nb\r\n', b'a\r\nc\r\n'),
+        ]
+        for base, target in cases:
+            self.assertEqual(apply_delta(base, encode_delta(base, target)),
+                             target)
+
+    def test_delta_is_compact(self):
+        """Test that a one line change gives a small delta"""
+        base = b''.join(b'<Property name="p%d">%d</Property>\n' % (i, i)
+                        for i in range(500))
+        target = base.replace(b'>250<', b'>-1<')
+
+        self.assertLess(len(encode_delta(base, target)), 100)
+
+
+@override_settings(PROJECT_REVISION_KEYFRAME_INTERVAL=3)
+class ProjectRevisionTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.tmp.name)
+        self.settings_override.enable()
+        user = get_user_model().objects.create_user(
+            'test@csdt.org',
+            'test',
+            'testpass'
+        )
+        application = models.Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+        self.project = models.Project.objects.create(
+            owner=user,
+            title='Revised',
+            application=application
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def _save_versions(self, count):
+        """Save count versions of the project data, return their contents"""
+        versions = []
+        for i in range(count):
+            content = b'<pCSDT>\n<Property name="scale">%d</Property>\n' \
+                      b'</pCSDT>\n' % i
+            self.project.data.save('data.xml', ContentFile(content))
+            models.ProjectRevision.objects.record(self.project)
+            versions.append(content)
+        return versions
+
+    def test_record_keyframes(self):
+        """Test that keyframes are stored at the configured interval"""
+        self._save_versions(7)
+
+        chains = list(self.project.revisions.order_by('number')
+                      .values_list('chain', flat=True))
+        self.assertEqual(chains, [0, 1, 2, 0, 1, 2, 0])
+
+    def test_read_any_revision(self):
+        """Test random access to every stored revision"""
+        versions = self._save_versions(5)
+
+        for number, content in enumerate(versions):
+            self.assertEqual(
+                models.ProjectRevision.objects.read(self.project, number),
+                content
+            )
+        with self.assertRaises(models.ProjectRevision.DoesNotExist):
+            models.ProjectRevision.objects.read(self.project, 5)
+
+    def test_record_same_data_once(self):
+        """Test that unchanged data doesn't add a revision"""
+        self._save_versions(1)
+        models.ProjectRevision.objects.record(self.project)
+
+        self.assertEqual(self.project.revisions.count(), 1)
+
+    def test_record_blank_name(self):
+        """Test that a blank history entry isn't recorded as the current
+        data"""
+        self._save_versions(1)
+
+        self.assertIsNone(models.ProjectRevision.objects.record(
+            self.project,
+            ''
+        ))
+        self.assertEqual(self.project.revisions.count(), 1)
+
+    def test_compact_revisions(self):
+        """Test re-keyframing chains after lowering the interval"""
+        versions = self._save_versions(5)
+
+        with override_settings(PROJECT_REVISION_KEYFRAME_INTERVAL=2):
+            call_command('compact_revisions')
+
+        chains = list(self.project.revisions.order_by('number')
+                      .values_list('chain', flat=True))
+        self.assertEqual(chains, [0, 1, 0, 1, 0])
+        for number, content in enumerate(versions):
+            self.assertEqual(
+                models.ProjectRevision.objects.read(self.project, number),
+                content
+            )
+
+    def test_import_history(self):
+        """Test encoding existing history entries as revisions"""
+        names = []
+        for i in range(3):
+            self.project.data.save('data.xml', ContentFile(b'v%d\n' % i))
+            names.append(self.project.data.name)
+        self.project.modified_data_history = names
+        self.project.save()
+
+        call_command('compact_revisions', import_history=True)
+
+        self.assertEqual(self.project.revisions.count(), 3)
+        self.assertEqual(
+            models.ProjectRevision.objects.read(self.project, 2),
+            b'v2\n'
+        )
@@ -0,0 +1,172 @@
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import models
+from core.storage import ShardedFileSystemStorage, HybridStorage, \
+    shard_name, is_sharded
+
+
+class ShardedStorageTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = ShardedFileSystemStorage(location=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_legacy(self, name, content=b'<pCSDT/>'):
+        """Write a file straight to its flat legacy location"""
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def test_shard_name(self):
+        """Test that sharded names are two levels deep and detected"""
+        name = shard_name('uploads/project/abc.xml')
+        parts = name.split('/')
+
+        self.assertEqual(len(parts), 5)
+        self.assertEqual(parts[-1], 'abc.xml')
+        self.assertTrue(is_sharded(name))
+        self.assertFalse(is_sharded('uploads/project/abc.xml'))
+        self.assertFalse(is_sharded('uploads/project/00/00/abc.xml'))
+
+    def test_resolves_legacy_name(self):
+        """Test that a legacy name resolves before and after sharding"""
+        self._write_legacy('uploads/project/legacy.xml')
+        name = 'uploads/project/legacy.xml'
+        self.assertTrue(self.storage.exists(name))
+
+        new_name = self.storage.shard(name)
+
+        self.assertEqual(new_name, shard_name(name))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.tmp.name, name))
+        )
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.url(name), f'/media/{new_name}')
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'<pCSDT/>')
+
+    def test_shard_missing_file(self):
+        """Test that a missing legacy file keeps its name"""
+        name = 'uploads/project/missing.xml'
+
+        self.assertEqual(self.storage.shard(name), name)
+
+
+@override_settings(PROJECT_DATA_INLINE_MAX_SIZE=16)
+class HybridStorageTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = HybridStorage(location=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_small_blob_inline(self):
+        """Test that small blobs are kept in the database"""
+        name = self.storage.save('uploads/project/small.xml',
+                                 ContentFile(b'<pCSDT/>'))
+
+        self.assertTrue(name.startswith('db/'))
+        self.assertTrue(models.InlineBlob.objects.filter(name=name).exists())
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 8)
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b'<pCSDT/>')
+        with self.assertRaises(NotImplementedError):
+            self.storage.path(name)
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open(name)
+
+    def test_large_blob_on_disk(self):
+        """Test that blobs above the threshold are written to disk"""
+        content = b'<pCSDT>' + b'x' * 32 + b'</pCSDT>'
+        name = self.storage.save('uploads/project/large.xml',
+                                 ContentFile(content))
+
+        self.assertFalse(name.startswith('db/'))
+        self.assertFalse(models.InlineBlob.objects.exists())
+        self.assertTrue(os.path.exists(self.storage.path(name)))
+
+    @override_settings(PROJECT_DATA_INLINE_MAX_SIZE=0)
+    def test_inline_disabled(self):
+        """Test that a size of 0 keeps even empty blobs on disk"""
+        name = self.storage.save('uploads/project/empty.xml',
+                                 ContentFile(b''))
+
+        self.assertFalse(name.startswith('db/'))
+        self.assertFalse(models.InlineBlob.objects.exists())
+        self.assertTrue(os.path.exists(self.storage.path(name)))
+
+    def test_serve_inline_blob(self):
+        """Test that inline blobs are served from their media url"""
+        name = self.storage.save('uploads/project/served.xml',
+                                 ContentFile(b'<pCSDT/>'))
+
+        res = self.client.get(self.storage.url(name))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'<pCSDT/>')
+        self.assertEqual(res['Content-Type'], 'application/xml')
+
+
+class ShardUploadsCommandTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.tmp.name)
+        self.settings_override.enable()
+        self.user = get_user_model().objects.create_user(
+            'test@csdt.org',
+            'test',
+            'testpass'
+        )
+        self.application = models.Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def test_shard_uploads(self):
+        """Test that legacy uploads are moved and rows updated"""
+        storage = models.Project._meta.get_field('data').storage
+        legacy = 'uploads/project/legacy-data.xml'
+        storage.save(legacy, ContentFile(b'<pCSDT/>'))
+        project = models.Project.objects.create(
+            owner=self.user,
+            title='Legacy project',
+            application=self.application,
+            data=legacy
+        )
+        current = models.Project.objects.create(
+            owner=self.user,
+            title='Sharded project',
+            application=self.application
+        )
+        current.data.save('data.xml', ContentFile(b'<pCSDT/>'))
+        current_name = current.data.name
+
+        call_command('shard_uploads', batch_size=1)
+        call_command('shard_uploads')
+
+        project.refresh_from_db()
+        current.refresh_from_db()
+        self.assertEqual(project.data.name, shard_name(legacy))
+        self.assertEqual(project.data.read(), b'<pCSDT/>')
+        self.assertEqual(current.data.name, current_name)
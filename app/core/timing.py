@@ -0,0 +1,61 @@
+import contextvars
+import functools
+import time
+
+
+# Timings of the request being handled, set by ServerTimingMiddleware.
+# None when instrumentation is off, which the hooks check first and bail.
+_timings = contextvars.ContextVar('server_timings', default=None)
+
+
+def start():
+    """Begin collecting timings in the current context"""
+    return _timings.set({})
+
+
+def finish(token):
+    """Stop collecting and return {name: (seconds, count)}"""
+    timings = _timings.get()
+    _timings.reset(token)
+    return {
+        name: (entry[0], entry[1]) for name, entry in timings.items()
+    }
+
+
+def add(name, duration):
+    """Add one timed operation to the current request, if collecting"""
+    timings = _timings.get()
+    if timings is None:
+        return
+    entry = timings.setdefault(name, [0.0, 0, False])
+    entry[0] += duration
+    entry[1] += 1
+
+
+def timed(name):
+    """Decorator adding the time spent in a function to name.
+
+    Calls nested in another call timed under the same name aren't counted
+    again, e.g. nested serializers or storage methods calling super().
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _timings.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            entry = timings.setdefault(name, [0.0, 0, False])
+            if entry[2]:
+                return func(*args, **kwargs)
+            entry[2] = True
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                entry[0] += time.perf_counter() - start
+                entry[1] += 1
+                entry[2] = False
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,207 @@
+import base64
+import io
+import mimetypes
+from urllib.parse import urlsplit
+
+import orjson
+
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_cache_control
+
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import metrics
+from core.models import Project
+from core.renderers import PrometheusRenderer
+from core.serializers import BatchSerializer
+from core.storage import INLINE_PREFIX
+
+
+def inline_blob(request, name):
+    """Serve project data that is stored inline in the database"""
+    storage = Project._meta.get_field('data').storage
+    try:
+        with storage.open(INLINE_PREFIX + name) as blob:
+            content = blob.read()
+    except FileNotFoundError:
+        raise Http404()
+
+    content_type = mimetypes.guess_type(name)[0]
+    response = HttpResponse(
+        content,
+        content_type=content_type or 'application/octet-stream'
+    )
+    # Blob names are never reused, so the content behind one never changes
+    patch_cache_control(response, public=True, max_age=31536000,
+                        immutable=True)
+
+    return response
+
+
+class BatchView(APIView):
+    """Run several API requests in one round trip.
+
+    Sub-requests go through the URL resolver in-process, on this request's
+    thread and database connection, and reuse its authentication instead
+    of looking the token up again. With atomic set they run in a single
+    transaction, which is rolled back at the first 4xx/5xx response and
+    the remaining sub-requests are skipped with 424.
+    """
+    authentication_classes = (TokenAuthentication, )
+    permission_classes = (AllowAny, )
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        atomic = serializer.validated_data['atomic']
+        sub_requests = serializer.validated_data['requests']
+        if not atomic:
+            return Response({
+                'responses': [
+                    self._run(request, sub) for sub in sub_requests
+                ],
+            })
+
+        responses = []
+        with transaction.atomic():
+            for sub in sub_requests:
+                if responses and responses[-1]['status'] >= 400:
+                    responses.append({
+                        'status': status.HTTP_424_FAILED_DEPENDENCY,
+                        'body': {'detail': 'An earlier request failed.'},
+                    })
+                    continue
+                responses.append(self._run(request, sub))
+            committed = all(
+                response['status'] < 400 for response in responses
+            )
+            transaction.set_rollback(not committed)
+
+        return Response({'committed': committed, 'responses': responses})
+
+    def _run(self, request, sub):
+        """Run one sub-request and return its status, headers and body"""
+        url = urlsplit(sub['url'])
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return {
+                'status': status.HTTP_404_NOT_FOUND,
+                'body': {'detail': 'Not found.'},
+            }
+        if getattr(match.func, 'view_class', None) is BatchView:
+            return {
+                'status': status.HTTP_400_BAD_REQUEST,
+                'body': {'detail': "Batches can't be nested."},
+            }
+
+        sub_request = self._sub_request(request, sub, url)
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception as exc:
+            response = response_for_exception(sub_request, exc)
+
+        return self._result(response)
+
+    def _sub_request(self, request, sub, url):
+        """Build the request for a sub-request, sharing the caller's server
+        details and authentication"""
+        body = b''
+        if 'body' in sub:
+            body = orjson.dumps(sub['body'])
+        environ = {
+            key: value for key, value in request.META.items()
+            if not key.startswith('HTTP_') and key not in (
+                'CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING'
+            )
+        }
+        environ.update({
+            'REQUEST_METHOD': sub['method'],
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_ACCEPT': 'application/json',
+            'HTTP_HOST': request.get_host(),
+            'wsgi.input': io.BytesIO(body),
+        })
+        sub_request = WSGIRequest(environ)
+        sub_request.user = request.user
+        if request.user.is_authenticated:
+            sub_request._force_auth_user = request.user
+            sub_request._force_auth_token = request.auth
+
+        return sub_request
+
+    def _result(self, response):
+        """Return the status, headers and body of a sub-response"""
+        if response.streaming:
+            if getattr(response, 'file_to_stream', None) is not None:
+                response.file_to_stream.close()
+            return {
+                'status': status.HTTP_501_NOT_IMPLEMENTED,
+                'body': {'detail': "Streaming responses can't be batched."},
+            }
+
+        result = {'status': response.status_code}
+        if isinstance(response, Response):
+            result['body'] = response.data
+        elif response.content:
+            try:
+                result['body'] = response.content.decode(response.charset)
+            except UnicodeDecodeError:
+                result['body'] = base64.b64encode(response.content).decode()
+                result['encoding'] = 'base64'
+        else:
+            result['body'] = None
+        result['headers'] = {
+            key: value for key, value in response.items()
+            if key not in ('Content-Length', 'Vary', 'Allow')
+        }
+        if isinstance(response, Response):
+            # Unrendered, so Content-Type is still Django's default
+            result['headers'].pop('Content-Type', None)
+            content_type = self._content_type(response)
+            if content_type:
+                result['headers']['Content-Type'] = content_type
+
+        return result
+
+    def _content_type(self, response):
+        """Return the Content-Type DRF would give a response when rendered
+        with the renderer it negotiated"""
+        renderer = getattr(response, 'accepted_renderer', None)
+        if renderer is None or response.data is None:
+            return None
+        if response.content_type:
+            return response.content_type
+        if renderer.charset:
+            return f'{renderer.media_type}; charset={renderer.charset}'
+        return renderer.media_type
+
+
+class MetricsView(APIView):
+    """Serve the metrics of every process to Prometheus, for staff only"""
+    authentication_classes = (TokenAuthentication, )
+    permission_classes = (IsAdminUser, )
+    renderer_classes = (PrometheusRenderer, )
+
+    def get(self, request):
+        metrics.flush()
+        return Response(
+            metrics.exposition(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
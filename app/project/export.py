@@ -0,0 +1,141 @@
+import mimetypes
+import posixpath
+import tempfile
+import zipfile
+
+import orjson
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import Project
+from project.serializers import ProjectValuesSerializer
+
+
+FILE_FIELDS = ('data', 'thumbnail')
+CHUNK_SIZE = 64 * 1024
+
+
+class ZipStream:
+    """Write-only, unseekable file object for zipfile to write into.
+
+    What zipfile writes is kept until drained, so an archive can be sent
+    while it is being built without ever holding all of it.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Return and forget everything written so far"""
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def archive_path(project_id, name):
+    """Return where a project file is stored inside the export"""
+    return f'files/{project_id}/{posixpath.basename(name)}'
+
+
+def _compress_type(name):
+    """Store files that are already compressed, deflate the rest"""
+    content_type = mimetypes.guess_type(name)[0] or ''
+    if content_type.startswith('image/') and content_type != 'image/svg+xml':
+        return zipfile.ZIP_STORED
+    if content_type in ('application/zip', 'application/gzip'):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _entry(name):
+    """Return the ZipInfo of a new archive entry"""
+    info = zipfile.ZipInfo(name, timezone.localtime().timetuple()[:6])
+    info.compress_type = _compress_type(name)
+    return info
+
+
+def _chunks(queryset, chunk_size):
+    """Yield (project_id, data, thumbnail) names in id order, one keyset
+    page at a time"""
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', *FILE_FIELDS)[:chunk_size]
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def export_projects(queryset, context, chunk_size):
+    """Yield a ZIP archive of projects, their metadata and their files.
+
+    The files come first under files/<id>/, then projects.json with the
+    projects as the API lists them, each with the archive paths of its
+    files. Both are written from the same keyset page of file names, so
+    a file changed during the export can't leave the metadata pointing at
+    a path missing from the archive. The metadata is spooled to a
+    temporary file meanwhile and files are copied in chunks, so memory
+    use doesn't grow with the data exported.
+    """
+    stream = ZipStream()
+    missing = []
+    with zipfile.ZipFile(stream, 'w') as archive, \
+            tempfile.SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+            ) as metadata:
+        metadata.write(b'[')
+        separator = b''
+        for rows in _chunks(queryset, chunk_size):
+            files = {row[0]: row[1:] for row in rows}
+            for project_id, names in files.items():
+                for field, name in zip(FILE_FIELDS, names):
+                    if not name:
+                        continue
+                    path = archive_path(project_id, name)
+                    storage = Project._meta.get_field(field).storage
+                    try:
+                        source = storage.open(name, 'rb')
+                    except FileNotFoundError:
+                        missing.append(path)
+                        continue
+                    with source, archive.open(_entry(path), 'w') as entry:
+                        for chunk in source.chunks():
+                            entry.write(chunk)
+                            yield stream.drain()
+                    yield stream.drain()
+
+            # Projects deleted or given away since their file names were
+            # read are missing from items, so pair them up by id
+            items = ProjectValuesSerializer(
+                queryset.filter(pk__in=files).order_by('pk'),
+                context=context
+            ).data
+            for item in items:
+                item['files'] = {
+                    field: archive_path(item['id'], name) if name else None
+                    for field, name in zip(FILE_FIELDS, files[item['id']])
+                }
+                metadata.write(separator)
+                metadata.write(orjson.dumps(item))
+                separator = b','
+        metadata.write(b']')
+
+        metadata.seek(0)
+        with archive.open(_entry('projects.json'), 'w') as entry:
+            for chunk in iter(lambda: metadata.read(CHUNK_SIZE), b''):
+                entry.write(chunk)
+                yield stream.drain()
+        if missing:
+            archive.writestr(_entry('missing.json'), orjson.dumps(missing))
+    yield stream.drain()
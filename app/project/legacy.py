@@ -0,0 +1,88 @@
+import hashlib
+import posixpath
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+
+# Set in each worker process when importing from a ZIP archive, so the
+# archive is opened once per worker rather than once per file.
+_archive = None
+
+
+class LegacyProjectError(Exception):
+    """Raised when a legacy project file can't be imported"""
+
+
+def list_sources(path):
+    """Return the pCSDT files under a directory or in a ZIP archive,
+    sorted, along with the names of thumbnails found next to them"""
+    path = Path(path)
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            names = [
+                name for name in archive.namelist()
+                if not name.endswith('/') and '__MACOSX/' not in name
+            ]
+    else:
+        names = [
+            file.relative_to(path).as_posix()
+            for file in path.rglob('*') if file.is_file()
+        ]
+
+    sources = sorted(name for name in names if name.lower().endswith('.xml'))
+    return sources, set(names)
+
+
+def thumbnail_name(source):
+    """Return the name a thumbnail of a legacy project is stored under"""
+    return posixpath.splitext(source)[0] + '.png'
+
+
+def open_archive(path):
+    """Process pool initializer opening the ZIP archive being imported"""
+    global _archive
+    if zipfile.is_zipfile(path):
+        _archive = zipfile.ZipFile(path)
+
+
+def _read(root, name):
+    if _archive is not None:
+        return _archive.read(name)
+    return (Path(root) / name).read_bytes()
+
+
+def parse_project(root, source, has_thumbnail):
+    """Read and check one legacy project file.
+
+    Runs in a worker process, so it must not touch the database. Returns
+    a dict with the title, the application codename, the file contents
+    and their digest, or the error that made the file unusable.
+    """
+    try:
+        content = _read(root, source)
+        try:
+            document = ElementTree.fromstring(content)
+        except ElementTree.ParseError as error:
+            raise LegacyProjectError(f'Invalid XML: {error}')
+        if document.tag != 'pCSDT':
+            raise LegacyProjectError('Not a pCSDT project.')
+        info = document.find('JNLPInfo/project')
+        if info is None or not info.get('codename'):
+            raise LegacyProjectError('Missing application codename.')
+
+        thumbnail = None
+        if has_thumbnail:
+            thumbnail = _read(root, thumbnail_name(source))
+    except (OSError, LegacyProjectError) as error:
+        return {'source': source, 'error': str(error)}
+
+    return {
+        'source': source,
+        'error': None,
+        'title': posixpath.splitext(posixpath.basename(source))[0],
+        'codename': info.get('codename'),
+        'data': content,
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'thumbnail': thumbnail,
+    }
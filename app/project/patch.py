@@ -0,0 +1,121 @@
+import re
+
+
+HUNK_HEADER_RE = re.compile(
+    rb'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@'
+)
+CHUNK_SIZE = 64 * 1024
+
+
+class PatchError(ValueError):
+    """Raised when a patch is malformed or doesn't apply to its base"""
+
+
+def iter_lines(file):
+    """Yield the lines of a binary file, split on LF only"""
+    pending = b''
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            yield line + b'\n'
+    if pending:
+        yield pending
+
+
+def _parse_header(line):
+    """Return (old_start, old_count, new_count) of a hunk header or None"""
+    match = HUNK_HEADER_RE.match(line)
+    if not match:
+        return None
+    old_start, old_count, _, new_count = match.groups()
+
+    return (
+        int(old_start),
+        1 if old_count is None else int(old_count),
+        1 if new_count is None else int(new_count),
+    )
+
+
+def _hunks(patch_lines):
+    """Yield (old_start, old_count, body) for each hunk of a unified diff.
+
+    Only one hunk is held in memory at a time. body is a list of
+    (op, line) pairs where op is one of b' ', b'-' or b'+'.
+    """
+    header, body, old_left, new_left = None, [], 0, 0
+    for line in patch_lines:
+        if header is not None and line.startswith(b'\\'):
+            # "\ No newline at end of file" applies to the previous line
+            if not body:
+                raise PatchError('Unexpected end of file marker')
+            op, text = body[-1]
+            body[-1] = (op, text.rstrip(b'\n'))
+            continue
+        if header is not None and old_left == new_left == 0:
+            yield header[0], header[1], body
+            header = None
+        if header is None:
+            header = _parse_header(line)
+            if header is not None:
+                _, old_left, new_left = header
+                body = []
+            continue
+
+        # Some editors strip the leading space of blank context lines
+        op, text = (b' ', line) if line == b'\n' else (line[:1], line[1:])
+        if op == b' ':
+            old_left -= 1
+            new_left -= 1
+        elif op == b'-':
+            old_left -= 1
+        elif op == b'+':
+            new_left -= 1
+        else:
+            raise PatchError(f'Unexpected hunk line {line[:40]!r}')
+        if old_left < 0 or new_left < 0:
+            raise PatchError('Hunk is longer than its header')
+        body.append((op, text))
+
+    if header is not None:
+        if old_left or new_left:
+            raise PatchError('Hunk is shorter than its header')
+        yield header[0], header[1], body
+
+
+def apply_unified_diff(base, patch, out):
+    """Apply a unified diff to base, writing the result to out.
+
+    base and patch are binary file objects that are read line by line,
+    so neither the document nor the patch is held in memory.
+    """
+    base_lines = iter_lines(base)
+    position = 1
+    for old_start, old_count, body in _hunks(iter_lines(patch)):
+        # A hunk that only inserts names the line it follows
+        start = old_start if old_count else old_start + 1
+        if start < position:
+            raise PatchError('Hunks overlap or are out of order')
+        while position < start:
+            line = next(base_lines, None)
+            if line is None:
+                raise PatchError('Hunk starts past the end of the base')
+            out.write(line)
+            position += 1
+
+        for op, text in body:
+            if op == b'+':
+                out.write(text)
+                continue
+            line = next(base_lines, None)
+            if line != text:
+                raise PatchError(f'Base does not match at line {position}')
+            if op == b' ':
+                out.write(line)
+            position += 1
+
+    for line in base_lines:
+        out.write(line)
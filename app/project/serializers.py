@@ -1,6 +1,17 @@
-from rest_framework import serializers
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import models
+from django.utils import timezone
 
-from core.models import Tag, Project, Application, Software, Tool
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from core.models import Tag, Project, ProjectRevision, Application, \
+                        Software, Tool
+from core.serializers import CachedPrimaryKeyRelatedField, ExpandMixin, \
+    NativeDateTimeMixin, TimedImageField, TimedSerializerMixin
+from core.timing import timed
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -12,6 +23,14 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', )
 
 
+class TagBulkSerializer(TagSerializer):
+    """Serializer for bulk created tags, whose names are checked for
+    uniqueness all at once by the view"""
+
+    class Meta(TagSerializer.Meta):
+        extra_kwargs = {'name': {'validators': []}}
+
+
 class ApplicationSerializer(serializers.ModelSerializer):
     """Serializer for applications"""
 
@@ -33,20 +52,37 @@ class ToolSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class OwnerSerializer(serializers.ModelSerializer):
+    """Serializer for the public details of a project owner"""
+
+    class Meta:
+        model = get_user_model()
+        fields = ('id', 'username', 'name')
+        read_only_fields = fields
+
+
+class ProjectSerializer(ExpandMixin, NativeDateTimeMixin,
+                        TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for project objects"""
-    tags = serializers.PrimaryKeyRelatedField(
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    tags = CachedPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
+    expandable_fields = {
+        'application': (ApplicationSerializer, False),
+        'tool': (ToolSerializer, False),
+        'tags': (TagSerializer, True),
+        'owner': (OwnerSerializer, False),
+    }
 
     class Meta:
         model = Project
         fields = ('id', 'title', 'application', 'data', 'thumbnail',
                   'description', 'created_date', 'modified_date', 'tags',
                   'modified_date_history', 'modified_data_history',
-                  'modified_thumbnail_history')
-        read_only_fields = ('id',)
+                  'modified_thumbnail_history', 'forked_from')
+        read_only_fields = ('id', 'forked_from')
 
 
 class ProjectDetailSerializer(ProjectSerializer):
@@ -54,8 +90,177 @@ class ProjectDetailSerializer(ProjectSerializer):
     tags = TagSerializer(many=True, read_only=True)
 
 
-class ProjectImageSerializer(serializers.ModelSerializer):
+class ProjectValuesSerializer:
+    """Read-only serializer for project lists, built on QuerySet.values.
+
+    Gives the same output as ProjectSerializer(queryset, many=True) but
+    skips creating a model instance and bound fields for every row. The
+    converter for each field is worked out once from ProjectSerializer and
+    tags are loaded with one query on the through table, ordered by id.
+    """
+    serializer_class = ProjectSerializer
+
+    def __init__(self, queryset, context=None):
+        self.queryset = queryset
+        self.context = context or {}
+
+    @property
+    @timed('serialize')
+    def data(self):
+        context = {**self.context, 'expand': False}
+        fields = [
+            field for field in
+            self.serializer_class(context=context).fields.values()
+            if not field.write_only
+        ]
+        sources, plan, related = [], [], {}
+        for field in fields:
+            if isinstance(field, serializers.ManyRelatedField):
+                related[field.source] = None
+                plan.append((field.field_name, field.source, None))
+                continue
+            if isinstance(field, serializers.RelatedField):
+                sources.append(field.source + '_id')
+            else:
+                sources.append(field.source)
+            plan.append((field.field_name, len(sources) - 1,
+                         self._converter(field)))
+
+        queryset = self.queryset.prefetch_related(None)
+        rows = list(queryset.values_list(*sources, 'pk'))
+        ids = [row[-1] for row in rows]
+        for source in related:
+            related[source] = self._related_ids(source, ids)
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, convert in plan:
+                if index in related:
+                    item[name] = related[index].get(row[-1], [])
+                    continue
+                value = row[index]
+                if value is not None and convert is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+
+        return data
+
+    def _converter(self, field):
+        """Return a function giving a field's output for a raw value"""
+        if isinstance(field, serializers.RelatedField):
+            return None
+        if isinstance(field, serializers.FileField):
+            return self._url_builder(field)
+        if isinstance(field, (serializers.CharField,
+                              serializers.IntegerField,
+                              serializers.BooleanField)):
+            return None
+        if isinstance(field, serializers.DateTimeField):
+            return self._datetime_converter(field)
+        if isinstance(field, serializers.ListField):
+            child = self._converter(field.child) or (lambda value: value)
+            return lambda values: [
+                None if value is None else child(value) for value in values
+            ]
+
+        return field.to_representation
+
+    def _datetime_converter(self, field):
+        """Return DateTimeField.to_representation with the timezone looked
+        up once instead of for every value"""
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        field_timezone = getattr(field, 'timezone', field.default_timezone())
+        if output_format is None or field_timezone is None \
+                or output_format.lower() != ISO_8601:
+            return field.to_representation
+
+        def convert(value):
+            if not timezone.is_aware(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+
+        return convert
+
+    def _url_builder(self, field):
+        """Return a function turning a stored file name into its url"""
+        storage = Project._meta.get_field(field.source).storage
+        request = self.context.get('request')
+        if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return lambda name: name or None
+        if request is None:
+            return lambda name: storage.url(name) if name else None
+
+        host = request.build_absolute_uri('/')[:-1]
+
+        def build(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            if url.startswith('/') and not url.startswith('//') \
+                    and '/./' not in url and '/../' not in url:
+                return host + url
+            return request.build_absolute_uri(url)
+
+        return build
+
+    def _related_ids(self, name, ids):
+        """Return the related primary keys of each project"""
+        field = Project._meta.get_field(name)
+        column, related_column = field.m2m_column_name(), \
+            field.m2m_reverse_name()
+        related = {}
+        pairs = field.remote_field.through.objects \
+            .filter(**{f'{column}__in': ids}) \
+            .order_by(related_column) \
+            .values_list(column, related_column)
+        for project_id, related_id in pairs:
+            related.setdefault(project_id, []).append(related_id)
+
+        return related
+
+
+class ProjectInstantiateSerializer(serializers.ModelSerializer):
+    """Serializer for creating a project from a software template"""
+    title = serializers.CharField(max_length=255, required=False)
+    tags = serializers.PrimaryKeyRelatedField(
+        many=True,
+        queryset=Tag.objects.all(),
+        required=False
+    )
+
+    class Meta:
+        model = Project
+        fields = ('id', 'title', 'description', 'tags')
+        read_only_fields = ('id',)
+
+
+class ProjectForkSerializer(serializers.Serializer):
+    """Serializer for the options of forking a project"""
+    title = serializers.CharField(max_length=255, required=False)
+
+
+class ProjectRevisionSerializer(NativeDateTimeMixin, TimedSerializerMixin,
+                                serializers.ModelSerializer):
+    """Serializer for stored project data revisions"""
+
+    class Meta:
+        model = ProjectRevision
+        fields = ('number', 'name', 'size', 'created_date')
+        read_only_fields = fields
+
+
+class ProjectImageSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     """Serializer for uploading images to projects"""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: TimedImageField,
+    }
 
     class Meta:
         model = Project
@@ -63,7 +268,8 @@ class ProjectImageSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class ProjectDataSerializer(serializers.ModelSerializer):
+class ProjectDataSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
     """Serializer for uploading files to projects"""
 
     class Meta:
@@ -72,8 +278,59 @@ class ProjectDataSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class SoftwareSerializer(serializers.ModelSerializer):
+class PatchField(serializers.Field):
+    """A patch sent either as an uploaded file or as a plain string"""
+    default_error_messages = {
+        'invalid': 'Expected a patch file or string.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            return ContentFile(data.encode('utf-8'))
+        if not hasattr(data, 'read'):
+            self.fail('invalid')
+        return data
+
+
+class ProjectDataPatchSerializer(TimedSerializerMixin,
+                                 serializers.Serializer):
+    """Serializer for patching a project's data with a unified diff"""
+    base = serializers.RegexField(r'^[0-9a-f]{64}$')
+    hash = serializers.RegexField(r'^[0-9a-f]{64}$', required=False)
+    patch = PatchField()
+
+
+class BlobProbeSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Serializer for probing whether the server already has a blob"""
+    sha256 = serializers.RegexField(r'^[0-9a-f]{64}$')
+    size = serializers.IntegerField(min_value=0)
+
+
+class ProjectBatchGetSerializer(TimedSerializerMixin,
+                                serializers.Serializer):
+    """Serializer for fetching many projects by id"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False
+    )
+
+    def validate_ids(self, value):
+        """Enforce the maximum batch size"""
+        max_size = settings.PROJECT_BATCH_MAX_SIZE
+        if len(value) > max_size:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than {max_size} elements.'
+            )
+        return value
+
+
+class SoftwareSerializer(ExpandMixin, serializers.ModelSerializer):
     """Serializer for software objects"""
+    expandable_fields = {
+        'application': (ApplicationSerializer, False),
+        'tool': (ToolSerializer, False),
+    }
+
     class Meta:
         model = Software
         fields = ('id', 'name', 'tool', 'default_file', 'application', 'description')
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Project, Application, Tag
+
+from project.serializers import ProjectDetailSerializer
+
+
+BATCH_GET_URL = reverse('project:project-batch-get')
+
+
+class ProjectBatchGetApiTests(TestCase):
+    """Test fetching many projects in one request"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'batch@csdt.org',
+            'batch',
+            'batchpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+
+    def _project(self, owner=None, title='Batched'):
+        """Create a project with a tag"""
+        project = Project.objects.create(
+            owner=owner or self.user,
+            title=title,
+            application=self.application
+        )
+        project.tags.add(Tag.objects.create(name=f'{title} tag'))
+        return project
+
+    def test_batch_get(self):
+        """Test that projects come back in request order with a status"""
+        first = self._project(title='First')
+        second = self._project(title='Second')
+        other = self._project(
+            owner=get_user_model().objects.create_user(
+                'other@csdt.org',
+                'other',
+                'otherpass'
+            ),
+            title='Other'
+        )
+        ids = [second.id, 999999, first.id, other.id]
+
+        with self.assertNumQueries(2):
+            res = self.client.post(BATCH_GET_URL, {'ids': ids},
+                                   format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual([result['id'] for result in results], ids)
+        self.assertEqual(
+            [result['status'] for result in results],
+            [200, 404, 200, 404]
+        )
+        self.assertEqual(results[0]['project'],
+                         ProjectDetailSerializer(second).data)
+        self.assertNotIn('project', results[3])
+
+    def test_batch_get_invalid(self):
+        """Test that ids must be a non empty list of integers"""
+        for payload in ({}, {'ids': []}, {'ids': ['a']}):
+            res = self.client.post(BATCH_GET_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PROJECT_BATCH_MAX_SIZE=2)
+    def test_batch_get_max_size(self):
+        """Test that batches over the maximum size are refused"""
+        res = self.client.post(BATCH_GET_URL, {'ids': [1, 2, 3]},
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', res.data)
+
+    def test_batch_get_requires_auth(self):
+        """Test that authentication is required"""
+        res = APIClient().post(BATCH_GET_URL, {'ids': [1]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,263 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Project, ProjectChange, Application, Tag
+
+
+PROJECTS_BULK_URL = reverse('project:project-bulk')
+TAGS_BULK_URL = reverse('project:tag-bulk')
+
+
+class ProjectBulkApiTests(TestCase):
+    """Test bulk project writes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bulk@csdt.org',
+            'bulk',
+            'bulkpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+        self.tags = [Tag.objects.create(name=name)
+                     for name in ('Art', 'Math')]
+
+    def _project(self, title='Bulk'):
+        """Create a project"""
+        return Project.objects.create(
+            owner=self.user,
+            title=title,
+            application=self.application
+        )
+
+    def test_bulk_create(self):
+        """Test creating many projects with their tags"""
+        items = [
+            {
+                'title': f'Project {i}',
+                'application': self.application.id,
+                'tags': [tag.id for tag in self.tags[:i + 1]],
+            } for i in range(2)
+        ]
+
+        res = self.client.post(PROJECTS_BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([result['status'] for result in res.data],
+                         [201, 201])
+        for item, result in zip(items, res.data):
+            project = Project.objects.get(id=result['project']['id'])
+            self.assertEqual(project.title, item['title'])
+            self.assertEqual(project.owner, self.user)
+            self.assertEqual(
+                sorted(project.tags.values_list('id', flat=True)),
+                item['tags']
+            )
+            self.assertEqual(result['project']['tags'], item['tags'])
+        self.assertEqual(
+            ProjectChange.objects.filter(
+                kind=ProjectChange.Kind.CREATED
+            ).count(),
+            2
+        )
+
+    def test_bulk_create_queries(self):
+        """Test that bulk creates don't query per item"""
+        def create(count):
+            items = [
+                {'title': f'Project {i}', 'application': self.application.id,
+                 'tags': [tag.id for tag in self.tags]}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(PROJECTS_BULK_URL, items, format='json')
+            return len(queries)
+
+        self.assertEqual(create(2), create(10))
+
+    def test_bulk_create_validates_all(self):
+        """Test that one invalid item stops the whole batch"""
+        items = [
+            {'title': 'Valid', 'application': self.application.id,
+             'tags': []},
+            {'title': 'Invalid'},
+        ]
+
+        res = self.client.post(PROJECTS_BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('application', res.data[1])
+        self.assertFalse(Project.objects.exists())
+
+    def test_bulk_body_must_be_list(self):
+        """Test that bulk requests need a non-empty list"""
+        for body in ({'title': 'Single'}, []):
+            res = self.client.post(PROJECTS_BULK_URL, body, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        """Test updating many projects and their tags"""
+        first, second = self._project('First'), self._project('Second')
+        first.tags.add(self.tags[0])
+        items = [
+            {'id': first.id, 'title': 'First updated', 'tags': []},
+            {'id': second.id, 'tags': [self.tags[1].id]},
+        ]
+
+        res = self.client.patch(PROJECTS_BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.title, 'First updated')
+        self.assertEqual(first.tags.count(), 0)
+        self.assertEqual(list(second.tags.all()), [self.tags[1]])
+        self.assertEqual(second.title, 'Second')
+        self.assertEqual(len(first.modified_date_history), 1)
+        self.assertGreater(first.modified_date, first.created_date)
+        self.assertEqual(res.data[0]['project']['title'], 'First updated')
+
+    def test_bulk_update_other_users_project(self):
+        """Test that projects of other users can't be bulk updated"""
+        other = Project.objects.create(
+            owner=get_user_model().objects.create_user(
+                'other@csdt.org',
+                'other',
+                'otherpass'
+            ),
+            title='Other',
+            application=self.application
+        )
+        mine = self._project()
+        items = [
+            {'id': mine.id, 'title': 'Mine updated'},
+            {'id': other.id, 'title': 'Taken'},
+        ]
+
+        res = self.client.patch(PROJECTS_BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[1])
+        mine.refresh_from_db()
+        self.assertEqual(mine.title, 'Bulk')
+
+    def test_bulk_delete(self):
+        """Test deleting many projects"""
+        projects = [self._project(f'Project {i}') for i in range(3)]
+        ids = [project.id for project in projects[:2]]
+
+        res = self.client.delete(PROJECTS_BULK_URL, ids, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Project.objects.all()), [projects[2]])
+        self.assertEqual(
+            sorted(ProjectChange.objects.filter(
+                kind=ProjectChange.Kind.DELETED
+            ).values_list('project_id', flat=True)),
+            ids
+        )
+
+    def test_bulk_bool_ids(self):
+        """Test that true isn't taken as the id 1"""
+        project = Project.objects.create(
+            id=1,
+            owner=self.user,
+            title='One',
+            application=self.application
+        )
+        tag = Tag.objects.filter(pk=1).first() or \
+            Tag.objects.create(pk=1, name='One')
+
+        res = self.client.post(PROJECTS_BULK_URL, [{
+            'title': 'Tagged',
+            'application': self.application.id,
+            'tags': [True],
+        }], format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data[0])
+
+        res = self.client.patch(PROJECTS_BULK_URL, [
+            {'id': True, 'title': 'Renamed'},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.delete(PROJECTS_BULK_URL, [True], format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        project.refresh_from_db()
+        self.assertEqual(project.title, 'One')
+        self.assertFalse(tag.project_set.exists())
+
+    def test_bulk_delete_missing(self):
+        """Test that a missing id stops the whole delete"""
+        project = self._project()
+
+        res = self.client.delete(PROJECTS_BULK_URL, [project.id, 999999],
+                                 format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Project.objects.filter(id=project.id).exists())
+
+
+class TagBulkApiTests(TestCase):
+    """Test bulk tag creation"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bulkstaff@csdt.org',
+            'bulkstaff',
+            'bulkpass'
+        )
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        """Test creating many tags at once"""
+        res = self.client.post(TAGS_BULK_URL,
+                               [{'name': 'Art'}, {'name': 'Math'}],
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([result['tag']['name'] for result in res.data],
+                         ['Art', 'Math'])
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_bulk_create_duplicate_tags(self):
+        """Test that duplicate names are refused before any write"""
+        Tag.objects.create(name='Art')
+
+        res = self.client.post(
+            TAGS_BULK_URL,
+            [{'name': 'Art'}, {'name': 'Math'}, {'name': 'Math'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data[0])
+        self.assertEqual(res.data[1], {})
+        self.assertIn('name', res.data[2])
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_bulk_create_tags_staff_only(self):
+        """Test that only staff can bulk create tags"""
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.client.post(TAGS_BULK_URL, [{'name': 'Art'}],
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,200 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Project, ProjectChange, Application
+
+
+PROJECTS_URL = reverse('project:project-list')
+CHANGES_URL = reverse('project:project-changes')
+
+
+def detail_url(project_id):
+    """Return project detail URL"""
+    return reverse('project:project-detail', args=[project_id])
+
+
+class PublicChangesApiTests(TestCase):
+    """Test unauthenticated change feed access"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test that authentication is required"""
+        res = self.client.get(CHANGES_URL, {'since': 0})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateChangesApiTests(TestCase):
+    """Test the incremental project sync feed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'changes@csdt.org',
+            'changes',
+            'changespass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+
+    def _create(self, title):
+        """Create a project through the API and return its id"""
+        res = self.client.post(PROJECTS_URL, {
+            'title': title,
+            'application': self.application.pk
+        })
+        return res.data['id']
+
+    def test_initial_cursor(self):
+        """Test that omitting since returns the current cursor"""
+        self._create('First')
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['cursor'],
+            ProjectChange.objects.latest('seq').seq
+        )
+
+    def test_changes_since_cursor(self):
+        """Test that only changes after the cursor are returned"""
+        first = self._create('First')
+        cursor = self.client.get(CHANGES_URL).data['cursor']
+        second = self._create('Second')
+        self.client.patch(detail_url(first), {'title': 'Renamed'})
+
+        res = self.client.get(CHANGES_URL, {'since': cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [project['id'] for project in res.data['changed']],
+            [first, second]
+        )
+        self.assertEqual(res.data['changed'][0]['title'], 'Renamed')
+        self.assertEqual(res.data['deleted'], [])
+        self.assertFalse(res.data['more'])
+
+        res = self.client.get(CHANGES_URL, {'since': res.data['cursor']})
+        self.assertEqual(res.data['changed'], [])
+
+    def test_deleted_tombstone(self):
+        """Test that deletes are reported as tombstones"""
+        cursor = self.client.get(CHANGES_URL).data['cursor']
+        project_id = self._create('Short lived')
+        self.client.delete(detail_url(project_id))
+
+        res = self.client.get(CHANGES_URL, {'since': cursor})
+
+        self.assertEqual(res.data['changed'], [])
+        self.assertEqual(res.data['deleted'], [project_id])
+        self.assertFalse(Project.objects.filter(id=project_id).exists())
+
+    def test_changes_limited_to_user(self):
+        """Test that other users' changes are not in the feed"""
+        other = get_user_model().objects.create_user(
+            'other@csdt.org',
+            'other',
+            'otherpass'
+        )
+        project = Project.objects.create(
+            owner=other,
+            title='Not mine',
+            application=self.application
+        )
+        ProjectChange.objects.record(project, ProjectChange.Kind.CREATED)
+
+        res = self.client.get(CHANGES_URL, {'since': 0})
+
+        self.assertEqual(res.data['changed'], [])
+
+    @override_settings(PROJECT_CHANGES_PAGE_SIZE=2)
+    def test_changes_paginated(self):
+        """Test that a full page signals more changes"""
+        for title in ('A', 'B', 'C'):
+            self._create(title)
+
+        res = self.client.get(CHANGES_URL, {'since': 0})
+        self.assertTrue(res.data['more'])
+        self.assertEqual(len(res.data['changed']), 2)
+
+        res = self.client.get(CHANGES_URL, {'since': res.data['cursor']})
+        self.assertFalse(res.data['more'])
+        self.assertEqual(len(res.data['changed']), 1)
+
+    def test_compacted_cursor_gone(self):
+        """Test that a cursor behind a compaction marker must resync"""
+        ProjectChange.objects.create(
+            owner=self.user,
+            kind=ProjectChange.Kind.COMPACTED
+        )
+
+        res = self.client.get(CHANGES_URL, {'since': 0})
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        res = self.client.get(CHANGES_URL, {'since': 'yesterday'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ChangeLogOrderTests(TransactionTestCase):
+    """Test that an owner's changes commit in seq order"""
+
+    def test_record_waits_for_open_transaction(self):
+        """Test that a change can't be logged behind an uncommitted one"""
+        user = get_user_model().objects.create_user(
+            'order@csdt.org',
+            'order',
+            'orderpass'
+        )
+        project = Project.objects.create(
+            owner=user,
+            title='Ordered',
+            application=Application.objects.create(
+                name='CSnap',
+                link='csnap/index.html'
+            )
+        )
+        recorded = threading.Event()
+
+        def record_later():
+            recorded.wait()
+            ProjectChange.objects.record(project, ProjectChange.Kind.UPDATED)
+            connection.close()
+
+        thread = threading.Thread(target=record_later)
+        thread.start()
+        try:
+            with transaction.atomic():
+                first = ProjectChange.objects.record(
+                    project,
+                    ProjectChange.Kind.CREATED
+                )
+                recorded.set()
+                thread.join(0.5)
+                self.assertTrue(thread.is_alive())
+        finally:
+            recorded.set()
+            thread.join()
+
+        self.assertEqual(
+            list(ProjectChange.objects.order_by('seq')
+                 .values_list('kind', flat=True)),
+            [ProjectChange.Kind.CREATED, ProjectChange.Kind.UPDATED]
+        )
+        self.assertEqual(ProjectChange.objects.earliest('seq'), first)
@@ -0,0 +1,159 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Project, Application, Software, Tag, Tool
+
+
+PROJECTS_URL = reverse('project:project-list')
+SOFTWARES_URL = reverse('project:software-list')
+PROJECTS_BULK_URL = reverse('project:project-bulk')
+
+
+def detail_url(project_id):
+    """Return project detail URL"""
+    return reverse('project:project-detail', args=[project_id])
+
+
+class ExpandApiTests(TestCase):
+    """Test embedding related objects with ?expand="""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'expand@csdt.org',
+            'expand',
+            'expandpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+        self.tool = Tool.objects.create(name='Cornrow Curves')
+        self.tags = [Tag.objects.create(name=name)
+                     for name in ('Art', 'Math')]
+
+    def _project(self, title='Expanded'):
+        """Create a project with a tool and tags"""
+        project = Project.objects.create(
+            owner=self.user,
+            title=title,
+            application=self.application,
+            tool=self.tool
+        )
+        project.tags.add(*self.tags)
+        return project
+
+    def _queries(self, url, params):
+        """Return the number of queries a GET makes"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_expand_project_list(self):
+        """Test that relations are embedded in the project list"""
+        self._project()
+        expand = {'expand': 'application,tool,tags,owner'}
+
+        res = self.client.get(PROJECTS_URL, expand)
+
+        project = res.data[0]
+        self.assertEqual(project['application']['name'], 'CSnap')
+        self.assertEqual(project['tool'],
+                         {'id': self.tool.id, 'name': 'Cornrow Curves'})
+        self.assertEqual(
+            sorted(tag['name'] for tag in project['tags']),
+            ['Art', 'Math']
+        )
+        self.assertEqual(project['owner']['username'], 'expand')
+        self.assertNotIn('email', project['owner'])
+
+    def test_expand_no_per_row_queries(self):
+        """Test that expanding doesn't add a query per project"""
+        expand = {'expand': 'application,tool,tags,owner'}
+        self._project()
+        one = self._queries(PROJECTS_URL, expand)
+
+        for i in range(5):
+            self._project(title=f'Project {i}')
+        many = self._queries(PROJECTS_URL, expand)
+
+        self.assertEqual(one, many)
+
+    def test_expand_project_detail(self):
+        """Test that relations are embedded in a project's details"""
+        project = self._project()
+
+        res = self.client.get(detail_url(project.id), {'expand': 'tool'})
+
+        self.assertEqual(res.data['tool']['name'], 'Cornrow Curves')
+        self.assertEqual(res.data['application'], self.application.id)
+
+    def test_unknown_expansion_ignored(self):
+        """Test that unknown or absent expansions keep ids"""
+        self._project()
+
+        res = self.client.get(PROJECTS_URL, {'expand': 'forks,secrets'})
+
+        self.assertEqual(res.data[0]['application'], self.application.id)
+        self.assertNotIn('owner', res.data[0])
+
+    def test_expand_software(self):
+        """Test that software relations are embedded without extra
+        queries per row"""
+        Software.objects.create(name='CC Grapher', tool=self.tool,
+                                application=self.application)
+        expand = {'expand': 'application,tool'}
+        one = self._queries(SOFTWARES_URL, expand)
+        Software.objects.create(name='CC Animator', tool=self.tool,
+                                application=self.application)
+
+        res = self.client.get(SOFTWARES_URL, expand)
+
+        self.assertEqual(self._queries(SOFTWARES_URL, expand), one)
+        self.assertEqual(res.data[0]['tool']['name'], 'Cornrow Curves')
+        self.assertEqual(res.data[0]['application']['name'], 'CSnap')
+
+    def test_expand_ignored_on_write(self):
+        """Test that writes with ?expand= keep the relations sent"""
+        res = self.client.post(
+            f'{PROJECTS_URL}?expand=application,tags',
+            {
+                'title': 'Written',
+                'application': self.application.id,
+                'tags': [self.tags[0].id],
+            },
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        project = Project.objects.get(id=res.data['id'])
+        self.assertEqual(project.application, self.application)
+        self.assertEqual(list(project.tags.all()), [self.tags[0]])
+
+        res = self.client.patch(
+            f'{detail_url(project.id)}?expand=tags',
+            {'tags': [self.tags[1].id]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(project.tags.all()), [self.tags[1]])
+
+        res = self.client.patch(
+            f'{PROJECTS_BULK_URL}?expand=tags',
+            [{'id': project.id, 'tags': [tag.id for tag in self.tags]}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(project.tags.count(), 2)
+        self.assertEqual(res.data[0]['project']['tags'],
+                         [tag.id for tag in self.tags])
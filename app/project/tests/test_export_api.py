@@ -0,0 +1,169 @@
+import io
+import json
+import zipfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Project, Application
+from project import export
+
+
+EXPORT_URL = reverse('project:project-export')
+
+
+class ProjectExportApiTests(TestCase):
+    """Test streaming a ZIP export of a user's projects"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'export@csdt.org',
+            'export',
+            'exportpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+
+    def tearDown(self):
+        for project in Project.objects.all():
+            if project.data:
+                project.data.delete()
+            if project.thumbnail:
+                project.thumbnail.delete()
+
+    def _project(self, title, owner=None):
+        """Create a project for the given owner, the user by default"""
+        return Project.objects.create(
+            owner=owner or self.user,
+            title=title,
+            application=self.application
+        )
+
+    def _export(self):
+        """Request the export and open the streamed archive"""
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        content = b''.join(res.streaming_content)
+        return res, zipfile.ZipFile(io.BytesIO(content))
+
+    def test_export_projects_and_files(self):
+        """Test that the archive holds the metadata and every file"""
+        project = self._project('Exported')
+        project.data.save('data.xml', ContentFile(b'<project/>'))
+        project.thumbnail.save('thumb.png', ContentFile(b'\x89PNG'))
+
+        res, archive = self._export()
+
+        self.assertEqual(res['Content-Type'], 'application/zip')
+        self.assertIn('attachment', res['Content-Disposition'])
+        self.assertIsNone(archive.testzip())
+        items = json.loads(archive.read('projects.json'))
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]['title'], 'Exported')
+        files = items[0]['files']
+        self.assertEqual(archive.read(files['data']), b'<project/>')
+        self.assertEqual(archive.read(files['thumbnail']), b'\x89PNG')
+        self.assertEqual(
+            archive.getinfo(files['thumbnail']).compress_type,
+            zipfile.ZIP_STORED
+        )
+
+    @override_settings(PROJECT_EXPORT_CHUNK_SIZE=2)
+    def test_export_in_chunks(self):
+        """Test that chunked reads export each project exactly once"""
+        other = get_user_model().objects.create_user(
+            'other@csdt.org',
+            'other',
+            'otherpass'
+        )
+        self._project('Not mine', owner=other)
+        titles = [f'Project {i}' for i in range(5)]
+        for title in titles:
+            self._project(title)
+
+        _, archive = self._export()
+
+        items = json.loads(archive.read('projects.json'))
+        self.assertEqual([item['title'] for item in items], titles)
+        self.assertEqual(items[0]['files'], {'data': None, 'thumbnail': None})
+
+    def test_export_missing_file(self):
+        """Test that files gone from storage are listed, not fatal"""
+        project = self._project('Broken')
+        Project.objects.filter(id=project.id).update(
+            data='uploads/project/gone.xml'
+        )
+
+        _, archive = self._export()
+
+        items = json.loads(archive.read('projects.json'))
+        path = items[0]['files']['data']
+        self.assertNotIn(path, archive.namelist())
+        self.assertEqual(json.loads(archive.read('missing.json')), [path])
+
+    def test_export_project_deleted_meanwhile(self):
+        """Test that files stay with their project when one is deleted
+        between reading the file names and the metadata"""
+        deleted = self._project('Deleted')
+        kept = self._project('Kept')
+        kept.data.save('data.xml', ContentFile(b'<kept/>'))
+        chunks = export._chunks
+
+        def delete_after_first(queryset, chunk_size):
+            for rows in chunks(queryset, chunk_size):
+                Project.objects.filter(pk=deleted.pk).delete()
+                yield rows
+
+        with mock.patch.object(export, '_chunks', delete_after_first):
+            _, archive = self._export()
+
+        items = json.loads(archive.read('projects.json'))
+        self.assertEqual([item['id'] for item in items], [kept.id])
+        self.assertEqual(archive.read(items[0]['files']['data']), b'<kept/>')
+
+    def test_export_file_changed_meanwhile(self):
+        """Test that a file replaced during the export is the one both
+        the metadata and the archive hold"""
+        project = self._project('Autosaved')
+        project.data.save('data.xml', ContentFile(b'<old/>'))
+        old_name = project.data.name
+        self.addCleanup(project.data.storage.delete, old_name)
+        chunks = export._chunks
+        changed = []
+
+        def change_once(queryset, chunk_size):
+            for rows in chunks(queryset, chunk_size):
+                if not changed:
+                    changed.append(True)
+                    project.data.save('data.xml', ContentFile(b'<new/>'))
+                yield rows
+
+        with mock.patch.object(export, '_chunks', change_once):
+            _, archive = self._export()
+
+        items = json.loads(archive.read('projects.json'))
+        self.assertEqual(archive.read(items[0]['files']['data']), b'<old/>')
+        self.assertNotIn('missing.json', archive.namelist())
+
+    def test_export_empty(self):
+        """Test exporting a user without projects"""
+        _, archive = self._export()
+
+        self.assertEqual(json.loads(archive.read('projects.json')), [])
+
+    def test_export_requires_login(self):
+        """Test that anonymous users can't export"""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,176 @@
+import difflib
+import hashlib
+import io
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Project, Application
+
+from project.patch import PatchError, apply_unified_diff
+
+
+def patch_data_url(project_id):
+    """Return URL for patching a project's data"""
+    return reverse('project:project-patch-data', args=[project_id])
+
+
+def make_patch(old, new):
+    """Return a unified diff between two byte strings"""
+    return ''.join(difflib.unified_diff(
+        old.decode().splitlines(keepends=True),
+        new.decode().splitlines(keepends=True),
+        'a/data.xml',
+        'b/data.xml'
+    )).encode()
+
+
+def apply(base, patch):
+    """Apply a patch to bytes and return the result"""
+    out = io.BytesIO()
+    apply_unified_diff(io.BytesIO(base), io.BytesIO(patch), out)
+    return out.getvalue()
+
+
+class UnifiedDiffTests(TestCase):
+
+    def setUp(self):
+        with open(settings.BASE_DIR / 'samples/data.xml', 'rb') as f:
+            self.base = f.read()
+
+    def test_apply_property_change(self):
+        """Test applying a patch that changes one property"""
+        new = self.base.replace(
+            b'<Property name="scale">50.0</Property>',
+            b'<Property name="scale">75.0</Property>'
+        )
+        patch = make_patch(self.base, new)
+
+        self.assertLess(len(patch), len(new) / 5)
+        self.assertEqual(apply(self.base, patch), new)
+
+    def test_apply_multiple_hunks(self):
+        """Test applying a patch with insertions and deletions"""
+        lines = self.base.splitlines(keepends=True)
+        new = b''.join(
+            [b'<!-- autosave -->\n'] + lines[:20] + lines[25:] + [b'\n']
+        )
+
+        self.assertEqual(apply(self.base, make_patch(self.base, new)), new)
+
+    def test_apply_missing_newline(self):
+        """Test a patch touching a last line without a newline"""
+        patch = (
+            b'--- a\n+++ b\n@@ -1,2 +1,2 @@\n a\n-b\n'
+            b'\\ No newline at end of file\n+c\n'
+            b'\\ No newline at end of file\n'
+        )
+
+        self.assertEqual(apply(b'a\nb', patch), b'a\nc')
+
+    def test_mismatched_base(self):
+        """Test that a patch for another base is rejected"""
+        patch = make_patch(b'a\nb\nc\n', b'a\nB\nc\n')
+
+        with self.assertRaises(PatchError):
+            apply(b'a\nx\nc\n', patch)
+
+    def test_truncated_patch(self):
+        """Test that a hunk shorter than its header is rejected"""
+        with self.assertRaises(PatchError):
+            apply(b'a\nb\n', b'@@ -1,2 +1,2 @@\n a\n')
+
+
+class ProjectDataPatchApiTests(TestCase):
+    """Test patching project data through the API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'patch@csdt.org',
+            'patch',
+            'patchpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+        self.project = Project.objects.create(
+            owner=self.user,
+            title='Patched',
+            application=self.application
+        )
+        self.base = b'<pCSDT>\n<Property name="scale">50.0</Property>\n' \
+                    b'</pCSDT>\n'
+        self.project.data.save('data.xml', ContentFile(self.base))
+        self.new = self.base.replace(b'50.0', b'75.0')
+
+    def tearDown(self):
+        self.project.refresh_from_db()
+        self.project.data.delete()
+
+    def test_patch_data(self):
+        """Test that a patch is applied and stored"""
+        old_name = self.project.data.name
+        payload = {
+            'base': hashlib.sha256(self.base).hexdigest(),
+            'hash': hashlib.sha256(self.new).hexdigest(),
+            'patch': make_patch(self.base, self.new).decode(),
+        }
+
+        res = self.client.post(patch_data_url(self.project.id), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['hash'], payload['hash'])
+        self.project.refresh_from_db()
+        self.assertNotEqual(self.project.data.name, old_name)
+        with self.project.data.open('rb') as data:
+            self.assertEqual(data.read(), self.new)
+
+    def test_patch_stale_base(self):
+        """Test that a patch against an old version is refused"""
+        payload = {
+            'base': hashlib.sha256(b'something else').hexdigest(),
+            'patch': make_patch(self.base, self.new).decode(),
+        }
+
+        res = self.client.post(patch_data_url(self.project.id), payload)
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_412_PRECONDITION_FAILED
+        )
+
+    def test_patch_result_mismatch(self):
+        """Test that nothing is stored if the result hash differs"""
+        old_name = self.project.data.name
+        payload = {
+            'base': hashlib.sha256(self.base).hexdigest(),
+            'hash': hashlib.sha256(b'not the result').hexdigest(),
+            'patch': make_patch(self.base, self.new).decode(),
+        }
+
+        res = self.client.post(patch_data_url(self.project.id), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.data.name, old_name)
+
+    def test_patch_does_not_apply(self):
+        """Test that a patch that doesn't apply is rejected"""
+        payload = {
+            'base': hashlib.sha256(self.base).hexdigest(),
+            'patch': make_patch(b'<other/>\n', b'<changed/>\n').decode(),
+        }
+
+        res = self.client.post(patch_data_url(self.project.id), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('patch', res.data)
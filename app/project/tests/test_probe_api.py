@@ -0,0 +1,154 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Project, Application, BlobDigest
+
+
+def probe_data_url(project_id):
+    """Return URL for probing project data by digest"""
+    return reverse('project:project-probe-data', args=[project_id])
+
+
+def probe_image_url(project_id):
+    """Return URL for probing a project thumbnail by digest"""
+    return reverse('project:project-probe-image', args=[project_id])
+
+
+def data_upload_url(project_id):
+    """Return URL for project data upload"""
+    return reverse('project:project-upload-data', args=[project_id])
+
+
+class ProjectProbeApiTests(TestCase):
+    """Test skipping uploads of blobs the server already has"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'probe@csdt.org',
+            'probe',
+            'probepass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = Application.objects.create(
+            name='CSnap',
+            link='csnap/index.html'
+        )
+        self.project = Project.objects.create(
+            owner=self.user,
+            title='Probed',
+            application=self.application
+        )
+        with open(settings.BASE_DIR / 'samples/data.xml', 'rb') as f:
+            self.content = f.read()
+        self.probe = {
+            'sha256': hashlib.sha256(self.content).hexdigest(),
+            'size': len(self.content),
+        }
+
+    def tearDown(self):
+        for project in Project.objects.all():
+            if project.data:
+                project.data.delete()
+
+    def _upload(self, project, **extra):
+        """Upload the sample data to a project"""
+        upload = SimpleUploadedFile('data.xml', self.content)
+        return self.client.post(
+            data_upload_url(project.id),
+            {'data': upload, **extra}
+        )
+
+    def test_upload_indexes_digest(self):
+        """Test that uploads record their content digest"""
+        self._upload(self.project)
+
+        self.project.refresh_from_db()
+        digest = BlobDigest.objects.get(sha256=self.probe['sha256'])
+        self.assertEqual(digest.name, self.project.data.name)
+        self.assertEqual(digest.size, len(self.content))
+        self.assertEqual(digest.kind, BlobDigest.Kind.DATA)
+
+    def test_probe_attaches_existing_blob(self):
+        """Test that a known blob is attached without an upload"""
+        self._upload(self.project)
+        self.project.refresh_from_db()
+        other = Project.objects.create(
+            owner=self.user,
+            title='Same content',
+            application=self.application
+        )
+
+        res = self.client.post(probe_data_url(other.id), self.probe)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['attached'])
+        other.refresh_from_db()
+        self.assertEqual(other.data.name, self.project.data.name)
+
+    def test_probe_unknown_blob_ticket(self):
+        """Test that an unknown blob gets a ticket the upload must match"""
+        res = self.client.post(probe_data_url(self.project.id), self.probe)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data['attached'])
+        res = self._upload(self.project, ticket=res.data['ticket'])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_upload_not_matching_ticket(self):
+        """Test that an upload differing from its ticket is rejected"""
+        probe = {'sha256': 'a' * 64, 'size': len(self.content)}
+        res = self.client.post(probe_data_url(self.project.id), probe)
+
+        res = self._upload(self.project, ticket=res.data['ticket'])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.data)
+
+    def test_probe_wrong_size(self):
+        """Test that the size has to match along with the digest"""
+        self._upload(self.project)
+        probe = {**self.probe, 'size': self.probe['size'] + 1}
+
+        res = self.client.post(probe_data_url(self.project.id), probe)
+
+        self.assertFalse(res.data['attached'])
+
+    def test_probe_image_missing_file(self):
+        """Test that a digest whose file is gone isn't attached"""
+        BlobDigest.objects.index(
+            'uploads/project/gone.png',
+            'b' * 64,
+            10,
+            BlobDigest.Kind.IMAGE
+        )
+
+        res = self.client.post(
+            probe_image_url(self.project.id),
+            {'sha256': 'b' * 64, 'size': 10}
+        )
+
+        self.assertFalse(res.data['attached'])
+        self.assertIn('ticket', res.data)
+
+    def test_probe_image_with_data_digest(self):
+        """Test that project data isn't attached as a thumbnail"""
+        self._upload(self.project)
+        self.project.refresh_from_db()
+
+        res = self.client.post(probe_image_url(self.project.id), self.probe)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data['attached'])
+        self.assertIn('ticket', res.data)
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.thumbnail)
@@ -1,9 +1,12 @@
 import tempfile
 import os
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
 from django.conf import settings
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -12,7 +15,8 @@ from PIL import Image
 
 from core.models import Project, Application, Software, Tag
 
-from project.serializers import ProjectSerializer, ProjectDetailSerializer
+from project.serializers import ProjectSerializer, ProjectDetailSerializer, \
+    ProjectValuesSerializer
 
 
 PROJECTS_URL = reverse('project:project-list')
@@ -33,6 +37,18 @@ def data_upload_url(project_id):
     return reverse('project:project-upload-data', args=[project_id])
 
 
+def fork_url(project_id):
+    """Return URL for forking a project"""
+    return reverse('project:project-fork', args=[project_id])
+
+
+def revisions_url(project_id, number=None):
+    """Return URL for a project's revisions, or for one revision"""
+    if number is None:
+        return reverse('project:project-revisions', args=[project_id])
+    return reverse('project:project-revision', args=[project_id, number])
+
+
 def sample_tag(name='High School'):
     """Create and return a sample tag"""
     return Tag.objects.create(name=name)
@@ -226,6 +242,28 @@ class PrivateProjectApiTests(TestCase):
         self.assertEqual(len(project.modified_data_history), 1)
         self.assertEqual(len(project.modified_thumbnail_history), 1)
 
+    def test_update_records_revision(self):
+        """Test that replaced data is kept as a readable revision"""
+        project = sample_project(user=self.user, application=self.application)
+        project_file = settings.BASE_DIR / 'samples/data.xml'
+        url = detail_url(project.id)
+        with open(project_file, 'rb') as tdf:
+            self.client.patch(url, {'data': tdf})
+            tdf.seek(0)
+            original = tdf.read()
+        self.client.patch(url, {'title': 'Renamed'})
+
+        res = self.client.get(revisions_url(project.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+        res = self.client.get(revisions_url(project.id, 0))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, original)
+
+        res = self.client.get(revisions_url(project.id, 1))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class ProjectImageUploadTests(TestCase):
     """Tests with image uploads for projects"""
@@ -380,3 +418,220 @@ class ProjectDataUploadTests(TestCase):
         )
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProjectForkTests(TestCase):
+    """Test forking projects"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'forkTest',
+            'forkTest@csdt.org',
+            'forkpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = sample_application(name='Fork')
+        self.project = sample_project(
+            user=self.user,
+            application=self.application,
+            description='Original',
+            data='uploads/project/original.xml',
+            thumbnail='uploads/project/original.png'
+        )
+        self.tag = sample_tag(name='Remix')
+        self.project.tags.add(self.tag)
+
+    def test_fork_project(self):
+        """Test that a fork shares files and copies tags"""
+        res = self.client.post(fork_url(self.project.id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        fork = Project.objects.get(id=res.data['id'])
+        self.assertEqual(fork.forked_from, self.project)
+        self.assertEqual(fork.owner, self.user)
+        self.assertEqual(fork.title, self.project.title)
+        self.assertEqual(fork.description, self.project.description)
+        self.assertEqual(fork.data.name, self.project.data.name)
+        self.assertEqual(fork.thumbnail.name, self.project.thumbnail.name)
+        self.assertEqual(list(fork.tags.all()), [self.tag])
+        self.assertEqual(res.data['forked_from'], self.project.id)
+
+    def test_fork_with_title(self):
+        """Test naming a fork"""
+        res = self.client.post(fork_url(self.project.id), {'title': 'Mine'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['title'], 'Mine')
+
+    def test_fork_invalid_title(self):
+        """Test that fork titles are validated"""
+        for title in ('x' * 256, ['Mine'], ''):
+            res = self.client.post(
+                fork_url(self.project.id),
+                {'title': title},
+                format='json'
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(
+            Project.objects.filter(forked_from=self.project).exists()
+        )
+
+    def test_filter_forks(self):
+        """Test listing the forks of a project"""
+        self.client.post(fork_url(self.project.id))
+        self.client.post(fork_url(self.project.id))
+        sample_project(user=self.user, application=self.application)
+
+        res = self.client.get(PROJECTS_URL, {'forked_from': self.project.id})
+
+        self.assertEqual(len(res.data), 2)
+        for project in res.data:
+            self.assertEqual(project['forked_from'], self.project.id)
+
+    def test_filter_forks_invalid(self):
+        """Test that a malformed forked_from filter is rejected"""
+        res = self.client.get(PROJECTS_URL, {'forked_from': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fork_other_users_project(self):
+        """Test that other users' projects cannot be forked"""
+        other = get_user_model().objects.create_user(
+            'other',
+            'other@csdt.org',
+            'otherpass'
+        )
+        project = sample_project(user=other, application=self.application)
+
+        res = self.client.post(fork_url(project.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProjectAutosaveTests(TestCase):
+    """Test coalescing of autosave history"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'autosaveTest',
+            'autosaveTest@csdt.org',
+            'autosavepass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = sample_application(name='Autosave')
+        self.project = sample_project(
+            user=self.user,
+            application=self.application
+        )
+
+    def _autosave(self, title, **params):
+        """Autosave a new title and return the response"""
+        query = '&'.join(f'{k}={v}' for k, v in
+                         {'autosave': 1, **params}.items())
+        return self.client.patch(
+            f'{detail_url(self.project.id)}?{query}',
+            {'title': title}
+        )
+
+    def test_autosaves_coalesced(self):
+        """Test that autosaves in one window add one history entry"""
+        for i in range(5):
+            res = self._autosave(f'Draft {i}')
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.title, 'Draft 4')
+        self.assertEqual(len(self.project.modified_date_history), 1)
+
+    def test_autosave_window_boundary(self):
+        """Test that an autosave after the window adds an entry"""
+        self._autosave('First')
+        Project.objects.filter(id=self.project.id).update(
+            checkpoint_date=timezone.now() - timedelta(
+                seconds=settings.PROJECT_AUTOSAVE_WINDOW
+            )
+        )
+        self._autosave('Second')
+
+        self.project.refresh_from_db()
+        self.assertEqual(len(self.project.modified_date_history), 2)
+
+    def test_autosave_explicit_checkpoint(self):
+        """Test that a checkpoint always adds an entry"""
+        self._autosave('First')
+        self._autosave('Second', checkpoint=1)
+
+        self.project.refresh_from_db()
+        self.assertEqual(len(self.project.modified_date_history), 2)
+
+    def test_regular_saves_not_coalesced(self):
+        """Test that saves without autosave keep full history"""
+        url = detail_url(self.project.id)
+        self.client.patch(url, {'title': 'First'})
+        self.client.patch(url, {'title': 'Second'})
+
+        self.project.refresh_from_db()
+        self.assertEqual(len(self.project.modified_date_history), 2)
+
+    def test_upload_data_autosave_checkpoint(self):
+        """Test that data autosaves checkpoint once per window"""
+        url = f'{data_upload_url(self.project.id)}?autosave=1'
+        project_file = settings.BASE_DIR / 'samples/data.xml'
+        names = []
+        for _ in range(3):
+            with open(project_file, encoding='utf-8') as tdf:
+                res = self.client.post(url, {'data': tdf})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.project.refresh_from_db()
+            names.append(self.project.data.name)
+
+        self.assertEqual(len(self.project.modified_data_history), 1)
+        self.assertTrue(os.path.exists(self.project.data.path))
+        for name in names:
+            self.project.data.storage.delete(name)
+
+
+class ProjectValuesSerializerTests(TestCase):
+    """Tests for the values based project list serializer"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'valuesTest',
+            'valuesTest@csdt.org',
+            'valuespass'
+        )
+        self.application = sample_application()
+
+    def test_matches_project_serializer(self):
+        """Test that the output is the same as ProjectSerializer's"""
+        now = timezone.now()
+        original = sample_project(
+            user=self.user,
+            application=self.application,
+            data='uploads/project/values.xml',
+            thumbnail='uploads/project/values.png',
+            description='A project',
+            modified_date_history=[now, now - timedelta(days=1)],
+            modified_data_history=['uploads/project/old.xml'],
+        )
+        original.tags.add(sample_tag('Art'), sample_tag('Math'))
+        sample_project(
+            user=self.user,
+            application=self.application,
+            forked_from=original,
+            modified_date_history=None,
+        )
+        queryset = Project.objects.order_by('id')
+        context = {'request': RequestFactory().get('/')}
+
+        expected = ProjectSerializer(queryset, many=True, context=context)
+        serializer = ProjectValuesSerializer(queryset, context=context)
+
+        self.assertEqual(serializer.data, expected.data)
+        self.assertEqual(
+            ProjectValuesSerializer(queryset).data,
+            ProjectSerializer(queryset, many=True).data
+        )
@@ -27,6 +27,11 @@ def data_upload_url(id):
     return reverse('project:software-upload-data', args=[id])
 
 
+def instantiate_url(id):
+    """Return URL for creating a project from a software"""
+    return reverse('project:software-instantiate', args=[id])
+
+
 def sample_software(**params):
     """Create and return a sample software"""
     defaults = {
@@ -215,3 +220,60 @@ class SoftwareDataUploadTests(TestCase):
         )
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SoftwareInstantiateTests(TestCase):
+    """Test creating projects from a software template"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'instantiate@csdt.org',
+            'instantiate',
+            'instantiatepass'
+        )
+        self.client.force_authenticate(self.user)
+        self.application = sample_application()
+        self.tool = Tool.objects.create(name='Cornrow Curves')
+        self.software = sample_software(
+            tool=self.tool,
+            application=self.application,
+            name='Cornrow Curves Grapher',
+            default_file='uploads/software/template.xml'
+        )
+
+    def test_instantiate_software(self):
+        """Test creating a project that shares the template data"""
+        tag = Tag.objects.create(name='Middle School')
+        payload = {'description': 'My braid', 'tags': [tag.id]}
+
+        res = self.client.post(instantiate_url(self.software.id), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        project = Project.objects.get(id=res.data['id'])
+        self.assertEqual(project.owner, self.user)
+        self.assertEqual(project.title, self.software.name)
+        self.assertEqual(project.description, payload['description'])
+        self.assertEqual(project.application, self.application)
+        self.assertEqual(project.tool, self.tool)
+        self.assertEqual(project.data.name, self.software.default_file.name)
+        self.assertEqual(list(project.tags.all()), [tag])
+
+    def test_instantiate_with_title(self):
+        """Test naming the project created from a template"""
+        res = self.client.post(
+            instantiate_url(self.software.id),
+            {'title': 'Braids'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['title'], 'Braids')
+
+    def test_instantiate_auth_required(self):
+        """Test that anonymous users cannot create projects"""
+        self.client.force_authenticate(None)
+
+        res = self.client.post(instantiate_url(self.software.id))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Project.objects.exists())
@@ -1,15 +1,41 @@
+import hashlib
+import io
+import mimetypes
+import tempfile
+from collections import Counter
+from datetime import timedelta
+
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, \
                                        IsAuthenticated
 
+from django.conf import settings
+from django.core import signing
 from django.core.exceptions import PermissionDenied
+from django.core.files import File
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 
-from core.models import Tag, Project, Application, Software, Tool
+from core.models import Tag, Project, ProjectChange, ProjectRevision, \
+                        Application, Software, Tool, BlobDigest
+from core import metrics
+from core.storage import file_sha256
 
 from project import serializers
+from project.export import export_projects
+from project.patch import PatchError, apply_unified_diff
+
+
+# Kind of blob digest each project file field is indexed and probed as
+DIGEST_KINDS = {
+    'data': BlobDigest.Kind.DATA,
+    'thumbnail': BlobDigest.Kind.IMAGE,
+}
 
 
 class BaseProjectAttrViewSet(viewsets.ModelViewSet):
@@ -33,6 +59,24 @@ class BaseProjectAttrViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
 
+def _bulk_items_error(items):
+    """Return the error for a bulk request body that isn't a list of at
+    most BULK_MAX_SIZE items, if any"""
+    if not isinstance(items, list) or not items:
+        return {'non_field_errors': ['Expected a non-empty list of items.']}
+    if len(items) > settings.BULK_MAX_SIZE:
+        return {'non_field_errors': [
+            f'Ensure there are no more than {settings.BULK_MAX_SIZE} items.'
+        ]}
+    return None
+
+
+def _is_id(value):
+    """Check that a value from a request body is an integer id, which
+    JSON true and false are not"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
 class TagViewSet(viewsets.GenericViewSet,
                  mixins.ListModelMixin,
                  mixins.CreateModelMixin):
@@ -59,6 +103,60 @@ class TagViewSet(viewsets.GenericViewSet,
 
         serializer.save()
 
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request):
+        """Create many tags with one insert, if staff.
+
+        Every tag is validated before any is written. Invalid batches are
+        answered with 400 and the errors of each item, in order.
+        """
+        if not request.user.is_staff:
+            raise PermissionDenied()
+        error = _bulk_items_error(request.data)
+        if error:
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = serializers.TagBulkSerializer(
+            data=request.data,
+            many=True
+        )
+        valid = serializer.is_valid()
+        errors = serializer.errors if not valid else \
+            [{} for _ in request.data]
+        names = [
+            item.get('name') if isinstance(item, dict) else None
+            for item in request.data
+        ]
+        taken = set(Tag.objects.filter(name__in=[
+            name for name in names if isinstance(name, str)
+        ]).values_list('name', flat=True))
+        seen = set()
+        for name, item_errors in zip(names, errors):
+            if name in taken:
+                item_errors.setdefault('name', []).append(
+                    'tag with this name already exists.'
+                )
+            elif name in seen:
+                item_errors.setdefault('name', []).append(
+                    'Duplicate name in this request.'
+                )
+            seen.add(name)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        tags = Tag.objects.bulk_create(
+            Tag(**attrs) for attrs in serializer.validated_data
+        )
+        return Response(
+            [
+                {
+                    'status': status.HTTP_201_CREATED,
+                    'tag': serializers.TagSerializer(tag).data,
+                } for tag in tags
+            ],
+            status=status.HTTP_201_CREATED
+        )
+
 
 class ProjectViewSet(viewsets.ModelViewSet):
     """Manage projects in the database"""
@@ -75,6 +173,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """Retrieve the projects for the authenticated user"""
         tags = self.request.query_params.get('tags')
         applications = self.request.query_params.get('applications')
+        forked_from = self.request.query_params.get('forked_from')
         queryset = self.queryset
         if tags:
             tag_ids = self._params_to_ints(tags)
@@ -82,6 +181,16 @@ class ProjectViewSet(viewsets.ModelViewSet):
         if applications:
             application_ids = self._params_to_ints(applications)
             queryset = queryset.filter(application__id__in=application_ids)
+        if forked_from:
+            if not forked_from.isdigit():
+                raise ValidationError(
+                    {'forked_from': ['A valid integer is required.']}
+                )
+            queryset = queryset.filter(forked_from__id=int(forked_from))
+        queryset = serializers.ProjectSerializer.expand_queryset(
+            queryset,
+            self.request
+        )
 
         return queryset.filter(owner=self.request.user)
 
@@ -93,22 +202,196 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return serializers.ProjectImageSerializer
         elif self.action == 'upload_data':
             return serializers.ProjectDataSerializer
+        elif self.action == 'patch_data':
+            return serializers.ProjectDataPatchSerializer
+        elif self.action == 'revisions':
+            return serializers.ProjectRevisionSerializer
+        elif self.action in ('probe_data', 'probe_image'):
+            return serializers.BlobProbeSerializer
+        elif self.action == 'batch_get':
+            return serializers.ProjectBatchGetSerializer
 
         return self.serializer_class
 
+    def list(self, request, *args, **kwargs):
+        """List projects through the values based serializer, or the
+        regular one when relations are expanded"""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is None and \
+                not serializers.ProjectSerializer.expanded(request):
+            serializer = serializers.ProjectValuesSerializer(
+                queryset,
+                context=self.get_serializer_context()
+            )
+            return Response(serializer.data)
+
+        queryset = queryset.prefetch_related('tags')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+
+        return Response(serializer.data)
+
+    def _data_sha256(self, project):
+        """Return the SHA-256 of a project's data, empty if it has none"""
+        if not project.data:
+            return hashlib.sha256().hexdigest()
+        with project.data.open('rb') as data:
+            return file_sha256(data)
+
     def perform_create(self, serializer):
         """Create a new project"""
-        serializer.save(owner=self.request.user)
-
-    def update(self, request, *args, **kwargs):
-        """Append latest changes to history arrays for data."""
-        project = self.get_object()
+        with transaction.atomic():
+            project = serializer.save(owner=self.request.user)
+            ProjectChange.objects.record(project, ProjectChange.Kind.CREATED)
+
+    def perform_update(self, serializer):
+        """Update a project and log the change"""
+        project = serializer.save()
+        ProjectChange.objects.record(project, ProjectChange.Kind.UPDATED)
+
+    def perform_destroy(self, instance):
+        """Delete a project, leaving a tombstone in the change log"""
+        with transaction.atomic():
+            ProjectChange.objects.record(instance, ProjectChange.Kind.DELETED)
+            instance.delete()
+
+    def _should_checkpoint(self, project, default):
+        """Return whether a save should append to the project's history.
+
+        ?checkpoint=1 always does. Autosaves (?autosave=1) only do once
+        PROJECT_AUTOSAVE_WINDOW seconds have passed since the last entry,
+        other saves fall back to the action's default.
+        """
+        params = self.request.query_params
+        if bool(int(params.get('checkpoint', 0))):
+            return True
+        if not bool(int(params.get('autosave', 0))):
+            return default
+        window = timedelta(seconds=settings.PROJECT_AUTOSAVE_WINDOW)
+        return project.checkpoint_date is None or \
+            timezone.now() - project.checkpoint_date >= window
+
+    def _checkpoint(self, project):
+        """Append the project's current state to its history"""
+        ProjectRevision.objects.record(project)
         project.modified_date_history.append(project.modified_date)
         project.modified_data_history.append(project.data)
         project.modified_thumbnail_history.append(project.thumbnail)
-        project.save()
+        project.checkpoint_date = timezone.now()
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        """Append latest changes to history arrays for data.
+
+        Autosaves within the autosave window overwrite the project without
+        a history entry. Every acknowledged save is committed before the
+        response either way; only the intermediate states are dropped.
+        """
+        project = self.get_object()
+        if self._should_checkpoint(project, default=True):
+            self._checkpoint(project)
+            project.save()
         return super().update(request, *args, **kwargs)
 
+    def _ticket_matches(self, ticket, project, field_name, sha256, size):
+        """Check an upload against the ticket a probe handed out"""
+        try:
+            expected = signing.loads(
+                ticket,
+                salt='upload-ticket',
+                max_age=settings.UPLOAD_TICKET_MAX_AGE
+            )
+        except signing.BadSignature:
+            return False
+        return expected == {
+            'project': project.pk,
+            'field': field_name,
+            'sha256': sha256,
+            'size': size,
+        }
+
+    def _save_upload(self, project, serializer, field_name):
+        """Save an uploaded data or thumbnail file and index its digest"""
+        upload = serializer.validated_data.get(field_name)
+        sha256 = file_sha256(upload) if upload else None
+        ticket = self.request.data.get('ticket')
+        if ticket is not None and not self._ticket_matches(
+            ticket, project, field_name, sha256, upload and upload.size
+        ):
+            return Response(
+                {'ticket': ['Upload does not match its ticket.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            if field_name == 'data' and \
+                    self._should_checkpoint(project, default=False):
+                self._checkpoint(project)
+            serializer.save()
+            ProjectChange.objects.record(project, ProjectChange.Kind.UPDATED)
+            if upload:
+                BlobDigest.objects.index(
+                    getattr(project, field_name).name,
+                    sha256,
+                    upload.size,
+                    DIGEST_KINDS[field_name]
+                )
+        if upload:
+            metrics.UPLOAD_BYTES.inc(upload.size, field=field_name)
+        return Response(
+            serializer.data,
+            status=status.HTTP_200_OK
+        )
+
+    def _probe(self, request, field_name, output_serializer):
+        """Attach a blob the server already has, or hand out a ticket.
+
+        A blob of the field's kind matching the SHA-256 and size is shared
+        by name like forks share files. Otherwise the answer carries a
+        ticket which the following upload has to match.
+        """
+        project = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        sha256 = serializer.validated_data['sha256']
+        size = serializer.validated_data['size']
+        storage = Project._meta.get_field(field_name).storage
+        name = BlobDigest.objects.lookup(
+            sha256,
+            size,
+            DIGEST_KINDS[field_name],
+            storage
+        )
+        if name is None:
+            ticket = signing.dumps({
+                'project': project.pk,
+                'field': field_name,
+                'sha256': sha256,
+                'size': size,
+            }, salt='upload-ticket')
+            return Response({'attached': False, 'ticket': ticket})
+
+        with transaction.atomic():
+            if field_name == 'data' and \
+                    self._should_checkpoint(project, default=False):
+                self._checkpoint(project)
+            setattr(project, field_name, name)
+            project.save()
+            ProjectChange.objects.record(project, ProjectChange.Kind.UPDATED)
+        data = output_serializer(
+            project,
+            context=self.get_serializer_context()
+        ).data
+        data['attached'] = True
+        return Response(data)
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload a thumbnail to a project"""
@@ -118,11 +401,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
-            return Response(
-                serializer.data,
-                status=status.HTTP_200_OK
-            )
+            return self._save_upload(project, serializer, 'thumbnail')
 
         return Response(
             serializer.errors,
@@ -131,24 +410,465 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     @action(methods=['POST'], detail=True, url_path='upload-data')
     def upload_data(self, request, pk=None):
-        """Upload a project's data to a project"""
+        """Upload a project's data to a project.
+
+        Takes ?autosave=1 and ?checkpoint=1 like updates do, without them
+        an upload doesn't touch the history.
+        """
         project = self.get_object()
         serializer = self.get_serializer(
             project,
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
-            return Response(
-                serializer.data,
-                status=status.HTTP_200_OK
-            )
+            return self._save_upload(project, serializer, 'data')
 
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(methods=['POST'], detail=True, url_path='probe-image')
+    def probe_image(self, request, pk=None):
+        """Attach an already stored thumbnail by its digest"""
+        return self._probe(
+            request,
+            'thumbnail',
+            serializers.ProjectImageSerializer
+        )
+
+    @action(methods=['POST'], detail=True, url_path='probe-data')
+    def probe_data(self, request, pk=None):
+        """Attach already stored project data by its digest"""
+        return self._probe(
+            request,
+            'data',
+            serializers.ProjectDataSerializer
+        )
+
+    @action(methods=['POST'], detail=True, url_path='patch-data')
+    def patch_data(self, request, pk=None):
+        """Apply a unified diff to a project's data.
+
+        base is the SHA-256 of the data the diff was made against, a stale
+        base answers 412. The optional hash of the expected result is
+        checked before anything is stored.
+        """
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic(), tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        ) as result:
+            project = Project.objects.select_for_update().get(
+                pk=self.get_object().pk
+            )
+            if self._data_sha256(project) != \
+                    serializer.validated_data['base']:
+                return Response(
+                    {'base': ['Project data has changed since base.']},
+                    status=status.HTTP_412_PRECONDITION_FAILED
+                )
+
+            patch = serializer.validated_data['patch']
+            try:
+                if project.data:
+                    with project.data.open('rb') as base:
+                        apply_unified_diff(base, patch, result)
+                else:
+                    apply_unified_diff(io.BytesIO(), patch, result)
+            except PatchError as e:
+                return Response(
+                    {'patch': [str(e)]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            result = File(result)
+            digest = file_sha256(result)
+            if serializer.validated_data.get('hash', digest) != digest:
+                return Response(
+                    {'hash': ['Patched data does not match hash.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if self._should_checkpoint(project, default=False):
+                self._checkpoint(project)
+            project.data.save('data.xml', result)
+            ProjectChange.objects.record(project, ProjectChange.Kind.UPDATED)
+            BlobDigest.objects.index(
+                project.data.name,
+                digest,
+                result.size,
+                BlobDigest.Kind.DATA
+            )
+
+        data = serializers.ProjectDataSerializer(
+            project,
+            context=self.get_serializer_context()
+        ).data
+        data['hash'] = digest
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=True)
+    def revisions(self, request, pk=None):
+        """List the stored revisions of a project's data"""
+        project = self.get_object()
+        serializer = self.get_serializer(
+            project.revisions.order_by('number'),
+            many=True
+        )
+        return Response(serializer.data)
+
+    @action(methods=['GET'], detail=True,
+            url_path=r'revisions/(?P<number>[0-9]+)')
+    def revision(self, request, pk=None, number=None):
+        """Return the data of one stored revision"""
+        project = self.get_object()
+        try:
+            revision = project.revisions.get(number=number)
+            content = ProjectRevision.objects.read(project, revision.number)
+        except ProjectRevision.DoesNotExist:
+            raise Http404()
+
+        content_type = mimetypes.guess_type(revision.name)[0]
+        return HttpResponse(
+            content,
+            content_type=content_type or 'application/octet-stream'
+        )
+
+    @action(methods=['POST'], detail=True)
+    def fork(self, request, pk=None):
+        """Fork a project, sharing its data and thumbnail files.
+
+        Uploads never overwrite a file in place, so both projects keep
+        pointing at the same files until either side uploads new ones.
+        """
+        parent = self.get_object()
+        options = serializers.ProjectForkSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        with transaction.atomic():
+            project = Project.objects.create(
+                owner=request.user,
+                title=options.validated_data.get('title', parent.title),
+                tool=parent.tool,
+                application=parent.application,
+                data=parent.data.name or None,
+                thumbnail=parent.thumbnail.name or None,
+                description=parent.description,
+                forked_from=parent
+            )
+            project.tags.add(*parent.tags.all())
+            ProjectChange.objects.record(project, ProjectChange.Kind.CREATED)
+
+        serializer = self.get_serializer(project)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """Create (POST), update (PATCH) or delete (DELETE) many projects.
+
+        POST and PATCH take a list of projects, PATCH items carry their id,
+        DELETE takes a list of ids. Every item is validated before any is
+        written, invalid batches are answered with 400 and the errors of
+        each item in order. Writes go through bulk inserts and updates in
+        one transaction.
+        """
+        error = _bulk_items_error(request.data)
+        if error:
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
+        if request.method == 'DELETE':
+            return self._bulk_delete(request.data)
+
+        context = self.get_serializer_context()
+        context['related_objects'] = self._related_objects(request.data)
+        if request.method == 'POST':
+            return self._bulk_create(request.data, context)
+        return self._bulk_update(request.data, context)
+
+    def _bulk_results(self, projects, status_code):
+        """Return the per-item results of a bulk write, in item order"""
+        data = {
+            item['id']: item for item in serializers.ProjectValuesSerializer(
+                Project.objects.filter(pk__in=[p.pk for p in projects]),
+                context=self.get_serializer_context()
+            ).data
+        }
+        return [
+            {'status': status_code, 'project': data[project.pk]}
+            for project in projects
+        ]
+
+    def _write_tags(self, project_tags):
+        """Replace the tags of (project, tags) pairs with bulk through-table
+        writes"""
+        through = Project.tags.through
+        through.objects.filter(
+            project_id__in=[project.pk for project, _ in project_tags]
+        ).delete()
+        through.objects.bulk_create(
+            through(project_id=project.pk, tag_id=tag.pk)
+            for project, tags in project_tags
+            for tag in dict.fromkeys(tags)
+        )
+
+    def _related_objects(self, items):
+        """Preload the applications and tags referenced by bulk items"""
+        items = [item for item in items if isinstance(item, dict)]
+        application_ids = {item.get('application') for item in items}
+        tag_ids = {
+            pk for item in items if isinstance(item.get('tags'), list)
+            for pk in item['tags']
+        }
+        return {
+            Application: Application.objects.in_bulk([
+                pk for pk in application_ids if _is_id(pk)
+            ]),
+            Tag: Tag.objects.in_bulk([
+                pk for pk in tag_ids if _is_id(pk)
+            ]),
+        }
+
+    def _bulk_create(self, items, context):
+        """Create many projects with bulk inserts"""
+        serializer = serializers.ProjectSerializer(
+            data=items,
+            many=True,
+            context=context
+        )
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        projects, project_tags = [], []
+        with transaction.atomic():
+            for attrs in serializer.validated_data:
+                attrs = dict(attrs)
+                tags = attrs.pop('tags', [])
+                project = Project(owner=self.request.user, **attrs)
+                projects.append(project)
+                project_tags.append((project, tags))
+            Project.objects.bulk_create(projects)
+            self._write_tags(project_tags)
+            ProjectChange.objects.record_many(
+                projects,
+                ProjectChange.Kind.CREATED
+            )
+
+        return Response(
+            self._bulk_results(projects, status.HTTP_201_CREATED),
+            status=status.HTTP_201_CREATED
+        )
+
+    def _bulk_update(self, items, context):
+        """Update many projects with one bulk update.
+
+        History is appended per project as in a single update, honouring
+        ?checkpoint= and ?autosave=.
+        """
+        ids = [item.get('id') if isinstance(item, dict) else None
+               for item in items]
+        counts = Counter(ids)
+        with transaction.atomic():
+            projects = self.queryset.filter(owner=self.request.user) \
+                .select_for_update().in_bulk(
+                    [pk for pk in ids if _is_id(pk)]
+                )
+            updates, errors = [], []
+            for pk, item in zip(ids, items):
+                project = projects.get(pk) if _is_id(pk) else None
+                if project is None or counts[pk] > 1:
+                    errors.append({'id': ['Not found or duplicated.']})
+                    continue
+                serializer = serializers.ProjectSerializer(
+                    project,
+                    data=item,
+                    partial=True,
+                    context=context
+                )
+                errors.append({} if serializer.is_valid()
+                              else serializer.errors)
+                updates.append((project, serializer.validated_data))
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            fields, project_tags = {'modified_date'}, []
+            for project, attrs in updates:
+                if self._should_checkpoint(project, default=True):
+                    self._checkpoint(project)
+                    fields.update((
+                        'modified_date_history',
+                        'modified_data_history',
+                        'modified_thumbnail_history',
+                        'checkpoint_date',
+                    ))
+                attrs = dict(attrs)
+                if 'tags' in attrs:
+                    project_tags.append((project, attrs.pop('tags')))
+                for name, value in attrs.items():
+                    setattr(project, name, value)
+                fields.update(attrs)
+            for project, _ in updates:
+                for name in fields:
+                    Project._meta.get_field(name).pre_save(project, False)
+            projects = [project for project, _ in updates]
+            Project.objects.bulk_update(projects, sorted(fields))
+            if project_tags:
+                self._write_tags(project_tags)
+            ProjectChange.objects.record_many(
+                projects,
+                ProjectChange.Kind.UPDATED
+            )
+
+        return Response(self._bulk_results(projects, status.HTTP_200_OK))
+
+    def _bulk_delete(self, ids):
+        """Delete many projects, leaving tombstones in the change log"""
+        counts = Counter(ids)
+        with transaction.atomic():
+            projects = self.queryset.filter(owner=self.request.user) \
+                .select_for_update().in_bulk(
+                    [pk for pk in ids if _is_id(pk)]
+                )
+            errors = [
+                {} if _is_id(pk) and pk in projects
+                and counts[pk] == 1
+                else {'id': ['Not found or duplicated.']}
+                for pk in ids
+            ]
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            ProjectChange.objects.record_many(
+                projects.values(),
+                ProjectChange.Kind.DELETED
+            )
+            Project.objects.filter(pk__in=ids).delete()
+
+        return Response([
+            {'id': pk, 'status': status.HTTP_204_NO_CONTENT} for pk in ids
+        ])
+
+    @action(methods=['POST'], detail=False, url_path='batch-get')
+    def batch_get(self, request):
+        """Fetch many projects by id in one query.
+
+        Results keep the order of the requested ids, each with the status
+        a single retrieve would have answered, so projects that don't
+        exist or belong to someone else are reported as 404.
+        """
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ids = serializer.validated_data['ids']
+        projects = self.get_queryset().prefetch_related('tags').in_bulk(ids)
+        context = self.get_serializer_context()
+        results = []
+        for project_id in ids:
+            project = projects.get(project_id)
+            if project is None:
+                results.append({
+                    'id': project_id,
+                    'status': status.HTTP_404_NOT_FOUND,
+                })
+                continue
+            results.append({
+                'id': project_id,
+                'status': status.HTTP_200_OK,
+                'project': serializers.ProjectDetailSerializer(
+                    project,
+                    context=context
+                ).data,
+            })
+
+        return Response({'results': results})
+
+    @action(methods=['GET'], detail=False)
+    def export(self, request):
+        """Stream a ZIP archive of the user's projects and their files.
+
+        The archive is built while it is sent, reading projects in chunks
+        of PROJECT_EXPORT_CHUNK_SIZE, so only the project metadata is held
+        back, spooled to a temporary file until the files are written.
+        """
+        response = StreamingHttpResponse(
+            export_projects(
+                self.queryset.filter(owner=request.user),
+                self.get_serializer_context(),
+                settings.PROJECT_EXPORT_CHUNK_SIZE
+            ),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = \
+            'attachment; filename="projects.zip"'
+
+        return response
+
+    @action(methods=['GET'], detail=False)
+    def changes(self, request):
+        """Return the projects changed or deleted since a feed cursor.
+
+        Without ?since= only the current cursor is returned, to be taken
+        before a full listing. A cursor older than the last compaction
+        answers 410 and the client has to resync from a full listing.
+        """
+        feed = ProjectChange.objects.filter(owner=request.user)
+        since = request.query_params.get('since')
+        if since is None:
+            latest = feed.order_by('-seq').values_list('seq', flat=True)
+            return Response({'cursor': latest.first() or 0})
+
+        if not since.isdigit():
+            return Response(
+                {'since': ['A valid cursor is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        feed = feed.filter(seq__gt=int(since))
+        if feed.filter(kind=ProjectChange.Kind.COMPACTED).exists():
+            latest = feed.order_by('-seq').values_list('seq', flat=True)
+            return Response(
+                {'cursor': latest.first()},
+                status=status.HTTP_410_GONE
+            )
+
+        page_size = settings.PROJECT_CHANGES_PAGE_SIZE
+        entries = list(
+            feed.order_by('seq')
+            .values_list('seq', 'project_id', 'kind')[:page_size]
+        )
+        latest_kinds = {
+            project_id: kind for _, project_id, kind in entries
+        }
+        deleted = [
+            project_id for project_id, kind in latest_kinds.items()
+            if kind == ProjectChange.Kind.DELETED
+        ]
+        projects = serializers.ProjectSerializer.expand_queryset(
+            self.queryset,
+            request
+        ).filter(
+            owner=request.user,
+            id__in=[
+                project_id for project_id, kind in latest_kinds.items()
+                if kind != ProjectChange.Kind.DELETED
+            ]
+        ).prefetch_related('tags').order_by('id')
+
+        return Response({
+            'cursor': entries[-1][0] if entries else int(since),
+            'more': len(entries) == page_size,
+            'changed': self.get_serializer(projects, many=True).data,
+            'deleted': deleted,
+        })
+
 
 class ApplicationViewSet(BaseProjectAttrViewSet):
     """Manage applications in the database"""
@@ -161,12 +881,21 @@ class SoftwareViewSet(BaseProjectAttrViewSet):
     serializer_class = serializers.SoftwareSerializer
     queryset = Software.objects.all()
 
+    def get_queryset(self):
+        """Return software, joining the relations to expand"""
+        return serializers.SoftwareSerializer.expand_queryset(
+            super().get_queryset(),
+            self.request
+        )
+
     def get_serializer_class(self):
         """Return the appropriate serializer class"""
         if self.action == 'retrieve':
             return serializers.SoftwareDetailSerializer
         elif self.action == 'upload_data':
             return serializers.SoftwareDataSerializer
+        elif self.action == 'instantiate':
+            return serializers.ProjectInstantiateSerializer
 
         return self.serializer_class
 
@@ -179,7 +908,18 @@ class SoftwareViewSet(BaseProjectAttrViewSet):
             data=request.data
         )
         if serializer.is_valid():
-            serializer.save()
+            upload = serializer.validated_data.get('default_file')
+            with transaction.atomic():
+                serializer.save()
+                if upload:
+                    BlobDigest.objects.index(
+                        software.default_file.name,
+                        file_sha256(upload),
+                        upload.size,
+                        BlobDigest.Kind.DATA
+                    )
+            if upload:
+                metrics.UPLOAD_BYTES.inc(upload.size, field='default_file')
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -190,6 +930,45 @@ class SoftwareViewSet(BaseProjectAttrViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(methods=['POST'], detail=True)
+    def instantiate(self, request, pk=None):
+        """Create a project for the caller from a software template.
+
+        The project references the template's data file by name. Uploads
+        never overwrite a file in place, so the file is shared until the
+        project's first data upload gives it a copy of its own.
+        """
+        software = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        if serializer.is_valid():
+            with transaction.atomic():
+                project = serializer.save(
+                    owner=request.user,
+                    title=serializer.validated_data.get(
+                        'title',
+                        software.name
+                    ),
+                    application=software.application,
+                    tool=software.tool,
+                    data=software.default_file.name or None
+                )
+                ProjectChange.objects.record(
+                    project,
+                    ProjectChange.Kind.CREATED
+                )
+            return Response(
+                serializers.ProjectSerializer(
+                    project,
+                    context=self.get_serializer_context()
+                ).data,
+                status=status.HTTP_201_CREATED
+            )
+
+        return Response(
+            serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
 
 class ToolViewSet(BaseProjectAttrViewSet):
     """Manage tools in the database"""